@@ -1,3 +1,5 @@
+import heapq
+import itertools
 from config_SimPy import *
 
 class Item:
@@ -19,9 +21,11 @@ class Item:
     is_reprocess (bool): Flag for reprocessed item
     processing_history (list): List of processing history
     is_supplier: Item of Order type is lot or pallet.
+    quantity: Number of identical units this entity stands for (aggregated lot/pallet mode)
+    order_items: List of the order's entities (splits are appended to it)
     """
     
-    def __init__(self, id_customer, id_order, id_item, is_supplier):
+    def __init__(self, id_customer, id_order, id_item, is_supplier, quantity=1):
         self.id_customer = id_customer
         self.id_order = id_order
         self.id_item = id_item
@@ -38,6 +42,51 @@ class Item:
         self.processing_history = []  # Will store each process step details
         self.waiting_history = []  # Will store each waiting step details
         self.is_supplier = is_supplier
+        # Aggregated entity: units id_item .. id_item + quantity - 1 of the order
+        self.quantity = quantity
+        self.order_items = None
+
+    @classmethod
+    def acquire(cls, id_customer, id_order, id_item, is_supplier, quantity=1, pool=None):
+        """New item, reusing a retired Item object from `pool` (RetentionPolicy.item_pool) when one is available"""
+        if not pool:
+            return cls(id_customer, id_order, id_item, is_supplier, quantity)
+        item = pool.pop()
+        item.__dict__.clear()
+        item.__init__(id_customer, id_order, id_item, is_supplier, quantity)
+        return item
+
+    def split(self, quantity):
+        """
+        Split the last `quantity` units off into a new entity
+
+        The new entity copies the state and history of this one and is
+        appended to the order's item list, so order completion still sees it.
+        """
+        if not 0 < quantity < self.quantity:
+            raise ValueError(f"Cannot split {quantity} units off an entity of {self.quantity}")
+        self.quantity -= quantity
+        child = Item.acquire(self.id_customer, self.id_order, self.id_item + self.quantity,
+                             self.is_supplier, quantity)
+        child.type_item = self.type_item
+        child.is_completed = self.is_completed
+        child.is_defect = self.is_defect
+        child.workstation = dict(self.workstation)
+        child.time_processing_start = self.time_processing_start
+        child.time_processing_end = self.time_processing_end
+        child.time_waiting_start = self.time_waiting_start
+        child.time_waiting_end = self.time_waiting_end
+        child.is_reprocess = self.is_reprocess
+        child.processing_history = [dict(step) for step in self.processing_history]
+        child.waiting_history = [dict(step) for step in self.waiting_history]
+        if hasattr(self, 'process_sequence'):
+            child.process_sequence = list(self.process_sequence)
+        if hasattr(self, 'route_id'):
+            child.route_id = self.route_id
+        child.order_items = self.order_items
+        if self.order_items is not None:
+            self.order_items.append(child)
+        return child
         
 class Order:
     """
@@ -54,19 +103,26 @@ class Order:
         completed_item_count: Counter for completed items
         makespan: Makespan of this order
         order_supplier: Item of Order type is lot or pallet.
+        priority: Priority of the ordering customer (higher is more urgent)
+        due_date: Time the order is due (None if the customer sets no due date)
     """
 
-    def __init__(self,  id_customer, id_order, order_supplier):
+    def __init__(self,  id_customer, id_order, order_supplier, num_items=None, priority=0, due_date=None,
+                 item_pool=None):
         """
         Create an order with the given ID.
 
         Args:
             id_customer: ID of the customer this item belongs to
             id_order:    ID of the order this item belongs to
+            num_items:   Number of items (drawn from NUM_ITEMS_PER_ORDER by default)
+            item_pool:   Retired items of the receiving Manager to reuse (None = new objects)
         """
         self.id_customer = id_customer
         self.id_order = id_order
-        self.num_items = NUM_ITEMS_PER_ORDER()
+        self.num_items = NUM_ITEMS_PER_ORDER() if num_items is None else num_items
+        self.priority = priority
+        self.due_date = due_date
         self.list_items = []
         self.time_start = None
         self.time_end = None
@@ -77,14 +133,22 @@ class Order:
         
         # Create items for this order using the provided function
         self.list_items = self._create_items_for_order(
-            self.id_customer, self.id_order, self.num_items, self.is_supplier)
+            self.id_customer, self.id_order, self.num_items, self.is_supplier, item_pool)
 
-    def _create_items_for_order(self, id_customer, id_order, num_items, is_supplier):
+    def _create_items_for_order(self, id_customer, id_order, num_items, is_supplier, item_pool=None):
         """Create items for an order"""
         items = []
+        if AGGREGATE_LOT_ENTITIES and num_items > 0:
+            # One entity for the whole lot/pallet, split later where units matter
+            item = Item.acquire(id_customer, id_order, self._get_next_item_id(), is_supplier, num_items,
+                                item_pool)
+            self.item_counter += num_items - 1
+            item.order_items = items
+            items.append(item)
+            return items
         for _ in range(num_items):
             item_id = self._get_next_item_id()
-            item = Item(id_customer, id_order, item_id, is_supplier)
+            item = Item.acquire(id_customer, id_order, item_id, is_supplier, pool=item_pool)
             items.append(item)
         return items
 
@@ -94,6 +158,12 @@ class Order:
         self.item_counter += 1
         return item_id
 
+    def tardiness(self, time_end):
+        """Time past the due date of an order finished at time_end (None without a due date)"""
+        if self.due_date is None:
+            return None
+        return max(0.0, time_end - self.due_date)
+
     def check_completion(self):
         """Check if all items for this order are completed"""
         if all(item.is_completed for item in self.list_items):
@@ -140,7 +210,8 @@ class Customer:
             # Create a new order
             order_id = self.get_next_order_id()
             order_supplier = SUPPLY_TYPE_DECISION()
-            order = Order(self.id_customer, order_id, order_supplier)
+            order = Order(self.id_customer, order_id, order_supplier,
+                          item_pool=getattr(self.order_receiver, 'item_pool', None))
             order.time_start = self.env.now
 
             # # Log order creation
@@ -161,6 +232,121 @@ class Customer:
         self.order_receiver.receive_order(order)
 
 
+class CustomerProfile:
+    """
+    One customer of a population (ordering behaviour only, no SimPy process)
+
+    Attributes:
+        id_customer: ID of this customer
+        mean_interarrival: Mean time between two orders (unit: minutes)
+        arrival: "EXPONENTIAL" (Poisson orders) or "FIXED" (one order every mean_interarrival)
+        num_items: Order size: an int, a (low, high) range or {"values": [...], "weights": [...]}
+            (None draws from NUM_ITEMS_PER_ORDER)
+        priority: Priority copied into every order
+        due_date: Due time of an order relative to its release (None = no due date)
+        supplier: "LOT", "PALLET" or None (drawn by SUPPLY_TYPE_DECISION)
+        order_counter: Next order ID of this customer
+    """
+
+    def __init__(self, id_customer, mean_interarrival, arrival="EXPONENTIAL", num_items=None,
+                 priority=0, due_date=None, supplier=None):
+        self.id_customer = id_customer
+        self.mean_interarrival = mean_interarrival
+        self.arrival = arrival.upper()
+        self.num_items = num_items
+        self.priority = priority
+        self.due_date = due_date
+        self.supplier = supplier
+        self.order_counter = 1
+
+    def next_interarrival(self):
+        """Time until the next order of this customer"""
+        if self.arrival == "FIXED":
+            return self.mean_interarrival
+        return random.expovariate(1.0 / self.mean_interarrival)
+
+    def first_arrival(self):
+        """Time of the first order (fixed-cycle customers are staggered over one cycle)"""
+        if self.arrival == "FIXED":
+            return random.uniform(0, self.mean_interarrival)
+        return self.next_interarrival()
+
+    def draw_num_items(self):
+        """Order size drawn from the customer's distribution"""
+        size = self.num_items
+        if size is None:
+            return NUM_ITEMS_PER_ORDER()
+        if isinstance(size, dict):
+            return random.choices(size["values"], weights=size.get("weights"))[0]
+        if isinstance(size, (tuple, list)):
+            return random.randint(size[0], size[1])
+        return size
+
+    def create_order(self, now, item_pool=None):
+        """Next order of this customer released at `now`"""
+        id_order = self.order_counter
+        self.order_counter += 1
+        supplier = self.supplier or SUPPLY_TYPE_DECISION()
+        due_date = None if self.due_date is None else now + self.due_date
+        order = Order(self.id_customer, id_order, supplier, self.draw_num_items(), self.priority, due_date,
+                      item_pool)
+        order.time_start = now
+        return order
+
+
+class CustomerPopulation:
+    """
+    Many customers driven by one SimPy process
+
+    The next order time of every customer sits in a heap; the single
+    generator sleeps until the earliest one, releases that customer's order
+    and pushes its following order time. Orders due at the same time are
+    released without extra timeouts.
+
+    Attributes:
+        env: Simulation environment
+        order_receiver: Order receiver object
+        logger: Logger object
+        customers (list): CustomerProfile of every customer
+        num_orders (int): Orders released so far
+    """
+
+    def __init__(self, env, order_receiver, logger, profiles=None):
+        self.env = env
+        self.order_receiver = order_receiver
+        self.logger = logger
+        self.customers = []
+        for profile in (CUSTOMER_POPULATION if profiles is None else profiles):
+            settings = dict(profile)
+            count = settings.pop("count", 1)
+            for _ in range(count):
+                self.customers.append(CustomerProfile(Customer._next_customer_id, **settings))
+                Customer._next_customer_id += 1
+        self.num_orders = 0
+        self.processing = env.process(self.create_orders())
+
+    def create_orders(self):
+        """Release the orders of all customers in time order"""
+        seq = itertools.count()
+        heap = [(customer.first_arrival(), next(seq), customer) for customer in self.customers]
+        heapq.heapify(heap)
+        while heap:
+            time, _, customer = heap[0]
+            if time > self.env.now:
+                yield self.env.timeout(time - self.env.now)
+            order = customer.create_order(self.env.now, getattr(self.order_receiver, 'item_pool', None))
+            heapq.heapreplace(heap, (time + customer.next_interarrival(), next(seq), customer))
+            self.num_orders += 1
+            self.order_receiver.receive_order(order)
+
+
+def create_customers(env, order_receiver, logger):
+    """Customer population when CUSTOMER_POPULATION is set, otherwise the single periodic Customer"""
+    if CUSTOMER_POPULATION:
+        return CustomerPopulation(env, order_receiver, logger)
+    return Customer(env, order_receiver, logger)
+
+
 class OrderReceiver:
     """Interface for order receiving objects"""
 
@@ -1,5 +1,10 @@
+import random
+import simpy
+from config_SimPy import *
 from base_Store import ItemStore
 from base_Processor import ProcessorResource
+from distribution_SimPy import make_sampler, combine_batch_times
+from calendar_SimPy import calendar_for
 
 class Process:
     """
@@ -13,10 +18,21 @@ class Process:
         item_store (ItemStore): Item queue management
         processor_resources (dict): Processor resources (Machine, Amr, Worker)
         completed_items (list): List of completed items
-        next_process (Process): Next process in the flow
+        next_process (Process): Next process in the flow (used when no router is set)
+        router (RoutingTable): Compiled routing table that picks the next process (None = next_process)
+        stage_index (int): Index of this process in the routing table
         resource_trigger (simpy.Event): Resource trigger event
         item_added_trigger (simpy.Event): item added trigger event
         process (simpy.Process): Main process execution    
+        trip_history (list): Per-trip load records of AMR processors
+        batch_wakeup_time (float): Time of the pending batching re-check (None if none)
+        time_sampler (ProcessingTimeSampler): Processing-time distribution (None = constant time)
+        zero_time_fast_path (bool): Instantaneous stage processed inline (decided on first use)
+        batch_time_rule (str): Rule combining item times of a batch ("SUM", "MAX", "PARALLEL")
+        arrival_log (list): (item, time) of every queued item, in arrival order (None = not recorded)
+        retention (RetentionPolicy): Receives finished steps and trips instead of the lists above (None = keep lists)
+        supply (LineSupply): Shared raw-material draws of a multi-line plant (None = unlimited supply)
+        rng (random.Random): Source of run-time random draws (the global `random` module by default)
     """
     
     def __init__(self, name_process, env, logger=None):
@@ -33,9 +49,34 @@ class Process:
         
         # Track completed items
         self.completed_items = []
+
+        # Per-trip load records (AMR batching statistics)
+        self.trip_history = []
+        self.batch_wakeup_time = None
+
+        # Processing-time distribution and batch time rule
+        self.time_sampler = make_sampler(name_process)
+        self.batch_time_rule = BATCH_TIME_RULES.get(name_process, BATCH_TIME_RULE).upper()
+
+        # Zero-duration fast path (decided once all processors are registered)
+        self.zero_time_fast_path = None
+        # Processors that served an inline item at the current instant
+        self.inline_claims = (None, set())
+
+        # Arrival stream record (enabled for incremental re-simulation)
+        self.arrival_log = None
+
+        # Bounded-memory retention (set by the Manager when enabled)
+        self.retention = None
+
+        # Multi-line plant hooks (set by plant_SimPy)
+        self.supply = None
+        self.rng = random
         
-        # Next process
+        # Next process (fixed successor, or looked up in the routing table)
         self.next_process = None
+        self.router = None
+        self.stage_index = None
         
         # Add new events
         self.resource_trigger = env.event()
@@ -71,6 +112,9 @@ class Process:
         else:  # Worker
             processor_id = f"Worker_{processor.id_worker}"
 
+        # Attach the working-shift calendar (None = works 24/7)
+        processor_resource.calendar = calendar_for(processor_resource)
+
         # Store resource
         self.processor_resources[processor_id] = processor_resource
         
@@ -92,6 +136,16 @@ class Process:
             item.waiting_history = []
         item.waiting_history.append(process_step)        
 
+        if self.arrival_log is not None:
+            self.arrival_log.append((item, self.env.now))
+
+        # Instantaneous stage with an idle processor: process inline, no SimPy events
+        if self.item_store.is_empty and getattr(item, 'quantity', 1) == 1 and self.is_zero_time_stage():
+            processor_resource = self.idle_processor()
+            if processor_resource is not None:
+                self.process_inline(processor_resource, item)
+                return
+
         # Add item to itemStore
         self.item_store.put(item)
 
@@ -104,6 +158,75 @@ class Process:
             self.logger.log_event(
                 "Queue", f"Added item {item.id_item} to {self.name_process} queue. Queue length: {self.item_store.size}")
 
+    def is_zero_time_stage(self):
+        """
+        True if every processor of this stage finishes its work in zero time
+        and inline processing cannot change the run
+
+        AMR stages keep the regular path (batching, dispatch delays and trip
+        records), and so do stages that draw from the global `random` stream
+        or send items back for rework, because processing them earlier within
+        the instant would reorder those draws or the rework queue. Processors
+        with a shift calendar keep it too, so off-shift arrivals wait for the shift.
+        """
+        if self.zero_time_fast_path is None:
+            self.zero_time_fast_path = (
+                FAST_PATH_ZERO_TIME
+                and bool(self.processor_resources)
+                and all(res.processor_type != "AMR" for res in self.processor_resources.values())
+                and all(res.calendar is None for res in self.processor_resources.values())
+                and not self.consumes_random()
+                and not self.can_trigger_rework()
+                and self.time_sampler is None
+                and not hasattr(self, 'calculate_processing_time')
+                and all(res.processing_time == 0 for res in self.processor_resources.values())
+            )
+        return self.zero_time_fast_path
+
+    def consumes_random(self):
+        """True if processing at this stage draws from the global `random` stream"""
+        return False
+
+    def can_trigger_rework(self):
+        """True if items processed here may be sent back upstream for rework"""
+        return False
+
+    def idle_processor(self):
+        """
+        First available processor with nothing in progress (None if contended)
+
+        A zero-time job still holds its processor for the rest of the instant
+        in the regular path, so a processor serves one inline item per instant.
+        """
+        claim_time, claimed = self.inline_claims
+        if claim_time != self.env.now:
+            claimed = set()
+            self.inline_claims = (self.env.now, claimed)
+        for processor_id, processor_resource in self.processor_resources.items():
+            if processor_id in claimed:
+                continue
+            if processor_resource.count == 0 and processor_resource.is_available:
+                claimed.add(processor_id)
+                return processor_resource
+        return None
+
+    def process_inline(self, processor_resource, item):
+        """
+        Zero-duration processing at enqueue time
+
+        Keeps the item history records of the regular path (waiting step,
+        processing step) without a seize process, store get, resource request
+        or timeout(0). The queue-length record is the same step function of
+        time; only zero-duration samples within one instant can differ (items
+        arriving together are not counted as queued together).
+        """
+        history = self.item_store.queue_length_history
+        history.append((self.env.now, 1))
+        history.append((self.env.now, 0))
+        self.start_items(processor_resource, [item])
+        self.complete_items(processor_resource, [item])
+        processor_resource.finish_items()
+
     def run(self):
         "Event based process execution"
         
@@ -153,16 +276,27 @@ class Process:
             remaining_capacity = processor_resource.capacity - processor_resource.count
             items_to_assign = []
 
-            # Assign items
+            # AMR batching policy: hold the trip until the load is large enough
+            if self.item_store.is_empty:
+                break
+            oldest_wait = self.env.now - self.item_store.items[0].time_waiting_start
+            delay = processor_resource.dispatch_delay(self.item_store.num_units, oldest_wait)
+            if delay is None:
+                continue
+            if delay > 0:
+                self.schedule_batch_wakeup(delay)
+                continue
+
+            # Assign items (capacity counts units; an aggregated entity is split to fit)
             try:
-                for i in range(min(remaining_capacity, self.item_store.size)):
-                    if not self.item_store.is_empty:
-                        # print(
-                        #     f"[DEBUG] {self.name_process}: attempting to get item {i+1}")
-                        item = yield self.item_store.get()
-                        # print(
-                        #     f"[DEBUG] {self.name_process}: retrieved item {item.id_item}")
-                        items_to_assign.append(item)
+                while remaining_capacity > 0 and not self.item_store.is_empty:
+                    head = self.item_store.items[0]
+                    if head.quantity > remaining_capacity:
+                        remainder = head.split(head.quantity - remaining_capacity)
+                        self.item_store.items.insert(1, remainder)
+                    item = yield self.item_store.get()
+                    items_to_assign.append(item)
+                    remaining_capacity -= item.quantity
             except Exception as e:
                 # Continue if unable to get item from itemStore
                 print(f"[ERROR] {self.name_process}: failed to get item: {e}")
@@ -175,18 +309,11 @@ class Process:
 
         # Process items with assigned processors in parallel
         for processor_resource, items in processor_assignments:
-            self.env.process(self.delay_resources(processor_resource, items))
+            processor_resource.active_process = self.env.process(
+                self.delay_resources(processor_resource, items))
             
-    def delay_resources(self, processor_resource, items):
-        """
-        Process items with processor (integrated for Machine, Amr, Worker)
-        Takes processing time into account 
-
-        Args:
-            processor_resource (ProcessorResource): Processor resource (Machine, Amr, Worker)
-            items (list): List of items to process        
-        """
-        # Record time and register resources for all items
+    def start_items(self, processor_resource, items):
+        """Close waiting steps, register items with the processor and open processing steps"""
         for item in items:
             item.time_waiting_end = self.env.now
 
@@ -212,22 +339,133 @@ class Process:
                 item.processing_history = []
             item.processing_history.append(process_step)
 
-        # Request processor resource
-        request = processor_resource.request()
-        yield request
+    def delay_resources(self, processor_resource, items):
+        """
+        Process items with processor (integrated for Machine, Amr, Worker)
+        Takes processing time into account 
+
+        Args:
+            processor_resource (ProcessorResource): Processor resource (Machine, Amr, Worker)
+            items (list): List of items to process        
+        """
+        opening = self.shift_opening(processor_resource)
+        if opening > self.env.now:
+            # Off shift: the job keeps its processor and starts at the next working instant
+            request = processor_resource.request()
+            yield request
+            yield self.env.timeout(opening - self.env.now)
+            self.start_items(processor_resource, items)
+        else:
+            # Record time and register resources for all items
+            self.start_items(processor_resource, items)
+
+            # Request processor resource
+            request = processor_resource.request()
+            yield request
+
+        # Draw from the shared supplier pools when the trip starts
+        if self.supply is not None:
+            self.supply.request(items, self.env.now)
+
+        # Record trip load for AMR batching statistics
+        if processor_resource.processor_type == "AMR":
+            num_units = sum(item.quantity for item in items)
+            trip = {
+                'resource_name': processor_resource.name,
+                'start_time': self.env.now,
+                'num_items': num_units,
+                'capacity': processor_resource.capacity,
+                'load_factor': num_units / processor_resource.capacity
+            }
+            if self.retention is not None:
+                self.retention.record_trip(self, trip)
+            else:
+                self.trip_history.append(trip)
         
-        # Calculate and wait for dynamic processing time
+        # Calculate per-item processing times (distribution or dynamic hook)
+        item_times = self.calculate_item_times(processor_resource, items)
+
+        if item_times is None:
+            yield from self.hold(processor_resource, processor_resource.processing_time)
+            self.complete_items(processor_resource, items)
+
+        elif self.batch_time_rule == "PARALLEL":
+            # Items are served in parallel and each one leaves when it is done
+            elapsed = 0
+            for end_time in sorted(set(item_times)):
+                yield from self.hold(processor_resource, end_time - elapsed)
+                elapsed = end_time
+                self.complete_items(
+                    processor_resource, [item for item, t in zip(items, item_times) if t == end_time])
+
+        else:
+            # One combined timeout for the whole batch
+            yield from self.hold(processor_resource, combine_batch_times(item_times, self.batch_time_rule))
+            self.complete_items(processor_resource, items)
+
+        # Release resources
+        self.release_resources(processor_resource, request)
+
+    def shift_opening(self, processor_resource):
+        """Earliest working instant of a processor from now (now without a calendar)"""
+        if processor_resource.calendar is None:
+            return self.env.now
+        return processor_resource.calendar.next_working_time(self.env.now)
+
+    def hold(self, processor_resource, duration):
+        """
+        Processing timeout that survives breakdowns (preempt-resume)
+
+        A failure interrupts the running job with the repair time as cause;
+        the remaining work continues once the resource is repaired.
+        With a shift calendar, `duration` is working time and off-shift time
+        is skipped with one calendar lookup.
+        """
+        calendar = processor_resource.calendar
+        remaining = duration
+        while True:
+            # Wait out an outage that started before the work (re)starts
+            if processor_resource.down_until is not None and processor_resource.down_until > self.env.now:
+                yield self.env.timeout(processor_resource.down_until - self.env.now)
+            start = self.env.now
+            processor_resource.in_hold = True
+            try:
+                if calendar is None:
+                    yield self.env.timeout(remaining)
+                else:
+                    yield self.env.timeout(calendar.finish_time(start, remaining) - start)
+                return
+            except simpy.Interrupt:
+                if calendar is None:
+                    remaining -= self.env.now - start
+                else:
+                    remaining -= calendar.working_time(start, self.env.now)
+                if self.logger:
+                    self.logger.log_event(
+                        "Failure", f"{processor_resource.name} interrupted in {self.name_process}, {remaining:.1f} min of work left")
+            finally:
+                processor_resource.in_hold = False
+
+    def calculate_item_times(self, processor_resource, items):
+        """
+        Processing time of each item in a batch
+
+        Returns:
+            list | None: Item times, or None when the processor's constant
+            processing time applies to the batch as a whole
+        """
+        if self.time_sampler is not None:
+            times = self.time_sampler.sample_n(len(items)).tolist()
+            for item, processing_time in zip(items, times):
+                item.processing_time = processing_time
+            return times
         if hasattr(self, 'calculate_processing_time'):
             self.calculate_processing_time(processor_resource.processing_time, items)
-            for item in items:
-                processing_time = item.processing_time
-                yield self.env.timeout(processing_time)
-        
-        else:
-            processing_time = processor_resource.processing_time
-                
-            yield self.env.timeout(processing_time)
+            return [item.processing_time for item in items]
+        return None
 
+    def complete_items(self, processor_resource, items):
+        """Apply special processing, close item histories and send items to the next process"""
         # Special processing (if needed)
         if hasattr(self, 'apply_special_processing'):
             self.apply_special_processing(processor_resource.processor, items)
@@ -242,8 +480,11 @@ class Process:
                     step['end_time'] = self.env.now
                     step['duration'] = self.env.now - step['start_time']
 
-            # Track completed items
-            self.completed_items.append(item)
+            # Track completed items (or fold them into the retention accumulators)
+            if self.retention is not None:
+                self.retention.record_step(self, processor_resource, item)
+            else:
+                self.completed_items.append(item)
 
             # Log record
             if self.logger:
@@ -252,10 +493,24 @@ class Process:
 
             # Send item to next process
             self.send_item_to_next(item)
-
-        # Release resources
-        self.release_resources(processor_resource, request)
         
+    def schedule_batch_wakeup(self, delay):
+        """Re-run resource allocation after `delay` (time-based batch release)"""
+        wakeup_time = self.env.now + delay
+        if self.batch_wakeup_time is not None and self.batch_wakeup_time <= wakeup_time:
+            return
+        self.batch_wakeup_time = wakeup_time
+        self.env.process(self._batch_wakeup(wakeup_time, delay))
+
+    def _batch_wakeup(self, wakeup_time, delay):
+        yield self.env.timeout(delay)
+        # A sooner wake-up may have replaced this one
+        if self.batch_wakeup_time != wakeup_time:
+            return
+        self.batch_wakeup_time = None
+        self.resource_trigger.succeed()
+        self.resource_trigger = self.env.event()
+
     def release_resources(self, processor_resource, request):
         """
         Release processor resources and process item completion
@@ -302,12 +557,22 @@ class Process:
     
     def send_item_to_next(self, item):
         """Send item to next process"""
-        if self.next_process:
+        if self.supply is not None and not self.supply.granted(item):
+            # Shared supplier pool was empty: the item is not delivered
+            if self.logger:
+                self.logger.log_event(
+                    "Process Flow", f"item {item.id_item} starved at {self.name_process} (no {item.is_supplier} supply)")
+            return False
+        if self.router is not None:
+            next_process = self.router.next_process(item, self.stage_index)
+        else:
+            next_process = self.next_process
+        if next_process:
             if self.logger:
                 self.logger.log_event(
-                    "Process Flow", f"Moving item {item.id_item} from {self.name_process} to {self.next_process.name_process}")
+                    "Process Flow", f"Moving item {item.id_item} from {self.name_process} to {next_process.name_process}")
             # Add item to next process queue
-            self.next_process.add_to_queue(item)
+            next_process.add_to_queue(item)
             return True
         else:
             # Final process or no next process set
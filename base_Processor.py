@@ -72,9 +72,13 @@ class AMR:
     - capacity_items: Maximum number of items that can be carried at once
     - allows_item_addition_during_processing: Whether the AMR can pick up additional items while moving
     - workload (list): List of items currently assigned to this AMR for transport
+    - batch_policy: Load-accumulation policy ("IMMEDIATE", "FULL_LOAD", "MAX_WAIT", "MIN_BATCH")
+    - batch_max_wait: Longest wait of the oldest item before leaving (MAX_WAIT policy)
+    - batch_min_size: Minimum number of items per trip (MIN_BATCH policy)
     """
     
-    def __init__(self, id_amr, name_amr, processing_time, capacity_items=1):
+    def __init__(self, id_amr, name_amr, processing_time, capacity_items=1,
+                 batch_policy="IMMEDIATE", batch_max_wait=0, batch_min_size=1):
         self.type_processor = "AMR"
         self.id_amr = id_amr
         self.name_amr = name_amr
@@ -83,7 +87,11 @@ class AMR:
         # Whether new items can be added to the AMR’s load during transport
         self.allows_item_addition_during_processing = True
         # List to track items currently assigned to this AMR
-        self.workload = []       
+        self.workload = []
+        # Load-accumulation (batching) policy
+        self.batch_policy = batch_policy.upper()
+        self.batch_max_wait = batch_max_wait
+        self.batch_min_size = batch_min_size
         
 class ProcessorResource(simpy.Resource):
     """
@@ -98,6 +106,10 @@ class ProcessorResource(simpy.Resource):
         current_item (item): item currently being processed (Worker)
         processing_time (int): Time taken to process a item
         processing_started (bool): Flag to prevent further resource allocation after processing starts
+        down_until (float): End of the current failure/PM outage (None while up)
+        active_process (simpy.Process): Running delay_resources process of this resource
+        in_hold (bool): True while the running job is in its processing timeout
+        calendar (ShiftCalendar): Working-shift calendar (None = works 24/7)
     """
     
     def __init__(self, env, processor):
@@ -141,6 +153,14 @@ class ProcessorResource(simpy.Resource):
         # Flag to prevent further resource allocation after processing starts
         self.processing_started = False
 
+        # Failure state (set by FailureManager)
+        self.down_until = None
+        self.active_process = None
+        self.in_hold = False
+
+        # Working-shift calendar (set when the processor is registered)
+        self.calendar = None
+
     def request(self, *args, **kwargs):
         """
         Override resource request - Check if addition during processing is allowed
@@ -182,6 +202,10 @@ class ProcessorResource(simpy.Resource):
     @property
     def is_available(self):
         """Check if processor is available"""
+        # Not available while broken down or under maintenance
+        if self.down_until is not None:
+            return False
+
         # Not available if processing and additions not allowed
         if self.processing_started and not self.allows_item_addition_during_processing:
             return False
@@ -189,6 +213,33 @@ class ProcessorResource(simpy.Resource):
         # Available if capacity has room
         return self.count < self.capacity  # Use count attribute instead of count()
 
+    def dispatch_delay(self, queue_size, oldest_wait):
+        """
+        Remaining time before a trip may start under the AMR batching policy
+
+        Args:
+            queue_size (int): Number of items waiting in the queue
+            oldest_wait (float): Time the oldest waiting item has waited
+
+        Returns:
+            float | None: 0 to dispatch now, a positive delay to re-check later,
+            None to wait for more items (no time-based release)
+        """
+        if self.processor_type != "AMR":
+            return 0
+
+        policy = self.processor.batch_policy
+        full_load = queue_size >= self.capacity - self.count
+        if policy == "IMMEDIATE" or full_load:
+            return 0
+        if policy == "FULL_LOAD":
+            return None
+        if policy == "MAX_WAIT":
+            return max(0, self.processor.batch_max_wait - oldest_wait)
+        if policy == "MIN_BATCH":
+            return 0 if queue_size >= min(self.processor.batch_min_size, self.capacity) else None
+        raise ValueError(f"Invalid AMR batch policy: {policy!r}")
+
     def start_item(self, item):
         """Process item start"""
         if self.processor_type in ("Machine", "AMR"):
@@ -1,4 +1,5 @@
 import simpy
+from collections import deque
 from config_SimPy import *
 
 class ItemStore(simpy.Store):
@@ -15,6 +16,9 @@ class ItemStore(simpy.Store):
         super().__init__(env)
         self.name = name
         self.queue_length_history = [] # Track queue length history
+        if RETENTION_ENABLED:
+            # Keep only the most recent records on long runs
+            self.queue_length_history = deque(maxlen=QUEUE_HISTORY_MAX_ENTRIES)
         
     def put(self, item):
         """Add item to Store (override)"""
@@ -90,6 +94,13 @@ class ItemStore(simpy.Store):
     def size(self):
         """Current queue size"""
         return len(self.items)
+
+    @property
+    def num_units(self):
+        """Number of units in the queue (aggregated entities count their quantity)"""
+        if not AGGREGATE_LOT_ENTITIES:
+            return len(self.items)
+        return sum(getattr(item, 'quantity', 1) for item in self.items)
     
 class ItemSupplier(simpy.Store):
     """
@@ -103,19 +114,22 @@ class ItemSupplier(simpy.Store):
     """
 
     def __init__(self, env, supply_type: str, supplier_id: int):
-        super().__init__(env)
-        self.env = env
-        self.supply_type = supply_type.upper()
-        self.supplier_id = supplier_id
+        supply_type = supply_type.upper()
 
         # Set initial inventory according to supply_type
-        if self.supply_type == "LOT":
-            self.capacity = LOT_INVEN_LEVEL
-        elif self.supply_type == "PALLET":
-            self.capacity = PALLET_INVEN_LEVEL
+        # (Store.capacity is a read-only property, so it is passed to the Store constructor)
+        if supply_type == "LOT":
+            capacity = LOT_INVEN_LEVEL
+        elif supply_type == "PALLET":
+            capacity = PALLET_INVEN_LEVEL
         else:
             raise ValueError(f"Invalid supply_type: {supply_type!r}")
 
+        super().__init__(env, capacity=capacity)
+        self.env = env
+        self.supply_type = supply_type
+        self.supplier_id = supplier_id
+
         # Insert initial inventory in the form of a token in the Store internal list (items)
         # (In the current simulation, tokens are expressed with 'None' or a simple dict.)
         for _ in range(self.capacity):
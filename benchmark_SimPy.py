@@ -0,0 +1,123 @@
+import argparse
+import time
+import simpy
+from config_SimPy import *
+from scenario_SimPy import simulate
+
+""" Event-count and wall-time benchmarks of the simulation engine """
+
+
+class CountingEnvironment(simpy.Environment):
+    """SimPy environment that counts every scheduled event"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.num_events = 0
+
+    def schedule(self, event, priority=1, delay=0):
+        self.num_events += 1
+        super().schedule(event, priority, delay)
+
+
+def count_events(overrides=None, seed=42, sim_duration=None):
+    """
+    Run one scenario in a counting environment
+
+    Returns:
+        dict: num_events, wall_time, events_per_sec, num_items_completed
+    """
+    env = CountingEnvironment()
+    start = time.perf_counter()
+    manager, _ = simulate(overrides, seed, sim_duration, env=env)
+    wall_time = time.perf_counter() - start
+    return {
+        'num_events': env.num_events,
+        'wall_time': wall_time,
+        'events_per_sec': env.num_events / wall_time if wall_time else float('inf'),
+        'num_items_completed': sum(1 for item in manager.processed_items if item.is_completed),
+    }
+
+
+def benchmark_zero_time_fast_path(overrides=None, seed=42, sim_duration=None):
+    """Event counts with and without the zero-duration stage fast path"""
+    results = {}
+    for enabled in (False, True):
+        settings = dict(overrides or {})
+        settings['FAST_PATH_ZERO_TIME'] = enabled
+        results[enabled] = count_events(settings, seed, sim_duration)
+
+    slow, fast = results[False], results[True]
+    print("================ Zero-duration stage fast path ================")
+    print(f"{'mode':<10} {'events':>10} {'items':>8} {'wall [s]':>10}")
+    for name, res in (("regular", slow), ("fast path", fast)):
+        print(f"{name:<10} {res['num_events']:>10} {res['num_items_completed']:>8} {res['wall_time']:>10.3f}")
+    reduction = 1 - fast['num_events'] / slow['num_events'] if slow['num_events'] else 0
+    print(f"Event reduction: {reduction:.1%}")
+    return results
+
+
+def benchmark_fast_backend(overrides=None, seed=42, sim_duration=None):
+    """Wall time of the SimPy engine against the NumPy recurrence engine on one scenario"""
+    from scenario_SimPy import run_scenario
+
+    timings = {}
+    kpis = {}
+    for backend in ("simpy", "fast"):
+        start = time.perf_counter()
+        kpis[backend] = run_scenario(overrides, seed, sim_duration, backend=backend)
+        timings[backend] = time.perf_counter() - start
+
+    print("================ Recurrence engine vs SimPy ================")
+    print(f"items completed: {kpis['simpy']['num_items_completed']:.0f}")
+    print(f"SimPy: {timings['simpy']:.3f} s, recurrence: {timings['fast']:.3f} s "
+          f"(x{timings['simpy'] / timings['fast']:.0f})")
+    print(f"Identical KPIs: {kpis['simpy'] == kpis['fast']}")
+    return timings, kpis
+
+
+def benchmark_event_kernel(overrides=None, seed=42, sim_duration=None):
+    """Events per second of SimPy against the heap-based event kernel on one scenario"""
+    import random
+    import config_SimPy
+    from scenario_SimPy import apply_config, SCENARIO_DEFAULTS
+    from kernel_SimPy import run_kernel
+
+    simpy_result = count_events(overrides, seed, sim_duration)
+    settings = dict(SCENARIO_DEFAULTS)
+    settings.update(overrides or {})
+    with apply_config(settings):
+        random.seed(seed)
+        start = time.perf_counter()
+        line, kernel = run_kernel(config_SimPy.SIM_TIME if sim_duration is None else sim_duration)
+        wall_time = time.perf_counter() - start
+    kernel_result = {
+        'num_events': kernel.num_events,
+        'wall_time': wall_time,
+        'events_per_sec': kernel.num_events / wall_time if wall_time else float('inf'),
+        'num_items_completed': sum(1 for item in line.processed_items if item.is_completed),
+    }
+
+    print("================ Event kernel vs SimPy ================")
+    print(f"{'engine':<8} {'events':>10} {'events/s':>12} {'items':>8} {'wall [s]':>10}")
+    for name, res in (("SimPy", simpy_result), ("kernel", kernel_result)):
+        print(f"{name:<8} {res['num_events']:>10} {res['events_per_sec']:>12.0f} "
+              f"{res['num_items_completed']:>8} {res['wall_time']:>10.3f}")
+    print(f"Speed-up: x{simpy_result['wall_time'] / kernel_result['wall_time']:.1f}")
+    return simpy_result, kernel_result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SimPy engine benchmarks")
+    parser.add_argument("--sim-time", type=float, default=SIM_TIME, help="Simulation horizon (minutes)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fast-backend", action="store_true",
+                        help="Compare the SimPy engine with the NumPy recurrence engine")
+    parser.add_argument("--event-kernel", action="store_true",
+                        help="Compare the SimPy engine with the heap-based event kernel")
+    args = parser.parse_args()
+    if args.event_kernel:
+        benchmark_event_kernel(sim_duration=args.sim_time, seed=args.seed)
+    elif args.fast_backend:
+        benchmark_fast_backend(sim_duration=args.sim_time, seed=args.seed)
+    else:
+        benchmark_zero_time_fast_path(sim_duration=args.sim_time, seed=args.seed)
@@ -0,0 +1,131 @@
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import time
+import numpy as np
+from config_SimPy import *
+from scenario_SimPy import SCENARIO_DEFAULTS, config_hash, model_code_version
+
+""" Content-addressed on-disk cache of scenario results """
+
+
+class ResultCache:
+    """
+    SQLite-backed result cache with size-bounded LRU eviction
+
+    The key is a SHA-256 over the canonical hash of every config value, the
+    model code version, the seed and the backend, so any change to the config
+    or to the model source misses the cache, and results of different
+    engines never alias.
+
+    Attributes:
+        path (str): SQLite database file
+        max_bytes (int): Upper bound of the stored payload size
+        code_version (str): Hash of the model source at cache creation
+        hits (int): Number of cache hits
+        misses (int): Number of cache misses
+    """
+
+    def __init__(self, path=RESULT_CACHE_PATH, max_bytes=RESULT_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.code_version = model_code_version()
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, config_hash TEXT, seed INTEGER, code_version TEXT,"
+            " kpis TEXT, trace BLOB, size INTEGER, created REAL, last_access REAL)")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_results_access ON results (last_access)")
+        self.conn.commit()
+
+    def make_key(self, overrides, seed, sim_duration=None, backend="simpy"):
+        """Cache key of a scenario (config hash + code version + seed + backend)"""
+        settings = dict(SCENARIO_DEFAULTS)
+        settings.update(overrides or {})
+        if sim_duration is not None:
+            settings['SIM_TIME'] = sim_duration
+        chash = config_hash(settings)
+        key = hashlib.sha256(f"{chash}:{self.code_version}:{seed}:{backend}".encode()).hexdigest()
+        return key, chash
+
+    def get(self, overrides, seed, sim_duration=None, with_trace=False, backend="simpy"):
+        """
+        Look up a scenario result
+
+        Returns:
+            dict | tuple | None: KPIs (or (kpis, trace)); None on a miss or
+            when a trace is requested but was not stored
+        """
+        key, _ = self.make_key(overrides, seed, sim_duration, backend)
+        row = self.conn.execute(
+            "SELECT kpis, trace FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None or (with_trace and row[1] is None):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.conn.execute(
+            "UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+        self.conn.commit()
+        kpis = json.loads(row[0])
+        if not with_trace:
+            return kpis
+        with np.load(io.BytesIO(row[1])) as data:
+            trace = {name: data[name] for name in data.files}
+        return kpis, trace
+
+    def put(self, overrides, seed, sim_duration, kpis, trace=None, backend="simpy"):
+        """Store a scenario result (and optional columnar trace), then evict to size"""
+        key, chash = self.make_key(overrides, seed, sim_duration, backend)
+        kpis_json = json.dumps(kpis)
+        blob = None
+        if trace is not None:
+            buffer = io.BytesIO()
+            np.savez_compressed(buffer, **trace)
+            blob = buffer.getvalue()
+        size = len(kpis_json) + (len(blob) if blob else 0)
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, chash, seed, self.code_version, kpis_json, blob, size, now, now))
+        self.conn.commit()
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self.conn.execute(
+            "SELECT key, size FROM results ORDER BY last_access ASC").fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self.conn.executemany("DELETE FROM results WHERE key = ?", stale)
+        self.conn.commit()
+
+    @property
+    def size_bytes(self):
+        """Total stored payload size"""
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def clear(self):
+        """Remove every entry"""
+        self.conn.execute("DELETE FROM results")
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,164 @@
+import bisect
+import numpy as np
+from config_SimPy import *
+
+""" Working-shift calendars with interval-indexed time arithmetic """
+
+DAY = 24 * 60
+WEEK = 7 * DAY
+
+
+class ShiftCalendar:
+    """
+    Working calendar built from a weekly shift pattern
+
+    The working intervals are precomputed into sorted arrays together with
+    the cumulative working time before each interval, so converting between
+    wall-clock time and working time is one bisect (or one np.interp for
+    arrays) instead of stepping through breaks with wake-up events.
+    Simulation day 0 is a Monday.
+
+    Attributes:
+        shifts (list): (start, end) minute-of-day of each shift (end may pass midnight)
+        breaks (list): (start, end) minute-of-day of unpaid breaks inside shifts
+        closed_days (set): Weekdays without any shift (0=Mon ... 6=Sun)
+        starts (list): Start time of each working interval
+        ends (list): End time of each working interval
+        cum_work (list): Working time accumulated before each interval
+        horizon (float): Time covered by the precomputed intervals
+    """
+
+    def __init__(self, shifts, breaks=(), closed_days=(), horizon=SIM_TIME):
+        self.shifts = list(shifts)
+        self.breaks = list(breaks)
+        self.closed_days = set(closed_days)
+        self.starts, self.ends, self.cum_work = [], [], []
+        self.horizon = 0
+        self._week_pattern = self._build_week_pattern()
+        if not self._week_pattern:
+            raise ValueError("Shift calendar has no working time")
+        self._extend(max(horizon, WEEK))
+
+    def _build_week_pattern(self):
+        """Sorted, merged working intervals of one week (minutes from Monday 00:00)"""
+        spans = []
+        for day in range(7):
+            if day in self.closed_days:
+                continue
+            for start, end in self.shifts:
+                pieces = [(day * DAY + start, day * DAY + end)]
+                # Cut breaks out of the shift
+                for b_start, b_end in self.breaks:
+                    cut = []
+                    for p_start, p_end in pieces:
+                        bs, be = day * DAY + b_start, day * DAY + b_end
+                        if be <= p_start or bs >= p_end:
+                            cut.append((p_start, p_end))
+                            continue
+                        if bs > p_start:
+                            cut.append((p_start, bs))
+                        if be < p_end:
+                            cut.append((be, p_end))
+                    pieces = cut
+                spans += pieces
+
+        # Night shifts of Sunday wrap into Monday of the next week
+        wrapped = []
+        for start, end in spans:
+            if end > WEEK:
+                wrapped += [(start, WEEK), (0, end - WEEK)]
+            else:
+                wrapped.append((start, end))
+
+        merged = []
+        for start, end in sorted(wrapped):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            elif end > start:
+                merged.append((start, end))
+        return merged
+
+    def _extend(self, until):
+        """Precompute working intervals up to `until` (whole weeks)"""
+        while self.horizon < until:
+            offset = self.horizon
+            for start, end in self._week_pattern:
+                work_before = self.cum_work[-1] + (self.ends[-1] - self.starts[-1]) if self.starts else 0
+                if self.ends and self.ends[-1] == offset + start:
+                    # Interval continues over the week boundary
+                    self.ends[-1] = offset + end
+                    continue
+                self.starts.append(offset + start)
+                self.ends.append(offset + end)
+                self.cum_work.append(work_before)
+            self.horizon += WEEK
+
+    def working_time_until(self, t):
+        """Working time between time 0 and t"""
+        if t >= self.horizon:
+            self._extend(t + WEEK)
+        k = bisect.bisect_right(self.starts, t) - 1
+        if k < 0:
+            return 0.0
+        return self.cum_work[k] + min(t, self.ends[k]) - self.starts[k]
+
+    def working_time(self, start, end):
+        """Working time inside [start, end]"""
+        return self.working_time_until(end) - self.working_time_until(start)
+
+    def next_working_time(self, t):
+        """Earliest working instant at or after t"""
+        if t >= self.horizon:
+            self._extend(t + WEEK)
+        k = bisect.bisect_right(self.starts, t) - 1
+        if k >= 0 and t < self.ends[k]:
+            return t
+        if k + 1 == len(self.starts):
+            self._extend(self.horizon + WEEK)
+        return self.starts[k + 1]
+
+    def finish_time(self, t, work):
+        """Time at which `work` working minutes started at t are finished (off shift, work starts at the next shift)"""
+        if work <= 0:
+            return self.next_working_time(t)
+        target = self.working_time_until(t) + work
+        while self.cum_work[-1] + (self.ends[-1] - self.starts[-1]) < target:
+            self._extend(self.horizon + WEEK)
+        # Last interval that starts with less working time done than the target
+        k = bisect.bisect_left(self.cum_work, target) - 1
+        return self.starts[k] + (target - self.cum_work[k])
+
+    def working_time_array(self, times):
+        """Vectorized working_time_until for an array of times"""
+        times = np.asarray(times, dtype=float)
+        if len(times) and times.max() >= self.horizon:
+            self._extend(float(times.max()) + WEEK)
+        knots = np.empty(2 * len(self.starts))
+        knots[0::2] = self.starts
+        knots[1::2] = self.ends
+        cum = np.empty_like(knots)
+        cum[0::2] = self.cum_work
+        cum[1::2] = np.asarray(self.cum_work) + np.asarray(self.ends) - np.asarray(self.starts)
+        return np.interp(times, knots, cum, left=0.0)
+
+
+_calendar_cache = {}
+
+
+def calendar_for(processor_resource):
+    """
+    Shift calendar of a processor resource (None = works 24/7)
+
+    SHIFT_CALENDARS is looked up by resource name first, then by processor type.
+    """
+    if not SHIFT_CALENDARS_ENABLED:
+        return None
+    spec = SHIFT_CALENDARS.get(processor_resource.name,
+                               SHIFT_CALENDARS.get(processor_resource.processor_type))
+    if not spec:
+        return None
+    key = repr(sorted(spec.items()))
+    if key not in _calendar_cache:
+        _calendar_cache[key] = ShiftCalendar(
+            spec["shifts"], spec.get("breaks", ()), spec.get("closed_days", ()))
+    return _calendar_cache[key]
@@ -0,0 +1,465 @@
+import json
+import math
+import os
+import numpy as np
+import pandas as pd
+from config_SimPy import *
+from distribution_SimPy import ProcessingTimeSampler
+from stats_SimPy import ks_two_sample
+
+""" Trace-driven calibration: streamed MES operation logs -> fitted config overrides -> validation run """
+
+# Constant-time setting calibrated from each process
+STAGE_TIME_SETTINGS = {
+    "Proc_AMR_STC": "STC_PROC_TIME_TRANSIT",
+    "Proc_Cutting": "PROC_TIME_CUTTING",
+    "Proc_AMR_CTI": "CTI_PROC_TIME_TRANSIT",
+    "Proc_Inspect": "PROC_TIME_INSPECT",
+}
+TRANSPORT_PROCESSES = ("Proc_AMR_STC", "Proc_AMR_CTI")
+ENTRY_PROCESS = "Proc_AMR_STC"  # Every item passes it exactly once (order sizes)
+DEFECT_PROCESS = "Proc_Inspect"  # Its rows carry the defect flag
+FIT_SAMPLES = 20000  # Draws of a candidate distribution compared with the observed durations
+
+EPOCH = pd.Timestamp(0, tz="UTC")
+TRUE_FLAGS = ("1", "1.0", "true", "t", "yes", "y")
+
+
+def parse_times(values, time_format=None):
+    """Vectorized conversion of a column to minutes (numbers are taken as minutes already)"""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float)
+    time_format = CALIBRATION_TIME_FORMAT if time_format is None else time_format
+    parsed = pd.to_datetime(values, format=time_format or "ISO8601", utc=True, errors="coerce")
+    return ((parsed - EPOCH) / pd.Timedelta(minutes=1)).to_numpy(dtype=float)
+
+
+def _flags(values):
+    if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+        return values.fillna(0).to_numpy(dtype=float) != 0
+    return values.astype(str).str.strip().str.lower().isin(TRUE_FLAGS).to_numpy()
+
+
+def iter_log_chunks(path, chunk_size=None, columns=None, text_columns=()):
+    """
+    Read an operation log in chunks of rows (CSV, or Parquet by record batch)
+
+    Only the needed columns are read, so the file is never loaded whole.
+    ID columns in `text_columns` are read as strings so that their type does
+    not change from one chunk to the next.
+    """
+    chunk_size = CALIBRATION_CHUNK_SIZE if chunk_size is None else chunk_size
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, usecols=columns,
+                               dtype={name: str for name in text_columns})
+
+
+class DurationReservoir:
+    """
+    Streaming moments and a uniform reservoir sample of one stage's durations
+
+    Every value gets a uniform random key and the reservoir keeps the values
+    with the smallest keys, so merging a chunk is a single argpartition.
+
+    Attributes:
+        count (int): Number of durations seen
+        total (float): Sum of durations
+        total_sq (float): Sum of squared durations
+        minimum (float): Shortest duration
+        maximum (float): Longest duration
+        values (np.ndarray): Reservoir sample
+        keys (np.ndarray): Random keys of the reservoir sample
+    """
+
+    def __init__(self, size, rng):
+        self.size = size
+        self.rng = rng
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.values = np.empty(0)
+        self.keys = np.empty(0)
+
+    def add(self, values):
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.total_sq += float(np.dot(values, values))
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        values = np.concatenate((self.values, values))
+        keys = np.concatenate((self.keys, self.rng.random(len(values) - len(self.keys))))
+        if len(values) > self.size:
+            keep = np.argpartition(keys, self.size)[:self.size]
+            values, keys = values[keep], keys[keep]
+        self.values, self.keys = values, keys
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else math.nan
+
+    @property
+    def std(self):
+        if self.count < 2:
+            return 0.0
+        variance = (self.total_sq - self.count * self.mean ** 2) / (self.count - 1)
+        return math.sqrt(max(0.0, variance))
+
+
+def fit_service_time(reservoir, ks_threshold=None, seed=0):
+    """
+    Processing-time distribution for a stage
+
+    LOGNORMAL and GAMMA are matched to the exact streamed mean and standard
+    deviation, and the one closer to the reservoir in KS distance wins. If
+    neither is within CALIBRATION_KS_THRESHOLD, the reservoir itself becomes
+    an EMPIRICAL distribution.
+
+    Returns:
+        tuple: (distribution spec, KS distance to the observed durations)
+    """
+    ks_threshold = CALIBRATION_KS_THRESHOLD if ks_threshold is None else ks_threshold
+    mean, std = reservoir.mean, reservoir.std
+    if mean <= 0 or std <= CALIBRATION_CONSTANT_CV * mean:
+        return {"type": "CONSTANT", "value": round(mean, 4)}, 0.0
+    best, best_ks = None, math.inf
+    for kind in ("LOGNORMAL", "GAMMA"):
+        spec = {"type": kind, "mean": round(mean, 4), "std": round(std, 4)}
+        ks, _ = ks_two_sample(reservoir.values, ProcessingTimeSampler(spec, seed=seed).sample_n(FIT_SAMPLES))
+        if ks < best_ks:
+            best, best_ks = spec, ks
+    if best_ks > ks_threshold:
+        return {"type": "EMPIRICAL", "values": np.round(reservoir.values, 4).tolist()}, 0.0
+    return best, best_ks
+
+
+class CalibratedConfig:
+    """
+    Fitted config overrides the simulator takes as they are
+
+    `overrides` goes straight into simulate / run_scenario / apply_config.
+
+    Attributes:
+        overrides (dict): {CONFIG_NAME: value}
+        fits (dict): {process: {'type', 'ks', 'count', 'mean', 'std'}}
+        summary (dict): Row, order and defect counts of the ingested log
+    """
+
+    def __init__(self, overrides, fits=None, summary=None):
+        self.overrides = overrides
+        self.fits = fits or {}
+        self.summary = summary or {}
+
+    def apply(self):
+        """Context manager applying the overrides to the running model"""
+        from scenario_SimPy import apply_config
+
+        return apply_config(self.overrides)
+
+    def save(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"overrides": self.overrides, "fits": self.fits, "summary": self.summary},
+                      f, indent=2, sort_keys=True)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["overrides"], data.get("fits"), data.get("summary"))
+
+
+class LogCalibrator:
+    """
+    Streaming statistics of an MES operation log
+
+    Chunks are parsed with vectorized pandas/NumPy operations. Memory stays
+    bounded by the per-stage reservoirs and one small record per order
+    (release time, last end time, units, supply type), never by the
+    number of log rows.
+
+    Attributes:
+        columns (dict): Log column names (CALIBRATION_COLUMNS)
+        operations (dict): MES operation -> process (CALIBRATION_OPERATIONS)
+        stages (dict): {process: DurationReservoir}
+        orders (dict): {order key: [release, last end, units, supply type]}
+        num_rows (int): Rows read
+        num_dropped (int): Rows with an unknown operation or a missing/negative duration
+        num_inspections (int): Rows of the defect process
+        num_defects (int): Inspections that found a defect
+    """
+
+    def __init__(self, columns=None, operations=None, reservoir_size=None, seed=0):
+        self.columns = dict(CALIBRATION_COLUMNS if columns is None else columns)
+        self.operations = dict(CALIBRATION_OPERATIONS if operations is None else operations)
+        self.reservoir_size = CALIBRATION_RESERVOIR_SIZE if reservoir_size is None else reservoir_size
+        self.rng = np.random.default_rng(seed)
+        self.stages = {}
+        self.orders = {}
+        self.num_rows = 0
+        self.num_dropped = 0
+        self.num_inspections = 0
+        self.num_defects = 0
+
+    def used_columns(self):
+        return [name for name in self.columns.values() if name is not None]
+
+    def ingest(self, path, chunk_size=None):
+        """Stream a CSV or Parquet log through add_chunk"""
+        text_columns = [self.columns[key] for key in ("order", "operation", "supplier") if self.columns.get(key)]
+        for chunk in iter_log_chunks(path, chunk_size, self.used_columns(), text_columns):
+            self.add_chunk(chunk)
+        return self
+
+    def add_chunk(self, chunk):
+        columns = self.columns
+        self.num_rows += len(chunk)
+        process = chunk[columns["operation"]].astype(str).map(self.operations).to_numpy()
+        start = parse_times(chunk[columns["start"]])
+        end = parse_times(chunk[columns["end"]])
+        duration = end - start
+        valid = pd.notna(process) & np.isfinite(duration) & (duration >= 0)
+        self.num_dropped += int(len(chunk) - valid.sum())
+        if not valid.any():
+            return self
+        chunk = chunk[valid]
+        process, start, end, duration = process[valid], start[valid], end[valid], duration[valid]
+
+        for name in pd.unique(process):
+            if name not in self.stages:
+                self.stages[name] = DurationReservoir(self.reservoir_size, self.rng)
+            self.stages[name].add(duration[process == name])
+
+        inspected = process == DEFECT_PROCESS
+        if columns.get("defect") and inspected.any():
+            self.num_inspections += int(inspected.sum())
+            self.num_defects += int(_flags(chunk[columns["defect"]])[inspected].sum())
+
+        self._add_orders(chunk, process, start, end)
+        return self
+
+    def _add_orders(self, chunk, process, start, end):
+        columns = self.columns
+        orders = chunk[columns["order"]].astype(str).to_numpy()
+        release = parse_times(chunk[columns["release"]]) if columns.get("release") else start
+        spans = pd.DataFrame({"order": orders, "release": release, "end": end}).groupby(
+            "order", sort=False).agg(release=("release", "min"), end=("end", "max"))
+        for key, first, last in zip(spans.index, spans["release"].to_numpy(), spans["end"].to_numpy()):
+            record = self.orders.get(key)
+            if record is None:
+                self.orders[key] = [first, last, 0, None]
+            else:
+                record[0] = min(record[0], first)
+                record[1] = max(record[1], last)
+
+        entry = process == ENTRY_PROCESS
+        if not entry.any():
+            return
+        units = (chunk[columns["quantity"]].to_numpy(dtype=float)[entry] if columns.get("quantity")
+                 else np.ones(int(entry.sum())))
+        suppliers = (chunk[columns["supplier"]].astype(str).str.upper().to_numpy()[entry]
+                     if columns.get("supplier") else np.full(int(entry.sum()), None))
+        sizes = pd.DataFrame({"order": orders[entry], "units": units, "supplier": suppliers}).groupby(
+            "order", sort=False).agg(units=("units", "sum"), supplier=("supplier", "first"))
+        for key, count, supplier in zip(sizes.index, sizes["units"].to_numpy(), sizes["supplier"].to_numpy()):
+            record = self.orders[key]
+            record[2] += int(count)
+            record[3] = supplier
+
+    def span(self):
+        """Time from the first release to the last operation end"""
+        if not self.orders:
+            return 0.0
+        records = list(self.orders.values())
+        return float(max(r[1] for r in records) - min(r[0] for r in records))
+
+    def samples(self):
+        """Observed samples compared by the validation run"""
+        samples = {f"time_{name}": reservoir.values for name, reservoir in sorted(self.stages.items())}
+        records = [r for r in self.orders.values() if r[2] > 0]
+        release = np.array([r[0] for r in records], dtype=float)
+        samples["interarrival"] = np.diff(np.sort(release))
+        samples["order_size"] = np.array([r[2] for r in records], dtype=float)
+        samples["makespan"] = np.array([r[1] - r[0] for r in records], dtype=float)
+        return samples
+
+    def _arrival_profiles(self):
+        """One customer profile per supply type with its own arrival rate and order sizes"""
+        by_type = {}
+        for release, _, units, supplier in self.orders.values():
+            if units > 0:
+                by_type.setdefault(supplier, []).append((release, units))
+        profiles = []
+        for supplier in sorted(by_type, key=str):
+            records = sorted(by_type[supplier])
+            if len(records) < 2:
+                continue
+            gaps = np.diff([release for release, _ in records])
+            mean = float(gaps.mean())
+            cv = float(gaps.std() / mean) if mean > 0 else 0.0
+            values, counts = np.unique([units for _, units in records], return_counts=True)
+            profiles.append({
+                "count": 1,
+                "mean_interarrival": round(mean, 4),
+                "arrival": "FIXED" if cv < CALIBRATION_FIXED_CV else "EXPONENTIAL",
+                "num_items": {"values": [int(v) for v in values], "weights": [int(c) for c in counts]},
+                "supplier": supplier if supplier in ("LOT", "PALLET") else None,
+            })
+        return profiles
+
+    def fit(self, seed=0):
+        """
+        Fit stage times, the defect rate and the order arrival processes
+
+        Returns:
+            CalibratedConfig
+        """
+        overrides = {}
+        distributions = {}
+        batch_rules = {}
+        fits = {}
+        for name, reservoir in sorted(self.stages.items()):
+            spec, ks = fit_service_time(reservoir, seed=seed)
+            fits[name] = {"type": spec["type"], "ks": ks, "count": reservoir.count,
+                          "mean": reservoir.mean, "std": reservoir.std}
+            setting = STAGE_TIME_SETTINGS.get(name)
+            if setting is not None:
+                overrides[setting] = round(reservoir.mean, 4)
+            if spec["type"] != "CONSTANT":
+                distributions[name] = spec
+                if name in TRANSPORT_PROCESSES:
+                    # Logged transit times are per trip, shared by every item on board
+                    batch_rules[name] = "MAX"
+        overrides["PROC_TIME_DISTRIBUTIONS"] = distributions
+        overrides["BATCH_TIME_RULES"] = batch_rules
+        if self.num_inspections:
+            overrides["DEFECT_RATE_PROC_BUILD"] = round(self.num_defects / self.num_inspections, 6)
+        profiles = self._arrival_profiles()
+        if profiles:
+            overrides["CUSTOMER_POPULATION"] = profiles
+        summary = {"num_rows": self.num_rows, "num_dropped": self.num_dropped, "num_orders": len(self.orders),
+                   "num_inspections": self.num_inspections, "num_defects": self.num_defects,
+                   "span": self.span()}
+        return CalibratedConfig(overrides, fits, summary)
+
+
+def operations_frame(manager, columns=None, operations=None):
+    """
+    Operation log of a finished run in the MES layout (one row per item and step)
+
+    An inspection is flagged as defective when the item's next step is cutting
+    again (rework).
+    """
+    columns = CALIBRATION_COLUMNS if columns is None else columns
+    operations = CALIBRATION_OPERATIONS if operations is None else operations
+    operation_of = {process: operation for operation, process in operations.items()}
+    rows = {key: [] for key in ("order", "operation", "start", "end", "release", "defect", "supplier", "quantity")}
+    for order in manager.processed_orders:
+        key = f"{order.id_customer}-{order.id_order}"
+        for item in order.list_items:
+            history = getattr(item, "processing_history", [])
+            for k, step in enumerate(history):
+                if step["end_time"] is None or step["process"] not in operation_of:
+                    continue
+                rework = k + 1 < len(history) and history[k + 1]["process"] == "Proc_Cutting"
+                rows["order"].append(key)
+                rows["operation"].append(operation_of[step["process"]])
+                rows["start"].append(step["start_time"])
+                rows["end"].append(step["end_time"])
+                rows["release"].append(order.time_start)
+                rows["defect"].append(int(step["process"] == DEFECT_PROCESS and rework))
+                rows["supplier"].append(item.is_supplier)
+                rows["quantity"].append(getattr(item, "quantity", 1))
+    return pd.DataFrame({columns[key]: values for key, values in rows.items() if columns.get(key)})
+
+
+def export_operation_log(manager, path):
+    """Write the operation log of a finished run as CSV (or Parquet)"""
+    frame = operations_frame(manager)
+    if path.endswith(".parquet"):
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False)
+    return path
+
+
+def validate_calibration(calibrator, calibrated, seed=42, sim_duration=None, overrides=None):
+    """
+    Simulate the calibrated config and compare KPI distributions with the log
+
+    Stage durations, order interarrival times, order sizes and makespans of
+    the run are streamed through the same calibrator code as the log and
+    compared by two-sample KS tests. `overrides` adds settings the log does
+    not calibrate (line size, inventory levels).
+
+    Returns:
+        dict: {sample name: {'historical_mean', 'simulated_mean', 'ks', 'p_value', 'n_historical', 'n_simulated'}}
+    """
+    from scenario_SimPy import simulate
+
+    if sim_duration is None:
+        sim_duration = min(calibrator.span(), CALIBRATION_VALIDATION_DURATION)
+    settings = dict(overrides or {})
+    settings.update(calibrated.overrides)
+    settings['RETENTION_ENABLED'] = False
+    manager, duration = simulate(settings, seed, sim_duration)
+
+    simulated = LogCalibrator(calibrator.columns, calibrator.operations, calibrator.reservoir_size, seed)
+    simulated.add_chunk(operations_frame(manager, calibrator.columns, calibrator.operations))
+    historical_samples = calibrator.samples()
+    simulated_samples = simulated.samples()
+    report = {}
+    for name, observed in historical_samples.items():
+        produced = simulated_samples.get(name, np.empty(0))
+        ks, p_value = ks_two_sample(observed, produced)
+        report[name] = {
+            "historical_mean": float(observed.mean()) if len(observed) else math.nan,
+            "simulated_mean": float(produced.mean()) if len(produced) else math.nan,
+            "ks": ks, "p_value": p_value,
+            "n_historical": len(observed), "n_simulated": len(produced),
+        }
+    return report
+
+
+def print_validation(report):
+    print(f"\n{'sample':<24} {'historical':>12} {'simulated':>12} {'KS':>8} {'p':>8}")
+    for name, row in report.items():
+        print(f"{name:<24} {row['historical_mean']:>12.2f} {row['simulated_mean']:>12.2f} "
+              f"{row['ks']:>8.3f} {row['p_value']:>8.3f}")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from scenario_SimPy import simulate
+
+    # Historical log stand-in: a run with known settings, exported in the MES layout
+    line = {"LOT_INVEN_LEVEL": 1000, "PALLET_INVEN_LEVEL": 1000, "RETENTION_ENABLED": False}
+    truth = dict(line, **{
+        "PROC_TIME_DISTRIBUTIONS": {"Proc_Cutting": {"type": "LOGNORMAL", "mean": 180, "std": 30}},
+        "DEFECT_RATE_PROC_BUILD": 0.08,
+        "CUSTOMER_POPULATION": [
+            {"mean_interarrival": 400, "num_items": {"values": [1, 2, 3], "weights": [1, 2, 1]}, "supplier": "LOT"},
+            {"mean_interarrival": 600, "num_items": 2, "supplier": "PALLET"},
+        ],
+    })
+    manager, _ = simulate(truth, seed=1, sim_duration=90 * 24 * 60)
+    with tempfile.TemporaryDirectory() as directory:
+        path = export_operation_log(manager, os.path.join(directory, "mes_log.csv"))
+        calibrator = LogCalibrator().ingest(path, chunk_size=2000)
+    calibrated = calibrator.fit()
+    print(json.dumps(calibrated.summary, indent=2))
+    for name, fit in calibrated.fits.items():
+        print(f"{name:<16} {fit['type']:<10} mean={fit['mean']:.2f} std={fit['std']:.2f} KS={fit['ks']:.3f}")
+    print(f"DEFECT_RATE_PROC_BUILD = {calibrated.overrides.get('DEFECT_RATE_PROC_BUILD')}")
+    for profile in calibrated.overrides.get("CUSTOMER_POPULATION", []):
+        print(profile)
+    print_validation(validate_calibration(calibrator, calibrated, sim_duration=calibrator.span(), overrides=line))
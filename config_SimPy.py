@@ -14,14 +14,86 @@ GANTT_CHART_ENABLED = True  # Gantt chart visualization enable/disable flag
 VIS_STAT_ENABLED = False  # Statistical graphs visualization enable/disable flag
 SHOW_GANTT_DEBUG = False  # 기본값은 False로 설정
 
+# Output analysis settings (warm-up deletion + batch means on a single long run)
+OUTPUT_ANALYSIS_ENABLED = False  # Output analysis enable/disable flag
+MSER_BATCH_SIZE = 5  # Batch size of the MSER warm-up detection (MSER-5)
+NUM_BATCH_MEANS = 20  # Number of batches for the batch-means confidence interval
+CONFIDENCE_LEVEL = 0.95  # Confidence level of the batch-means interval
+QUEUE_BIN_WIDTH = 60  # Time bin for the time-averaged queue-length series (unit: minutes)
+
+# Result cache settings (KPI summaries and traces keyed by config hash + code version + seed)
+RESULT_CACHE_PATH = "sim_cache/results.sqlite"  # SQLite file of the result cache
+RESULT_CACHE_MAX_BYTES = 512 * 1024 * 1024  # Size bound before LRU eviction (unit: bytes)
+
+# Memory retention settings (bounded memory for long runs)
+RETENTION_ENABLED = False  # Retire completed orders into KPI accumulators instead of keeping them in memory (output analysis only sees the bounded histories)
+RETENTION_ARCHIVE_PATH = None  # Path prefix of the CSV archive of retired orders/items (None = no archive)
+RETENTION_CHUNK_SIZE = 10000  # Archive records buffered per disk write
+ITEM_POOL_SIZE = 10000  # Maximum number of retired Item objects kept for reuse
+EVENT_LOG_MAX_ENTRIES = 10000  # Event log entries kept in memory when retention is enabled
+QUEUE_HISTORY_MAX_ENTRIES = 10000  # Queue-length and cycle-time records kept per process when retention is enabled
+
+# Trace database settings (indexed per-run trace for post-run queries)
+TRACE_DB_EXPORT_ENABLED = False  # Export the trace of every run_simulation call
+TRACE_DB_PATH = "sim_trace/trace.sqlite"  # Database file of the trace export
+TRACE_DB_ENGINE = "auto"  # "sqlite", "duckdb" or "auto" (DuckDB for a .duckdb path when installed)
+TRACE_DB_BATCH_SIZE = 5000  # Rows per executemany batch
+
+# Live telemetry settings (snapshots sent to a local viewer while the simulation runs)
+TELEMETRY_ENABLED = False  # Publish telemetry snapshots during run_simulation
+TELEMETRY_ADDRESS = "127.0.0.1:8765"  # Viewer address: "host:port" (TCP) or a Unix socket path
+TELEMETRY_SIM_INTERVAL = 60  # Sim-minutes between snapshots (None = off)
+TELEMETRY_WALL_INTERVAL = None  # Wall-seconds between snapshots (None = off)
+TELEMETRY_MAX_RATE = 20  # Maximum frames sent per wall-second (backlog is coalesced to the newest frame)
+TELEMETRY_QUEUE_SIZE = 64  # Snapshots buffered for the sender thread
+
+# Digital-twin settings (real-time paced run fed by MES events)
+TWIN_SPEED = 1.0  # Sim-minutes per wall-minute (1 = real time)
+TWIN_POLL_INTERVAL = 1  # Sim-minutes between reads of the MES event queue
+TWIN_LATE_THRESHOLD = 0.05  # Lag (wall-seconds) above which an event counts as late in the lag report
+TWIN_LOG_MAX_LAG = 0.5  # Lag (wall-seconds) above which log lines are summarized instead of printed
+TWIN_LOG_FLUSH_INTERVAL = 5  # Wall-seconds between summaries of skipped log lines
+
+# Job service settings (local asyncio front end over a process pool)
+JOB_PROGRESS_STEPS = 100  # Progress updates per run (also the granularity of cancellation)
+
+# Memory accounting settings (per-subsystem bytes and object counts written as JSON)
+MEMORY_ACCOUNTING_ENABLED = False  # Record memory checkpoints during run_simulation
+MEMORY_CHECKPOINT_INTERVAL = 24 * 60  # Sim-minutes between checkpoints (None = only MEMORY_CHECKPOINTS and the end)
+MEMORY_CHECKPOINTS = []  # Extra sim times of checkpoints (unit: minutes)
+MEMORY_REPORT_PATH = "sim_memory/memory_report.json"  # JSON report file (None = not written)
+MEMORY_TRACEMALLOC = True  # Add tracemalloc snapshots per model file (slows the run down)
+MEMORY_TRACEMALLOC_FRAMES = 1  # Stack frames kept per traced allocation
+MEMORY_SAMPLE_SIZE = 1000  # Records sized per container before extrapolating
+
+# Surrogate metamodel settings (regressors fitted on sweep results for instant what-if queries)
+SURROGATE_KIND = "gp"  # "gp" (Gaussian process) or "poly" (quadratic Bayesian ridge)
+SURROGATE_HYPER_SAMPLES = 64  # Random hyperparameter draws searched when fitting the GP
+SURROGATE_RIDGE = 1e-3  # Ridge penalty of the polynomial surrogate
+SURROGATE_CANDIDATES = 512  # Latin hypercube candidates scored per active-learning round
+SURROGATE_BATCH_SIZE = 4  # Points proposed per active-learning round
+
 """ Process setting """
 
 # Process time setting
 PROC_TIME_CUTTING = 180 # Process time for build (unit: minutes)
 PROC_TIME_INSPECT = 0 # Process time for inspect per item (unit: minutes)
+FAST_PATH_ZERO_TIME = True # Process zero-time stages inline when a processor is idle (no SimPy events)
 STC_PROC_TIME_TRANSIT = 3 # Time for AMR to move the product Supplier to CNC
 CTI_PROC_TIME_TRANSIT = 3 # Time for AMR to move the product CNC to Inspector
 
+# Processing-time distributions per process (processes not listed use the constant times above)
+# Types: {"type": "LOGNORMAL", "mean": m, "std": s}, {"type": "GAMMA", "mean": m, "std": s},
+#        {"type": "EMPIRICAL", "path": "times.csv", "column": "duration"}, {"type": "CONSTANT", "value": v}
+# ex) PROC_TIME_DISTRIBUTIONS = {"Proc_Cutting": {"type": "LOGNORMAL", "mean": 180, "std": 30}}
+PROC_TIME_DISTRIBUTIONS = {}
+SAMPLER_BLOCK_SIZE = 4096 # Number of processing times pre-sampled per NumPy block
+# Rule combining the item times of a batch into one timeout
+# SUM: items served one after another, MAX: items served together (slowest item ends the batch),
+# PARALLEL: items served together and each item leaves as soon as it is done
+BATCH_TIME_RULE = "SUM"
+BATCH_TIME_RULES = {} # Per-process rule overrides, ex) {"Proc_AMR_STC": "MAX"}
+
 # Resource settings
 NUM_MACHINES_CNC = 2 # Number of CNC machines
 NUM_CTI_MACHINES_AMR = 2 # Number of AMR machines (This amr is transporting item CNC to Inspector.)
@@ -30,6 +102,62 @@ NUM_WORKERS_IN_INSPECT = 5 # Number of workers in inspection process
 CAPACICTY_MACHINE_CUTTING = 1 # Item capacity for cutting
 CAPACITY_MACHINE_AMR = 6 # Item capacity for transporting
 
+# AMR batching policy ("IMMEDIATE", "FULL_LOAD", "MAX_WAIT", "MIN_BATCH")
+# IMMEDIATE: leave with whatever is in the queue, FULL_LOAD: wait for a full load,
+# MAX_WAIT: wait for a full load but at most AMR_BATCH_MAX_WAIT for the oldest item,
+# MIN_BATCH: leave once at least AMR_BATCH_MIN_SIZE items are waiting
+AMR_BATCH_POLICY = "IMMEDIATE"
+AMR_BATCH_MAX_WAIT = 30 # Longest time the oldest item waits for a fuller load (unit: minutes)
+AMR_BATCH_MIN_SIZE = 3 # Minimum number of items per trip (MIN_BATCH policy)
+
+# Cost model per resource type (used by the fleet-sizing optimizer, unit: cost per resource)
+RESOURCE_COSTS = {
+    "NUM_MACHINES_CNC": 250000,
+    "NUM_STC_MACHINES_AMR": 40000,
+    "NUM_CTI_MACHINES_AMR": 40000,
+    "NUM_WORKERS_IN_INSPECT": 60000,
+}
+
+# Breakdown and preventive maintenance settings (None disables failures / PM)
+FAILURE_ENABLED = False # Failure model enable/disable flag
+MTBF_CNC = 5 * 24 * 60 # Mean time between failures of a CNC (unit: minutes)
+MTTR_CNC = 120 # Mean time to repair a CNC (unit: minutes)
+PM_INTERVAL_CNC = 7 * 24 * 60 # Preventive maintenance interval of a CNC (unit: minutes)
+PM_DURATION_CNC = 240 # Preventive maintenance duration of a CNC (unit: minutes)
+MTBF_AMR = 3 * 24 * 60 # Mean time between failures of an AMR (unit: minutes)
+MTTR_AMR = 30 # Mean time to repair an AMR (unit: minutes)
+PM_INTERVAL_AMR = None # Preventive maintenance interval of an AMR (unit: minutes)
+PM_DURATION_AMR = 0 # Preventive maintenance duration of an AMR (unit: minutes)
+
+# Working-shift calendars (day 0 of the simulation is a Monday)
+# Keys are processor types ("Worker", "Machine", "AMR") or resource names (ex. "Inspector_1");
+# a missing key means the resource works 24/7. Times are minutes of the day.
+SHIFT_CALENDARS_ENABLED = False # Shift calendar enable/disable flag
+SHIFT_CALENDARS = {
+    "Worker": {
+        "shifts": [(6 * 60, 14 * 60), (14 * 60, 22 * 60)],
+        "breaks": [(12 * 60, 12 * 60 + 30), (18 * 60, 18 * 60 + 30)],
+        "closed_days": [5, 6],
+    },
+}
+
+# Routing graph (None = the built-in line AMR → Cutting → AMR → Inspect)
+# "stages": {key: {"type": "AMR_STC" | "CUTTING" | "AMR_CTI" | "INSPECT", "num_processors": n, "name": ...}}
+#   (num_processors defaults to the NUM_* setting of the type; name keys PROC_TIME_DISTRIBUTIONS and BATCH_TIME_RULES)
+# "routes": {is_supplier value or "*": [step, ...]}, a step being a stage key, a list of stage keys
+#   (parallel cells) or {"stages": [...], "probability": p} (optional stage visited with probability p)
+# "rework": stage key(s) defective items return to, the route continuing from that step
+#   (a route without one of them reworks at its first CUTTING step)
+# ex) ROUTING_GRAPH = {
+#         "stages": {"stc": {"type": "AMR_STC"}, "cell_a": {"type": "CUTTING", "num_processors": 2},
+#                    "cell_b": {"type": "CUTTING", "num_processors": 1}, "cti": {"type": "AMR_CTI"},
+#                    "inspect": {"type": "INSPECT"}},
+#         "routes": {"LOT": ["stc", ["cell_a", "cell_b"], "cti", "inspect"],
+#                    "PALLET": ["stc", "cell_b", {"stages": "cti", "probability": 0.5}, "inspect"]},
+#         "rework": "cell_a"}
+ROUTING_GRAPH = None
+ROUTING_CELL_RULE = "SHORTEST_QUEUE"  # Choice among parallel cells: "SHORTEST_QUEUE" (load per processor) or "ROUND_ROBIN"
+
 # Process settings
 DEFECT_RATE_PROC_BUILD = 0  # 5% defect rate in build process
 # Item priority settings ("FRONT", "MIDDLE", "BACK")
@@ -49,6 +177,10 @@ def SUPPLY_TYPE_DECISION():
         return "LOT"
     else:
         return "PALLET"
+
+# Aggregated entity mode: a LOT/PALLET order travels as one entity with a quantity
+# and is split only where units matter (capacity limits, defects)
+AGGREGATE_LOT_ENTITIES = False
     
 """ Customer settings """
 
@@ -57,4 +189,38 @@ def NUM_ITEMS_PER_ORDER(): return random.randint(
     2, 2)
 
 # Customer settings
-CUST_ORDER_CYCLE = 3 * 24 * 60  # Customer order cycle (1 week in minutes)
\ No newline at end of file
+CUST_ORDER_CYCLE = 3 * 24 * 60  # Customer order cycle (1 week in minutes)
+
+# Customer population (replaces the single periodic customer when not empty)
+# Each profile describes `count` customers: mean_interarrival (unit: minutes),
+# arrival ("EXPONENTIAL" or "FIXED"), num_items (int, (low, high) or {"values": [...], "weights": [...]},
+# None = NUM_ITEMS_PER_ORDER), priority, due_date (minutes after release, None = no due date)
+# and supplier ("LOT", "PALLET" or None = SUPPLY_TYPE_DECISION)
+# ex) CUSTOMER_POPULATION = [{"count": 500, "mean_interarrival": 30 * 24 * 60, "num_items": (1, 4),
+#                             "priority": 1, "due_date": 5 * 24 * 60}]
+CUSTOMER_POPULATION = []
+
+""" Multi-line plant settings (plant_SimPy) """
+# Identical lines share the LOT/PALLET supplier pools (LOT_INVEN_LEVEL, PALLET_INVEN_LEVEL per supplier)
+# and one customer stream; each line can run in its own process
+PLANT_NUM_LINES = 4  # Number of production lines
+PLANT_ORDER_ROUTING = "ROUND_ROBIN"  # Line of each order: "ROUND_ROBIN" or "LEAST_LOADED" (fewest units assigned)
+PLANT_LOOKAHEAD = None  # Synchronization lookahead (unit: minutes), None = minimum transit time of the supply stages
+PLANT_SUPPLY_STAGE = "AMR_STC"  # Stage type whose trips draw raw material from the shared pools
+
+""" Calibration settings (calibration_SimPy) """
+# Column names of the MES operation log (one row per item and operation; "release" and "quantity" may be None)
+# Times are numbers (unit: minutes) or timestamps parsed with CALIBRATION_TIME_FORMAT
+CALIBRATION_COLUMNS = {"order": "order_id", "operation": "operation", "start": "start_time", "end": "end_time",
+                       "release": "release_time", "defect": "is_defect", "supplier": "supply_type",
+                       "quantity": None}
+# MES operation name -> simulated process
+CALIBRATION_OPERATIONS = {"TRANSPORT_STC": "Proc_AMR_STC", "CUTTING": "Proc_Cutting",
+                          "TRANSPORT_CTI": "Proc_AMR_CTI", "INSPECT": "Proc_Inspect"}
+CALIBRATION_TIME_FORMAT = None  # strftime format of text timestamps (None = numeric minutes or ISO 8601)
+CALIBRATION_CHUNK_SIZE = 500000  # Log rows parsed per chunk
+CALIBRATION_RESERVOIR_SIZE = 20000  # Durations kept per stage (uniform reservoir) for fitting and KS tests
+CALIBRATION_KS_THRESHOLD = 0.03  # KS distance above which a stage keeps its empirical distribution
+CALIBRATION_CONSTANT_CV = 0.01  # Duration CV below which a stage gets a constant time
+CALIBRATION_FIXED_CV = 0.05  # Interarrival CV below which orders arrive at fixed intervals
+CALIBRATION_VALIDATION_DURATION = 30 * 24 * 60  # Longest validation run (unit: minutes)
\ No newline at end of file
@@ -0,0 +1,108 @@
+import csv
+import random
+import numpy as np
+from config_SimPy import *
+
+""" Processing-time distributions sampled in NumPy blocks """
+
+
+class ProcessingTimeSampler:
+    """
+    Processing-time sampler with a pre-sampled buffer
+
+    Samples are drawn `block_size` at a time with NumPy and handed out from
+    the buffer, so the per-item cost is an array index instead of a
+    random-number-generator call.
+
+    Attributes:
+        dist_type (str): "CONSTANT", "LOGNORMAL", "GAMMA" or "EMPIRICAL"
+        spec (dict): Distribution parameters
+        rng (np.random.Generator): Generator seeded from the `random` module state
+        block_size (int): Number of samples drawn per refill
+        buffer (np.ndarray): Pre-sampled times
+        position (int): Next unused index of the buffer
+    """
+
+    def __init__(self, spec, block_size=SAMPLER_BLOCK_SIZE, seed=None):
+        self.dist_type = spec["type"].upper()
+        self.spec = spec
+        # Seed from `random` so random.seed() keeps whole runs reproducible
+        self.rng = np.random.default_rng(random.getrandbits(64) if seed is None else seed)
+        self.block_size = block_size
+        self.buffer = np.empty(0)
+        self.position = 0
+
+        if self.dist_type == "LOGNORMAL":
+            # Convert mean/std of the time into parameters of the underlying normal
+            mean, std = spec["mean"], spec["std"]
+            sigma2 = np.log(1 + (std / mean) ** 2)
+            self.mu = np.log(mean) - sigma2 / 2
+            self.sigma = np.sqrt(sigma2)
+        elif self.dist_type == "GAMMA":
+            mean, std = spec["mean"], spec["std"]
+            self.shape = (mean / std) ** 2
+            self.scale = std ** 2 / mean
+        elif self.dist_type == "EMPIRICAL":
+            values = spec.get("values")
+            if values is None:
+                values = load_empirical_times(spec["path"], spec.get("column"))
+            self.values = np.asarray(values, dtype=float)
+            if len(self.values) == 0:
+                raise ValueError("Empirical processing-time distribution has no values")
+        elif self.dist_type != "CONSTANT":
+            raise ValueError(f"Invalid processing-time distribution: {self.dist_type!r}")
+
+    def _draw(self, n):
+        """Draw n fresh samples"""
+        if self.dist_type == "LOGNORMAL":
+            return self.rng.lognormal(self.mu, self.sigma, n)
+        if self.dist_type == "GAMMA":
+            return self.rng.gamma(self.shape, self.scale, n)
+        if self.dist_type == "EMPIRICAL":
+            return self.rng.choice(self.values, n)
+        return np.full(n, float(self.spec["value"]))
+
+    def sample_n(self, n):
+        """Return n processing times from the buffer (refilled in blocks)"""
+        if self.position + n > len(self.buffer):
+            rest = self.buffer[self.position:]
+            self.buffer = np.concatenate((rest, self._draw(max(self.block_size, n))))
+            self.position = 0
+        times = self.buffer[self.position:self.position + n]
+        self.position += n
+        return times
+
+    def sample(self):
+        """Return one processing time"""
+        return float(self.sample_n(1)[0])
+
+
+def load_empirical_times(path, column=None):
+    """Read observed processing times from a CSV file (first column by default)"""
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        index = header.index(column) if column else 0
+        return [float(row[index]) for row in reader if row and row[index] != '']
+
+
+def make_sampler(name_process):
+    """Sampler configured for a process in PROC_TIME_DISTRIBUTIONS (None if not configured)"""
+    spec = PROC_TIME_DISTRIBUTIONS.get(name_process)
+    return ProcessingTimeSampler(spec) if spec else None
+
+
+def combine_batch_times(times, rule):
+    """
+    Combine per-item times of one batch into the duration of a single timeout
+
+    Args:
+        times (array-like): Processing time of each item
+        rule (str): "SUM" (items served one after another) or "MAX" (items
+            served in parallel, the batch ends with the slowest item)
+    """
+    if rule == "SUM":
+        return float(np.sum(times))
+    if rule == "MAX":
+        return float(np.max(times))
+    raise ValueError(f"Invalid batch time rule: {rule!r}")
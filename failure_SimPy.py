@@ -0,0 +1,178 @@
+import random
+import numpy as np
+from config_SimPy import *
+
+""" Machine breakdown and preventive-maintenance model (pre-sampled failure schedules) """
+
+
+def failure_settings(processor_type):
+    """(MTBF, MTTR, PM interval, PM duration) of a processor type (None if it never fails)"""
+    if processor_type == "Machine":
+        return MTBF_CNC, MTTR_CNC, PM_INTERVAL_CNC, PM_DURATION_CNC
+    if processor_type == "AMR":
+        return MTBF_AMR, MTTR_AMR, PM_INTERVAL_AMR, PM_DURATION_AMR
+    return None
+
+
+def sample_downtime_schedule(rng, horizon, mtbf, mttr, pm_interval=None, pm_duration=0):
+    """
+    Pre-sample the down intervals of one resource over the whole horizon
+
+    Times to failure and repair times are exponential (MTBF/MTTR). PM windows
+    repeat every `pm_interval`. Overlapping windows are merged; a merged window
+    that contains a PM window is flagged as PM.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: (down starts, down ends, is PM flags)
+    """
+    starts, ends, is_pm = [], [], []
+
+    if mtbf:
+        # Draw enough cycles for the horizon in one block, extend if it falls short
+        t = 0.0
+        block = max(16, int(2 * horizon / (mtbf + mttr)) + 16)
+        while t < horizon:
+            up = rng.exponential(mtbf, block)
+            down = rng.exponential(mttr, block) if mttr else np.zeros(block)
+            fail_at = t + np.cumsum(up + down) - down
+            keep = fail_at < horizon
+            starts.append(fail_at[keep])
+            ends.append(fail_at[keep] + down[keep])
+            is_pm.append(np.zeros(int(keep.sum()), dtype=bool))
+            t = float(fail_at[-1] + down[-1])
+
+    if pm_interval:
+        pm_starts = np.arange(pm_interval, horizon, pm_interval, dtype=float)
+        starts.append(pm_starts)
+        ends.append(pm_starts + pm_duration)
+        is_pm.append(np.ones(len(pm_starts), dtype=bool))
+
+    if not starts:
+        return np.zeros(0), np.zeros(0), np.zeros(0, dtype=bool)
+
+    starts = np.concatenate(starts)
+    ends = np.concatenate(ends)
+    is_pm = np.concatenate(is_pm)
+    if len(starts) == 0:
+        # No outage within the horizon
+        return np.zeros(0), np.zeros(0), np.zeros(0, dtype=bool)
+    order = np.argsort(starts, kind='stable')
+    starts, ends, is_pm = starts[order], ends[order], is_pm[order]
+
+    # Merge overlapping windows (a failure during PM extends the same outage, which stays a PM window)
+    run_end = np.maximum.accumulate(ends)
+    new_group = np.concatenate(([True], starts[1:] > run_end[:-1]))
+    merged_starts = starts[new_group]
+    merged_ends = np.maximum.reduceat(ends, np.flatnonzero(new_group))
+    merged_pm = np.logical_or.reduceat(is_pm, np.flatnonzero(new_group))
+    return merged_starts, merged_ends, merged_pm
+
+
+class FailureManager:
+    """
+    Applies pre-sampled failure/PM schedules to the processors of a manager
+
+    One SimPy process walks the merged transition list of all resources, so
+    the event overhead is proportional to the number of outages, not to the
+    simulated time or the number of machines. A busy resource is stopped by
+    interrupting its running delay_resources process (preempt-resume).
+
+    Attributes:
+        env (simpy.Environment): Simulation environment
+        logger (Logger): Event logger
+        horizon (float): Length of the pre-sampled schedules
+        resources (list): (process, ProcessorResource) pairs with a schedule
+        schedules (dict): {resource name: (starts, ends, is_pm)}
+        stats (dict): {resource name: {'downtime', 'num_failures', 'num_pm', 'num_interrupts'}}
+    """
+
+    def __init__(self, env, processes, horizon, logger=None):
+        self.env = env
+        self.logger = logger
+        self.horizon = horizon
+        rng = np.random.default_rng(random.getrandbits(64))
+
+        self.resources = []
+        self.schedules = {}
+        self.stats = {}
+        times, kinds, indices = [], [], []
+        for process in processes:
+            for processor_resource in process.processor_resources.values():
+                settings = failure_settings(processor_resource.processor_type)
+                if settings is None:
+                    continue
+                starts, ends, is_pm = sample_downtime_schedule(rng, horizon, *settings)
+                idx = len(self.resources)
+                self.resources.append((process, processor_resource))
+                self.schedules[processor_resource.name] = (starts, ends, is_pm)
+                self.stats[processor_resource.name] = {
+                    'downtime': 0.0, 'num_failures': int((~is_pm).sum()),
+                    'num_pm': int(is_pm.sum()), 'num_interrupts': 0}
+                # Transition list: kind 1 = down, kind 0 = up
+                times += [starts, ends]
+                kinds += [np.ones(len(starts), dtype=np.int8), np.zeros(len(ends), dtype=np.int8)]
+                indices += [np.full(len(starts), idx), np.full(len(ends), idx)]
+
+        if times:
+            times = np.concatenate(times)
+            kinds = np.concatenate(kinds)
+            indices = np.concatenate(indices)
+            # Sort by time, repairs before failures at the same instant
+            order = np.lexsort((kinds, times))
+            self.transitions = (times[order], kinds[order], indices[order])
+        else:
+            self.transitions = (np.zeros(0), np.zeros(0, dtype=np.int8), np.zeros(0, dtype=int))
+        self.process = env.process(self.run())
+
+    def run(self):
+        """Single driver process over all pre-sampled transitions"""
+        times, kinds, indices = self.transitions
+        for t, kind, idx in zip(times.tolist(), kinds.tolist(), indices.tolist()):
+            if t > self.env.now:
+                yield self.env.timeout(t - self.env.now)
+            process, processor_resource = self.resources[idx]
+            if kind == 1:
+                self.fail(process, processor_resource)
+            else:
+                self.repair(process, processor_resource)
+
+    def fail(self, process, processor_resource):
+        """Take a resource down until its scheduled repair time"""
+        starts, ends, _ = self.schedules[processor_resource.name]
+        k = int(np.searchsorted(starts, self.env.now, side='right')) - 1
+        processor_resource.down_until = float(ends[k])
+        self.stats[processor_resource.name]['downtime'] += min(ends[k], self.horizon) - starts[k]
+
+        if self.logger:
+            self.logger.log_event(
+                "Failure", f"{processor_resource.name} down until {processor_resource.down_until:.1f}")
+
+        # Stop the running job (it resumes after the repair)
+        active = processor_resource.active_process
+        if processor_resource.in_hold and active is not None and active.is_alive:
+            self.stats[processor_resource.name]['num_interrupts'] += 1
+            active.interrupt(processor_resource.down_until)
+
+    def repair(self, process, processor_resource):
+        """Bring a resource back up and let its process allocate work again"""
+        processor_resource.down_until = None
+        if self.logger:
+            self.logger.log_event("Failure", f"{processor_resource.name} repaired")
+        process.resource_trigger.succeed()
+        process.resource_trigger = self.env.event()
+
+    def availability(self):
+        """
+        Availability and lost-capacity KPIs per resource
+
+        Returns:
+            dict: {resource name: {'availability', 'downtime', 'lost_capacity', ...}}
+        """
+        report = {}
+        for process, processor_resource in self.resources:
+            stats = dict(self.stats[processor_resource.name])
+            stats['availability'] = float(1 - stats['downtime'] / self.horizon) if self.horizon else 1.0
+            # Item-minutes of capacity lost to outages
+            stats['lost_capacity'] = float(stats['downtime'] * processor_resource.capacity)
+            report[processor_resource.name] = stats
+        return report
@@ -0,0 +1,291 @@
+import bisect
+import math
+import numpy as np
+from config_SimPy import *
+
+""" NumPy recurrence-based fast simulator for FIFO tandem-line scenarios """
+
+# Stages of the line in flow order
+STAGE_NAMES = ("Proc_AMR_STC", "Proc_Cutting", "Proc_AMR_CTI", "Proc_Inspect")
+
+
+def fast_backend_qualifies():
+    """
+    True if the current config can be simulated exactly by the recurrence engine
+
+    Requires a FIFO line without rework, breakdowns, shifts, sampled times,
+    batching policies or aggregated entities, and one item per CNC. The
+    recurrences do not model how SimPy batches items that a zero-duration
+    stage hands on at the same instant, so every stage but Inspect (the last
+    one) must take time, as for kernel_SimPy.kernel_qualifies.
+    """
+    return (
+        DEFECT_RATE_PROC_BUILD == 0
+        and STC_PROC_TIME_TRANSIT > 0
+        and PROC_TIME_CUTTING > 0
+        and CTI_PROC_TIME_TRANSIT > 0
+        and not FAILURE_ENABLED
+        and not SHIFT_CALENDARS_ENABLED
+        and not PROC_TIME_DISTRIBUTIONS
+        and AMR_BATCH_POLICY.upper() == "IMMEDIATE"
+        and not AGGREGATE_LOT_ENTITIES
+        and CAPACICTY_MACHINE_CUTTING == 1
+        and not CUSTOMER_POPULATION
+        and ROUTING_GRAPH is None
+    )
+
+
+def generate_arrivals(sim_duration, order_cycle=None):
+    """
+    Order stream of the single Customer (same draws per order as Customer.create_order)
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (order release times, items per order)
+    """
+    order_cycle = CUST_ORDER_CYCLE if order_cycle is None else order_cycle
+    num_orders = int(math.ceil(sim_duration / order_cycle)) if sim_duration > 0 else 0
+    sizes = np.empty(num_orders, dtype=np.int64)
+    for k in range(num_orders):
+        SUPPLY_TYPE_DECISION()
+        sizes[k] = NUM_ITEMS_PER_ORDER()
+    return np.arange(num_orders, dtype=float) * order_cycle, sizes
+
+
+def multi_server_fifo(arrivals, num_servers, service_time):
+    """
+    FIFO G/D/c stage as a vectorized Lindley recurrence
+
+    With a constant service time, departures leave in start order, so item i
+    starts at max(a_i, start_{i-c} + S). The recurrence splits into c
+    independent lanes, each a single-server Lindley recursion
+    start_j = max(a_j, start_{j-1} + S) = j*S + cummax(a_j - j*S).
+
+    Args:
+        arrivals (np.ndarray): Arrival times, nondecreasing
+        num_servers (int): Number of servers c
+        service_time (float): Constant service time S
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (start times, server index of each item)
+    """
+    n = len(arrivals)
+    starts = np.empty(n)
+    servers = np.arange(n) % num_servers
+    for lane in range(min(num_servers, n)):
+        a = arrivals[lane::num_servers]
+        j = np.arange(len(a), dtype=float) * service_time
+        starts[lane::num_servers] = j + np.maximum.accumulate(a - j)
+    return starts, servers
+
+
+def batch_transport(arrivals, num_amrs, capacity, transit_time):
+    """
+    AMR stage with batch service (each trip takes up to `capacity` waiting items)
+
+    A trip leaves at max(earliest free AMR, arrival of the first waiting item)
+    with every item that has arrived by then, up to capacity, on the first
+    free AMR (registration order, like seize_resources). The loop runs once
+    per trip, not once per item, and the batch membership is a bisect.
+
+    Returns:
+        tuple: (start times, AMR index of each item, trip start times, trip loads)
+    """
+    n = len(arrivals)
+    arrival_list = arrivals.tolist()
+    trip_starts, trip_amrs, loads = [], [], []
+    free = [0.0] * num_amrs
+    i = 0
+    while i < n:
+        depart = max(min(free), arrival_list[i])
+        amr = next(k for k, t in enumerate(free) if t <= depart)
+        last = min(i + capacity, bisect.bisect_right(arrival_list, depart, i))
+        trip_starts.append(depart)
+        trip_amrs.append(amr)
+        loads.append(last - i)
+        free[amr] = depart + transit_time
+        i = last
+
+    # Expand trips to items in one vectorized step
+    loads = np.asarray(loads, dtype=np.int64)
+    trip_starts = np.asarray(trip_starts, dtype=float)
+    starts = np.repeat(trip_starts, loads)
+    amrs = np.repeat(np.asarray(trip_amrs, dtype=np.int64), loads)
+    return starts, amrs, trip_starts, loads
+
+
+class FastLineResult:
+    """
+    Per-item trace of the recurrence engine
+
+    Attributes:
+        order_index (np.ndarray): Order index (0-based) of each item
+        item_index (np.ndarray): Item number within its order (1-based)
+        release (np.ndarray): Order release time of each item
+        starts (dict): {stage name: processing start times}
+        ends (dict): {stage name: processing end times}
+        resources (dict): {stage name: server index of each item}
+        trip_starts (dict): {AMR stage name: start time of each trip}
+        trip_loads (dict): {AMR stage name: items per trip}
+        num_servers (dict): {stage name: number of servers}
+        service_times (dict): {stage name: service time}
+        sim_duration (float): Simulation horizon
+    """
+
+    def __init__(self, sim_duration):
+        self.sim_duration = sim_duration
+        self.starts = {}
+        self.ends = {}
+        self.resources = {}
+        self.trip_starts = {}
+        self.trip_loads = {}
+        self.num_servers = {}
+        self.service_times = {}
+
+    def kpis(self):
+        """KPI summary with the same keys as stats_SimPy.summarize_kpis"""
+        horizon = self.sim_duration
+        num_orders = int(self.order_index.max()) + 1 if len(self.order_index) else 0
+        done = self.ends["Proc_Inspect"] < horizon
+        cycle_times = self.ends["Proc_Inspect"][done] - self.release[done]
+
+        # An order is complete when all of its items passed inspection
+        makespans = []
+        if num_orders:
+            incomplete = np.bincount(self.order_index[~done], minlength=num_orders) > 0
+            last_end = np.full(num_orders, -np.inf)
+            np.maximum.at(last_end, self.order_index, self.ends["Proc_Inspect"])
+            first_release = np.full(num_orders, np.inf)
+            np.minimum.at(first_release, self.order_index, self.release)
+            has_items = np.bincount(self.order_index, minlength=num_orders) > 0
+            complete = has_items & ~incomplete
+            makespans = last_end[complete] - first_release[complete]
+        makespans = np.asarray(makespans, dtype=float)
+
+        kpis = {
+            'num_orders': float(self.num_orders),
+            'num_items_released': float(len(self.release)),
+            'num_items_completed': float(done.sum()),
+            'num_orders_completed': float(len(makespans)),
+            'throughput_per_day': float(done.sum()) / horizon * 24 * 60 if horizon else 0.0,
+            'mean_cycle_time': float(cycle_times.mean()) if len(cycle_times) else math.nan,
+            'mean_makespan': float(makespans.mean()) if len(makespans) else math.nan,
+            'max_makespan': float(makespans.max()) if len(makespans) else math.nan,
+        }
+        for name in STAGE_NAMES:
+            service_time = self.service_times[name]
+            if name in self.trip_loads:
+                # One busy interval per finished trip
+                finished = self.trip_starts[name] + service_time < horizon
+                busy = float(finished.sum()) * service_time
+            else:
+                busy = float((self.ends[name] < horizon).sum()) * service_time
+            kpis[f'utilization_{name}'] = busy / (self.num_servers[name] * horizon) if horizon else 0.0
+            if name in self.trip_loads:
+                # Trips are recorded when they start
+                started = self.trip_starts[name] < horizon
+                if started.any():
+                    kpis[f'num_trips_{name}'] = float(started.sum())
+                    kpis[f'load_factor_{name}'] = float(np.mean(self.trip_loads[name][started] / CAPACITY_MACHINE_AMR))
+        return kpis
+
+
+def simulate_line(sim_duration=SIM_TIME, order_times=None, order_sizes=None):
+    """
+    Simulate STC -> Cutting -> CTI -> Inspect with array recurrences
+
+    Args:
+        sim_duration (float): Simulation horizon
+        order_times (np.ndarray): Order release times (generated from `random` if omitted)
+        order_sizes (np.ndarray): Items per order
+
+    Returns:
+        FastLineResult: Per-item trace of the run
+    """
+    if order_times is None:
+        order_times, order_sizes = generate_arrivals(sim_duration)
+    order_times = np.asarray(order_times, dtype=float)
+    order_sizes = np.asarray(order_sizes, dtype=np.int64)
+
+    result = FastLineResult(sim_duration)
+    result.num_orders = len(order_times)
+    result.order_index = np.repeat(np.arange(len(order_times)), order_sizes)
+    offsets = np.cumsum(order_sizes) - order_sizes
+    result.item_index = np.arange(len(result.order_index)) - np.repeat(offsets, order_sizes) + 1
+    result.release = np.repeat(order_times, order_sizes)
+
+    stages = (
+        ("Proc_AMR_STC", "AMR", NUM_STC_MACHINES_AMR, STC_PROC_TIME_TRANSIT),
+        ("Proc_Cutting", "Machine", NUM_MACHINES_CNC, PROC_TIME_CUTTING),
+        ("Proc_AMR_CTI", "AMR", NUM_CTI_MACHINES_AMR, CTI_PROC_TIME_TRANSIT),
+        ("Proc_Inspect", "Worker", NUM_WORKERS_IN_INSPECT, PROC_TIME_INSPECT),
+    )
+    # Items stay in FIFO order through the whole line (stable by release order)
+    arrivals = result.release
+    for name, kind, num_servers, service_time in stages:
+        if kind == "AMR":
+            starts, servers, trip_starts, loads = batch_transport(
+                arrivals, num_servers, CAPACITY_MACHINE_AMR, service_time)
+            result.trip_starts[name] = trip_starts
+            result.trip_loads[name] = loads
+        else:
+            starts, servers = multi_server_fifo(arrivals, num_servers, service_time)
+        result.starts[name] = starts
+        result.ends[name] = starts + service_time
+        result.resources[name] = servers
+        result.num_servers[name] = num_servers
+        result.service_times[name] = service_time
+        arrivals = result.ends[name]
+    return result
+
+
+def validate_against_simpy(overrides=None, seed=42, sim_duration=None, tolerance=1e-9):
+    """
+    Compare the recurrence engine with the SimPy Manager for one seed
+
+    The order stream recorded by the SimPy run is replayed through the
+    recurrence engine, then per-item stage start/end times are compared.
+
+    Returns:
+        dict: max_abs_error, num_items, matches (bool), simpy_kpis, fast_kpis
+    """
+    from scenario_SimPy import simulate, apply_config, SCENARIO_DEFAULTS
+    from stats_SimPy import summarize_kpis
+
+    manager, duration = simulate(overrides, seed, sim_duration)
+    orders = manager.processed_orders
+    settings = dict(SCENARIO_DEFAULTS)
+    settings.update(overrides or {})
+    with apply_config(settings):
+        if not fast_backend_qualifies():
+            raise ValueError("Scenario does not qualify for the recurrence engine")
+        result = simulate_line(duration,
+                               np.array([o.time_start for o in orders], dtype=float),
+                               np.array([len(o.list_items) for o in orders], dtype=np.int64))
+        fast_kpis = result.kpis()
+
+    # Per-item comparison of every finished stage visit
+    max_error = 0.0
+    k = 0
+    for order in orders:
+        for item in order.list_items:
+            for step in item.processing_history:
+                if step['end_time'] is None:
+                    continue
+                name = step['process']
+                max_error = max(max_error,
+                                abs(step['start_time'] - result.starts[name][k]),
+                                abs(step['end_time'] - result.ends[name][k]))
+            k += 1
+
+    return {
+        'max_abs_error': max_error,
+        'num_items': k,
+        'matches': max_error <= tolerance,
+        'simpy_kpis': summarize_kpis(manager, duration),
+        'fast_kpis': fast_kpis,
+    }
+
+
+def run_fast_scenario(sim_duration):
+    """KPI summary of the current config from the recurrence engine"""
+    return simulate_line(sim_duration).kpis()
@@ -0,0 +1,275 @@
+import contextlib
+import copy
+import io
+import random
+import sys
+import simpy
+import config_SimPy
+from scenario_SimPy import SCENARIO_DEFAULTS, apply_config, config_snapshot, _canonical_value
+
+""" Incremental re-simulation: replay cached upstream departure streams into the changed stage """
+
+# Stages in flow order (Manager.get_processes keys) and the config names each one reads
+STAGE_ORDER = ['transport_stc', 'cutting', 'transport_cti', 'inspect']
+STAGE_PARAMETERS = {
+    # Shared AMR settings change the first AMR stage, so they invalidate the whole line
+    'CAPACITY_MACHINE_AMR': 'transport_stc',
+    'AMR_BATCH_POLICY': 'transport_stc',
+    'AMR_BATCH_MAX_WAIT': 'transport_stc',
+    'AMR_BATCH_MIN_SIZE': 'transport_stc',
+    'NUM_STC_MACHINES_AMR': 'transport_stc',
+    'STC_PROC_TIME_TRANSIT': 'transport_stc',
+    'NUM_MACHINES_CNC': 'cutting',
+    'PROC_TIME_CUTTING': 'cutting',
+    'CAPACICTY_MACHINE_CUTTING': 'cutting',
+    'NUM_CTI_MACHINES_AMR': 'transport_cti',
+    'CTI_PROC_TIME_TRANSIT': 'transport_cti',
+    'NUM_WORKERS_IN_INSPECT': 'inspect',
+    'PROC_TIME_INSPECT': 'inspect',
+}
+
+
+def replay_supported():
+    """
+    True if upstream stages cannot be influenced by downstream ones (no rework, no shared outages)
+
+    Replay also needs the released orders and their items, which retention retires.
+    """
+    return (config_SimPy.DEFECT_RATE_PROC_BUILD == 0 and not config_SimPy.FAILURE_ENABLED
+            and config_SimPy.ROUTING_GRAPH is None and not config_SimPy.RETENTION_ENABLED)
+
+
+def first_changed_stage(base_settings, settings):
+    """
+    Earliest stage whose inputs differ between two config snapshots
+
+    Returns:
+        int: Index into STAGE_ORDER, 0 if a parameter outside STAGE_PARAMETERS
+            changed (order stream, defects, ...), len(STAGE_ORDER) if nothing changed
+    """
+    first = len(STAGE_ORDER)
+    for name in set(base_settings) | set(settings):
+        if _canonical_value(base_settings.get(name)) == _canonical_value(settings.get(name)):
+            continue
+        if name not in STAGE_PARAMETERS:
+            return 0
+        first = min(first, STAGE_ORDER.index(STAGE_PARAMETERS[name]))
+    return first
+
+
+def _build_manager(env):
+    """Manager of run_simulation without the Customer (items are injected by the caller)"""
+    from manager import Manager
+    from log_SimPy import Logger
+
+    return Manager(env, Logger(env))
+
+
+class StageStreams:
+    """
+    Departure streams of a baseline run, recorded at every stage entry
+
+    Attributes:
+        settings (dict): Config snapshot of the baseline run
+        seed (int): Random seed
+        sim_duration (float): Simulation horizon
+        manager (Manager): Finished baseline manager
+        arrivals (dict): {stage key: [(item, time), ...]} in arrival order
+    """
+
+    def __init__(self, overrides=None, seed=42, sim_duration=None):
+        from base_Customer import create_customers
+
+        settings = dict(SCENARIO_DEFAULTS)
+        settings.update(overrides or {})
+        with apply_config(settings), contextlib.redirect_stdout(io.StringIO()):
+            self.settings = config_snapshot()
+            self.seed = seed
+            self.sim_duration = config_SimPy.SIM_TIME if sim_duration is None else sim_duration
+            random.seed(seed)
+            env = simpy.Environment()
+            self.manager = _build_manager(env)
+            processes = self.manager.get_processes()
+            for process in processes.values():
+                process.arrival_log = []
+            create_customers(env, self.manager, self.manager.logger)
+            env.run(until=self.sim_duration)
+        self.arrivals = {key: processes[key].arrival_log for key in STAGE_ORDER}
+
+    def _clone_orders(self, upstream):
+        """Copies of the baseline orders with histories cut back to the upstream stages"""
+        clones = {}
+        orders = []
+        for order in self.manager.processed_orders:
+            order_copy = copy.copy(order)
+            order_copy.list_items = []
+            for item in order.list_items:
+                item_copy = copy.copy(item)
+                item_copy.waiting_history = [
+                    dict(step) for step in item.waiting_history if step['process'] in upstream]
+                item_copy.processing_history = [
+                    dict(step) for step in item.processing_history if step['process'] in upstream]
+                item_copy.process_sequence = [
+                    name for name in getattr(item, 'process_sequence', []) if name in upstream]
+                item_copy.workstation = dict(item.workstation)
+                item_copy.is_completed = False
+                clones[id(item)] = item_copy
+                order_copy.list_items.append(item_copy)
+            orders.append(order_copy)
+        return orders, clones
+
+    def replay(self, overrides=None, quiet=True):
+        """
+        Re-simulate only the stages from the first changed one onward
+
+        The recorded arrival stream of that stage drives it; the upstream
+        stages keep their baseline records (histories, trips, completions).
+
+        Returns:
+            tuple: (manager, sim_duration, first changed stage index)
+        """
+        settings = dict(SCENARIO_DEFAULTS)
+        settings.update(overrides or {})
+        with apply_config(settings):
+            if not replay_supported():
+                raise ValueError("Replay needs a line without rework feedback, breakdowns or retention")
+            first = first_changed_stage(self.settings, config_snapshot())
+            if first == 0:
+                raise ValueError("The order stream or the first stage changed; run the scenario in full")
+            first = min(first, len(STAGE_ORDER) - 1)
+
+            base_processes = self.manager.get_processes()
+            upstream = {base_processes[key].name_process for key in STAGE_ORDER[:first]}
+            orders, clones = self._clone_orders(upstream)
+
+            output = io.StringIO() if quiet else sys.stdout
+            with contextlib.redirect_stdout(output):
+                # Same seed and construction order as a full run (sampler seeds match)
+                random.seed(self.seed)
+                env = simpy.Environment()
+                manager = _build_manager(env)
+                processes = manager.get_processes()
+                if any(processes[key].consumes_random() for key in STAGE_ORDER[first:]):
+                    # In a full run these draws interleave with the order stream's draws
+                    raise ValueError("A re-simulated stage draws from the global random stream; run in full")
+                for key in STAGE_ORDER[:first]:
+                    processes[key].completed_items = [clones[id(i)] for i in base_processes[key].completed_items]
+                    processes[key].trip_history = list(base_processes[key].trip_history)
+                    processes[key].item_store.queue_length_history = list(
+                        base_processes[key].item_store.queue_length_history)
+                manager.processed_orders = orders
+                manager.processed_items = [item for order in orders for item in order.list_items]
+
+                target = processes[STAGE_ORDER[first]]
+                stream = [(clones[id(item)], time) for item, time in self.arrivals[STAGE_ORDER[first]]]
+                env.process(self._feed(env, target, stream))
+                env.run(until=self.sim_duration)
+        return manager, self.sim_duration, first
+
+    @staticmethod
+    def _feed(env, target, stream):
+        """Inject the recorded arrivals into the first re-simulated stage"""
+        for item, time in stream:
+            if time > env.now:
+                yield env.timeout(time - env.now)
+            target.add_to_queue(item)
+
+
+class IncrementalRunner:
+    """
+    Scenario runner that reuses baseline departure streams across runs
+
+    One baseline is recorded per (seed, horizon). A scenario that only
+    changes downstream parameters is replayed from its first changed stage;
+    anything else runs in full.
+
+    Attributes:
+        base_overrides (dict): Overrides of the baseline scenario
+        baselines (dict): {(seed, sim_duration): StageStreams}
+        num_replays (int): Scenarios answered by replay
+        num_full_runs (int): Scenarios that needed a full run
+    """
+
+    def __init__(self, base_overrides=None):
+        self.base_overrides = dict(base_overrides or {})
+        self.baselines = {}
+        self.num_replays = 0
+        self.num_full_runs = 0
+
+    def baseline(self, seed, sim_duration):
+        key = (seed, sim_duration)
+        if key not in self.baselines:
+            self.baselines[key] = StageStreams(self.base_overrides, seed, sim_duration)
+        return self.baselines[key]
+
+    def run(self, overrides=None, seed=42, sim_duration=None):
+        """KPI summary of the scenario base_overrides + overrides"""
+        from stats_SimPy import summarize_kpis
+        from scenario_SimPy import run_scenario
+
+        merged = dict(self.base_overrides)
+        merged.update(overrides or {})
+        streams = self.baseline(seed, sim_duration)
+        try:
+            manager, duration, _ = streams.replay(merged)
+        except ValueError:
+            self.num_full_runs += 1
+            return run_scenario(merged, seed, sim_duration, backend="simpy")
+        self.num_replays += 1
+        return summarize_kpis(manager, duration)
+
+
+def validate_incremental(base_overrides, overrides, seed=42, sim_duration=None):
+    """
+    Compare a replayed scenario with a full SimPy run of the same scenario
+
+    Returns:
+        dict: first_stage (index of the first re-simulated stage), identical (bool),
+            replay_kpis, full_kpis
+    """
+    from stats_SimPy import summarize_kpis
+    from scenario_SimPy import simulate
+
+    merged = dict(base_overrides or {})
+    merged.update(overrides or {})
+    streams = StageStreams(base_overrides, seed, sim_duration)
+    manager, duration, first = streams.replay(merged)
+    full_manager, _ = simulate(merged, seed, sim_duration)
+    replay_kpis = summarize_kpis(manager, duration)
+    full_kpis = summarize_kpis(full_manager, duration)
+    return {
+        'first_stage': first,
+        'identical': replay_kpis == full_kpis,
+        'replay_kpis': replay_kpis,
+        'full_kpis': full_kpis,
+    }
+
+
+def run_incremental_sweep(points, base_overrides=None, seeds=(42,), output_path="sweep_results.csv",
+                          sim_duration=None):
+    """
+    Serial sweep over downstream parameters that replays one baseline per seed
+
+    Writes the same result table as sweep_SimPy.run_sweep (and skips rows
+    already present), e.g. for inspection staffing studies where the AMR and
+    CNC stages never need to be simulated again.
+
+    Returns:
+        IncrementalRunner: Runner with its replay/full-run counters
+    """
+    from sweep_SimPy import ResultTableWriter, _finished_keys, _point_hash, _result_row
+
+    runner = IncrementalRunner(base_overrides)
+    finished = _finished_keys(output_path + '.csv' if output_path.endswith('.parquet') else output_path)
+    writer = ResultTableWriter(output_path)
+    try:
+        for point in points:
+            merged = dict(runner.base_overrides)
+            merged.update(point)
+            for seed in seeds:
+                if (_point_hash(merged, sim_duration), seed) in finished:
+                    continue
+                writer.write(_result_row(merged, seed, runner.run(point, seed, sim_duration), sim_duration))
+    finally:
+        writer.close()
+    return runner
@@ -0,0 +1,246 @@
+import asyncio
+import itertools
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from config_SimPy import *
+from scenario_SimPy import SCENARIO_DEFAULTS, config_hash
+
+""" Local asyncio job service: prioritized, deduplicated and cancellable simulation runs """
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker to stop a cancelled run"""
+
+
+def _warm_worker():
+    """Pool initializer: import the model once so later jobs start without import cost"""
+    import simpy  # noqa: F401
+    import numpy  # noqa: F401
+    import main  # noqa: F401
+    import manager  # noqa: F401
+    import stats_SimPy  # noqa: F401
+
+
+def _report_progress(env, job_id, duration, progress_queue, cancel_flags, steps):
+    """SimPy process in the worker: send the sim-time fraction and stop on cancellation"""
+    interval = duration / steps
+    while True:
+        yield env.timeout(interval)
+        if cancel_flags.get(job_id):
+            raise JobCancelled(job_id)
+        progress_queue.put((job_id, min(1.0, env.now / duration)))
+
+
+def _run_job(job_id, overrides, seed, sim_duration, progress_queue, cancel_flags, steps):
+    """Worker entry point (top level so it can be pickled)"""
+    import simpy
+    import config_SimPy
+    from scenario_SimPy import simulate
+    from stats_SimPy import summarize_kpis
+
+    if cancel_flags.get(job_id):
+        raise JobCancelled(job_id)
+    duration = config_SimPy.SIM_TIME if sim_duration is None else sim_duration
+    env = simpy.Environment()
+    env.process(_report_progress(env, job_id, duration, progress_queue, cancel_flags, steps))
+    manager, duration = simulate(overrides, seed, duration, env=env)
+    return summarize_kpis(manager, duration)
+
+
+class Job:
+    """
+    One submitted simulation run
+
+    Attributes:
+        id (int): Job ID
+        key (tuple): (config hash, seed, horizon) used for deduplication
+        overrides (dict): Config overrides
+        seed (int): Random seed
+        sim_duration (float): Simulation horizon
+        priority (int): Lower runs first
+        state (str): queued, running, done, failed or cancelled
+        progress (float): Fraction of the horizon simulated
+        result (dict): KPI summary once done
+        error (BaseException): Failure cause
+    """
+
+    def __init__(self, job_id, key, overrides, seed, sim_duration, priority):
+        self.id = job_id
+        self.key = key
+        self.overrides = overrides
+        self.seed = seed
+        self.sim_duration = sim_duration
+        self.priority = priority
+        self.state = QUEUED
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.done = asyncio.get_running_loop().create_future()
+        self.progress_changed = asyncio.Event()
+
+
+class JobService:
+    """
+    Asyncio front end over a warm process pool
+
+    Jobs wait in a priority queue; `max_workers` dispatcher tasks hand them
+    to the pool. Submitting a scenario identical to one still queued or
+    running returns the existing job. Workers stream progress through a
+    multiprocessing queue that a reader thread forwards to the event loop,
+    and check a shared cancel flag at every progress step.
+
+    Use inside a running event loop:
+        async with JobService() as service:
+            job = await service.submit({'NUM_MACHINES_CNC': 3}, seed=1)
+            kpis = await service.result(job)
+    """
+
+    def __init__(self, max_workers=None, progress_steps=None):
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.progress_steps = JOB_PROGRESS_STEPS if progress_steps is None else progress_steps
+        self.jobs = {}
+        self.in_flight = {}
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.PriorityQueue()
+        self._mp = multiprocessing.Manager()
+        self.progress_queue = self._mp.Queue()
+        self.cancel_flags = self._mp.dict()
+        self.pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_warm_worker)
+        # Start every worker now so the first jobs do not pay the import cost
+        await asyncio.gather(*[self.loop.run_in_executor(self.pool, _warm_worker)
+                               for _ in range(self.max_workers)])
+        self._reader = threading.Thread(target=self._read_progress, daemon=True)
+        self._reader.start()
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.max_workers)]
+        return self
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.shutdown()
+
+    async def submit(self, overrides=None, seed=42, sim_duration=None, priority=0):
+        """Queue a scenario (or return the identical job already in flight)"""
+        overrides = dict(overrides or {})
+        settings = dict(SCENARIO_DEFAULTS)
+        settings.update(overrides)
+        if sim_duration is not None:
+            settings['SIM_TIME'] = sim_duration
+        key = (config_hash(settings), seed, sim_duration)
+        if key in self.in_flight:
+            return self.in_flight[key]
+
+        job = Job(next(self._ids), key, overrides, seed, sim_duration, priority)
+        self.jobs[job.id] = job
+        self.in_flight[key] = job
+        await self.queue.put((priority, next(self._seq), job))
+        return job
+
+    async def result(self, job):
+        """KPIs of a job (raises if it failed or was cancelled)"""
+        return await job.done
+
+    async def progress(self, job):
+        """Async iterator over progress updates of a job until it finishes"""
+        while not job.done.done():
+            job.progress_changed.clear()
+            yield job.progress
+            waiter = asyncio.ensure_future(job.progress_changed.wait())
+            await asyncio.wait([waiter, job.done], return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+        yield job.progress
+
+    def cancel(self, job):
+        """Cancel a queued job immediately or stop a running one at its next progress step"""
+        if job.done.done():
+            return False
+        self.cancel_flags[job.id] = True
+        if job.state == QUEUED:
+            self._finish(job, CANCELLED, error=JobCancelled(job.id))
+        return True
+
+    def _finish(self, job, state, result=None, error=None):
+        job.state = state
+        job.result = result
+        job.error = error
+        self.in_flight.pop(job.key, None)
+        self.cancel_flags.pop(job.id, None)
+        if not job.done.done():
+            if error is not None:
+                job.done.set_exception(error)
+                # Mark the exception retrieved for fire-and-forget jobs
+                job.done.exception()
+            else:
+                job.done.set_result(result)
+        job.progress_changed.set()
+
+    async def _dispatch(self):
+        while True:
+            _, _, job = await self.queue.get()
+            if job.state != QUEUED:
+                continue
+            job.state = RUNNING
+            try:
+                kpis = await self.loop.run_in_executor(
+                    self.pool, _run_job, job.id, job.overrides, job.seed, job.sim_duration,
+                    self.progress_queue, self.cancel_flags, self.progress_steps)
+            except JobCancelled as error:
+                self._finish(job, CANCELLED, error=error)
+            except Exception as error:
+                self._finish(job, FAILED, error=error)
+            else:
+                job.progress = 1.0
+                self._finish(job, DONE, result=kpis)
+
+    def _read_progress(self):
+        # Runs in a thread: blocking reads, updates applied on the event loop
+        while True:
+            try:
+                message = self.progress_queue.get()
+            except (EOFError, OSError):
+                return
+            if message is None:
+                return
+            self.loop.call_soon_threadsafe(self._apply_progress, *message)
+
+    def _apply_progress(self, job_id, fraction):
+        job = self.jobs.get(job_id)
+        if job is not None and job.state == RUNNING:
+            job.progress = fraction
+            job.progress_changed.set()
+
+    async def shutdown(self):
+        """Cancel pending jobs, stop the dispatchers and the worker pool"""
+        for job in list(self.in_flight.values()):
+            self.cancel(job)
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self.pool.shutdown(wait=True)
+        self.progress_queue.put(None)
+        self._reader.join()
+        self._mp.shutdown()
+
+
+async def _demo():
+    async with JobService(max_workers=2) as service:
+        jobs = [await service.submit({'NUM_MACHINES_CNC': n}, seed=42, priority=-n) for n in (1, 2, 3)]
+        duplicate = await service.submit({'NUM_MACHINES_CNC': 3}, seed=42)
+        print(f"Duplicate submission reuses job {duplicate.id}")
+        async for fraction in service.progress(jobs[-1]):
+            print(f"Job {jobs[-1].id}: {fraction:.0%}")
+        for job in jobs:
+            kpis = await service.result(job)
+            print(f"Job {job.id} ({job.overrides}): {kpis['num_items_completed']:.0f} items completed")
+
+
+if __name__ == "__main__":
+    asyncio.run(_demo())
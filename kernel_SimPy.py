@@ -0,0 +1,415 @@
+import heapq
+import random
+from config_SimPy import *
+from base_Customer import Order
+
+""" Lightweight heap-based event kernel (alternative backend to SimPy) """
+
+# Integer-coded event types
+EV_ORDER = 0  # Customer releases an order
+EV_SEIZE = 1  # Stage allocates idle processors to queued items
+EV_END = 2  # Processor finishes its batch
+
+
+class EventKernel:
+    """
+    Minimal discrete-event kernel: a heapq of (time, sequence, type, target)
+
+    There are no generator processes, condition events or resource request
+    objects; every event is a tuple dispatched to a callback by its integer
+    type. The sequence number keeps same-time events in scheduling order,
+    like SimPy's event ids.
+
+    Attributes:
+        now (float): Current simulation time
+        heap (list): Pending events
+        handlers (list): Callback per event type
+        num_events (int): Number of processed events
+    """
+
+    def __init__(self):
+        self.now = 0
+        self.heap = []
+        self.handlers = [None, None, None]
+        self.num_events = 0
+        self._seq = 0
+
+    def schedule(self, delay, event_type, target):
+        """Schedule an event `delay` after now"""
+        self._seq += 1
+        heapq.heappush(self.heap, (self.now + delay, self._seq, event_type, target))
+
+    def run(self, until):
+        """Process events strictly before `until` (like simpy.Environment.run)"""
+        heap = self.heap
+        handlers = self.handlers
+        pop = heapq.heappop
+        while heap and heap[0][0] < until:
+            time, _, event_type, target = pop(heap)
+            self.now = time
+            self.num_events += 1
+            handlers[event_type](target)
+        self.now = until
+
+
+class KernelQueue:
+    """Item queue with the queue-length record of ItemStore"""
+
+    def __init__(self, kernel, name):
+        self.kernel = kernel
+        self.name = name
+        self.items = []
+        self.queue_length_history = []
+
+    @property
+    def size(self):
+        return len(self.items)
+
+    @property
+    def is_empty(self):
+        return not self.items
+
+
+class KernelProcessor:
+    """
+    Processor slot of a kernel stage (stand-in for ProcessorResource)
+
+    Attributes:
+        processor_type (str): "Machine", "AMR" or "Worker"
+        id (int): Processor ID
+        name (str): Processor name
+        capacity (int): Items per batch
+        processing_time (float): Time per batch
+        busy (bool): True while a batch is in progress
+        current_items (list): Items of the batch in progress
+    """
+
+    def __init__(self, processor_type, id_processor, name, capacity, processing_time):
+        self.processor_type = processor_type
+        self.id = id_processor
+        self.name = name
+        self.capacity = capacity
+        self.processing_time = processing_time
+        self.busy = False
+        self.current_items = []
+        self.calendar = None
+
+
+class KernelStage:
+    """
+    One stage of the line with the seize/delay/release logic of Process
+
+    Exposes the attributes stats_SimPy reads from a Process (name_process,
+    item_store, processor_resources, completed_items, trip_history).
+    """
+
+    def __init__(self, kernel, name_process, processors, on_complete=None):
+        self.kernel = kernel
+        self.name_process = name_process
+        self.item_store = KernelQueue(kernel, f"{name_process}_ItemStore")
+        self.processor_resources = {f"{p.processor_type}_{p.id}": p for p in processors}
+        self.processors = processors
+        self.completed_items = []
+        self.trip_history = []
+        self.next_process = None
+        self.on_complete = on_complete
+        self.seize_pending = False
+        # Same rule as Process.is_zero_time_stage for a line without defects
+        self.zero_time_fast_path = (
+            FAST_PATH_ZERO_TIME
+            and bool(processors)
+            and all(p.processor_type != "AMR" and p.processing_time == 0 for p in processors)
+        )
+        self.inline_claims = (None, set())
+
+    def add_to_queue(self, item):
+        """Queue an item and request an allocation pass at the current time"""
+        now = self.kernel.now
+        item.time_waiting_start = now
+        if not hasattr(item, 'process_sequence'):
+            item.process_sequence = []
+        item.process_sequence.append(self.name_process)
+        item.waiting_history.append({
+            'process': self.name_process, 'start_time': now, 'end_time': None, 'duration': None})
+        if self.zero_time_fast_path and self.item_store.is_empty:
+            processor = self.idle_processor()
+            if processor is not None:
+                self.process_inline(processor, item)
+                return
+        self.item_store.items.append(item)
+        self.item_store.queue_length_history.append((now, len(self.item_store.items)))
+        self.request_seize()
+
+    def idle_processor(self):
+        """First idle processor not yet used inline at this instant (like Process.idle_processor)"""
+        claim_time, claimed = self.inline_claims
+        if claim_time != self.kernel.now:
+            claimed = set()
+            self.inline_claims = (self.kernel.now, claimed)
+        for processor in self.processors:
+            if processor.busy or processor in claimed:
+                continue
+            claimed.add(processor)
+            return processor
+        return None
+
+    def process_inline(self, processor, item):
+        """Zero-duration processing at enqueue time (like Process.process_inline)"""
+        now = self.kernel.now
+        self.item_store.queue_length_history.append((now, 1))
+        self.item_store.queue_length_history.append((now, 0))
+        self.open_steps(processor, [item])
+        self.close_steps([item])
+
+    def request_seize(self):
+        # Allocation runs after the events already queued for this instant
+        if not self.seize_pending:
+            self.seize_pending = True
+            self.kernel.schedule(0, EV_SEIZE, self)
+
+    def seize(self):
+        """Allocate idle processors to queued items (in registration order)"""
+        self.seize_pending = False
+        queue = self.item_store
+        now = self.kernel.now
+        for processor in self.processors:
+            if not queue.items:
+                break
+            if processor.busy:
+                continue
+            # One queue-length record per item taken (like ItemStore.get)
+            batch = []
+            while queue.items and len(batch) < processor.capacity:
+                batch.append(queue.items.pop(0))
+                queue.queue_length_history.append((now, len(queue.items)))
+            self.start(processor, batch)
+
+    def start(self, processor, items):
+        """Open the processing step of every item and schedule the batch end"""
+        now = self.kernel.now
+        processor.busy = True
+        processor.current_items = items
+        self.open_steps(processor, items)
+        if processor.processor_type == "AMR":
+            self.trip_history.append({
+                'resource_name': processor.name, 'start_time': now, 'num_items': len(items),
+                'capacity': processor.capacity, 'load_factor': len(items) / processor.capacity})
+        self.kernel.schedule(processor.processing_time, EV_END, processor)
+
+    def open_steps(self, processor, items):
+        """Close the waiting steps and open the processing steps of a batch"""
+        now = self.kernel.now
+        for item in items:
+            item.time_waiting_end = now
+            for step in item.waiting_history:
+                if step['process'] == self.name_process and step['end_time'] is None:
+                    step['end_time'] = now
+                    step['duration'] = now - step['start_time']
+            item.workstation[processor.processor_type] = processor.id
+            item.time_processing_start = now
+            item.processing_history.append({
+                'process': self.name_process,
+                'resource_type': processor.processor_type,
+                'resource_id': processor.id,
+                'resource_name': processor.name,
+                'start_time': now,
+                'end_time': None,
+                'duration': None
+            })
+
+    def end(self, processor):
+        """Finish the batch, hand items on and release the processor"""
+        self.close_steps(processor.current_items)
+        processor.busy = False
+        processor.current_items = []
+        self.request_seize()
+
+    def close_steps(self, items):
+        """Apply the stage logic, close the processing steps and hand items on"""
+        now = self.kernel.now
+        if self.on_complete is not None:
+            self.on_complete(items)
+        for item in items:
+            item.time_processing_end = now
+            for step in item.processing_history:
+                if step['process'] == self.name_process and step['end_time'] is None:
+                    step['end_time'] = now
+                    step['duration'] = now - step['start_time']
+            self.completed_items.append(item)
+            if self.next_process is not None:
+                self.next_process.add_to_queue(item)
+
+
+class KernelLine:
+    """
+    The Manager topology (STC AMR -> Cutting -> CTI AMR -> Inspect) on the event kernel
+
+    Uses the same Order/Item classes, the same random draws in the same order
+    and the same history records as the SimPy Manager, so traces of the two
+    backends can be compared item by item. The line has no rework loop
+    (see kernel_qualifies).
+
+    Attributes:
+        kernel (EventKernel): Event kernel
+        processed_orders (list): Released orders
+        processed_items (list): Released items
+        stage_of (dict): {processor: stage} lookup for EV_END dispatch
+    """
+
+    def __init__(self, kernel, id_customer=1):
+        self.kernel = kernel
+        self.id_customer = id_customer
+        self.order_counter = 1
+        self.processed_orders = []
+        self.processed_items = []
+
+        self.proc_transport_stc = KernelStage(kernel, "Proc_AMR_STC", [
+            KernelProcessor("AMR", i + 1, f"STC_AMR_LOT{i + 1}", CAPACITY_MACHINE_AMR, STC_PROC_TIME_TRANSIT)
+            for i in range(NUM_STC_MACHINES_AMR)])
+        self.proc_cutting = KernelStage(kernel, "Proc_Cutting", [
+            KernelProcessor("Machine", i + 1, f"CNC_{i + 1}", CAPACICTY_MACHINE_CUTTING, PROC_TIME_CUTTING)
+            for i in range(NUM_MACHINES_CNC)])
+        self.proc_transport_cti = KernelStage(kernel, "Proc_AMR_CTI", [
+            KernelProcessor("AMR", i + 1, f"CTI_AMR_{i + 1}", CAPACITY_MACHINE_AMR, CTI_PROC_TIME_TRANSIT)
+            for i in range(NUM_CTI_MACHINES_AMR)])
+        self.proc_inspect = KernelStage(kernel, "Proc_Inspect", [
+            KernelProcessor("Worker", i + 1, f"Inspector_{i + 1}", 1, PROC_TIME_INSPECT)
+            for i in range(NUM_WORKERS_IN_INSPECT)], on_complete=self.inspect)
+
+        self.proc_transport_stc.next_process = self.proc_cutting
+        self.proc_cutting.next_process = self.proc_transport_cti
+        self.proc_transport_cti.next_process = self.proc_inspect
+
+        self.stage_of = {}
+        for stage in self.get_processes().values():
+            for processor in stage.processors:
+                self.stage_of[processor] = stage
+
+        kernel.handlers[EV_ORDER] = self.create_order
+        kernel.handlers[EV_SEIZE] = KernelStage.seize
+        kernel.handlers[EV_END] = self.end_batch
+        kernel.schedule(0, EV_ORDER, None)
+
+    def get_processes(self):
+        """Stages as a dictionary for statistics collection (same keys as Manager)"""
+        return {
+            'transport_stc': self.proc_transport_stc,
+            'cutting': self.proc_cutting,
+            'transport_cti': self.proc_transport_cti,
+            'inspect': self.proc_inspect
+        }
+
+    def create_order(self, _):
+        """Customer order release (same draws as Customer.create_order)"""
+        order_supplier = SUPPLY_TYPE_DECISION()
+        order = Order(self.id_customer, self.order_counter, order_supplier)
+        self.order_counter += 1
+        order.time_start = self.kernel.now
+        self.processed_items += order.list_items
+        self.processed_orders.append(order)
+        for item in order.list_items:
+            self.proc_transport_stc.add_to_queue(item)
+        self.kernel.schedule(CUST_ORDER_CYCLE, EV_ORDER, None)
+
+    def end_batch(self, processor):
+        self.stage_of[processor].end(processor)
+
+    def inspect(self, items):
+        """Inspection: without defects every inspected item is complete"""
+        for item in items:
+            item.is_completed = True
+
+
+def kernel_qualifies():
+    """
+    True if the current config only uses features the event kernel implements
+
+    The kernel does not create the intermediate events of Process (store gets,
+    requests, sub-processes), so it cannot reproduce how SimPy orders two
+    arrival chains that reach a stage at the same instant. Those arise from
+    rework (a defective item re-enters Cutting alongside other arrivals and
+    releases) and from a zero-duration stage feeding another one (a second
+    batch leaves at the same instant as the first), so both are excluded.
+    A zero-duration Inspect, the last stage, is supported.
+    """
+    return (
+        DEFECT_RATE_PROC_BUILD == 0
+        and STC_PROC_TIME_TRANSIT > 0
+        and PROC_TIME_CUTTING > 0
+        and CTI_PROC_TIME_TRANSIT > 0
+        and not FAILURE_ENABLED
+        and not SHIFT_CALENDARS_ENABLED
+        and not PROC_TIME_DISTRIBUTIONS
+        and AMR_BATCH_POLICY.upper() == "IMMEDIATE"
+        and not AGGREGATE_LOT_ENTITIES
+        and not CUSTOMER_POPULATION
+        and ROUTING_GRAPH is None
+    )
+
+
+def run_kernel(sim_duration=SIM_TIME):
+    """
+    Run the line on the event kernel
+
+    Returns:
+        tuple[KernelLine, EventKernel]: Finished line and kernel
+    """
+    if not kernel_qualifies():
+        raise ValueError("Scenario uses features the event kernel does not implement")
+    kernel = EventKernel()
+    line = KernelLine(kernel)
+    kernel.run(sim_duration)
+    return line, kernel
+
+
+def item_trace(orders):
+    """Comparable trace: per item (order, item, completed, waiting steps, processing steps)"""
+    return [
+        (item.id_order, item.id_item, item.is_completed,
+         [(s['process'], s['start_time'], s['end_time']) for s in item.waiting_history],
+         [(s['process'], s['resource_name'], s['start_time'], s['end_time']) for s in item.processing_history])
+        for order in orders for item in order.list_items
+    ]
+
+
+def stage_trace(line):
+    """Comparable trace: per stage (queue-length records, trip records)"""
+    return {
+        key: (list(stage.item_store.queue_length_history), list(stage.trip_history))
+        for key, stage in line.get_processes().items()
+    }
+
+
+def compare_with_simpy(overrides=None, seed=42, sim_duration=None):
+    """
+    Run both backends with the same seed and compare their item and stage traces
+
+    Returns:
+        dict: identical (bool), num_items, first_difference (first differing item,
+            or the first differing stage's records)
+    """
+    from scenario_SimPy import simulate, apply_config, SCENARIO_DEFAULTS
+    import config_SimPy
+
+    manager, duration = simulate(overrides, seed, sim_duration)
+    settings = dict(SCENARIO_DEFAULTS)
+    settings.update(overrides or {})
+    with apply_config(settings):
+        random.seed(seed)
+        line, _ = run_kernel(config_SimPy.SIM_TIME if sim_duration is None else sim_duration)
+
+    simpy_trace = item_trace(manager.processed_orders)
+    kernel_trace = item_trace(line.processed_orders)
+    simpy_stages = stage_trace(manager)
+    kernel_stages = stage_trace(line)
+    first_difference = next(
+        ((a, b) for a, b in zip(simpy_trace, kernel_trace) if a != b), None)
+    if first_difference is None:
+        first_difference = next(
+            ((simpy_stages[key], kernel_stages[key]) for key in simpy_stages
+             if simpy_stages[key] != kernel_stages[key]), None)
+    return {
+        'identical': simpy_trace == kernel_trace and simpy_stages == kernel_stages,
+        'num_items': len(simpy_trace),
+        'first_difference': first_difference,
+    }
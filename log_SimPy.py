@@ -2,6 +2,7 @@ import pandas as pd
 import plotly.express as px
 import plotly.figure_factory as ff
 import plotly.graph_objects as go
+from collections import deque
 from datetime import datetime, timedelta
 import numpy as np
 from config_SimPy import *
@@ -11,6 +12,9 @@ class Logger:
         # Logger는 env만 저장하고 manager에 의존하지 않음
         self.env = env
         self.event_logs = []  # 이벤트 로그 저장소
+        if RETENTION_ENABLED:
+            # Keep only the most recent entries on long runs
+            self.event_logs = deque(maxlen=EVENT_LOG_MAX_ENTRIES)
 
     def log_event(self, event_type, message):
         """Log an event with a timestamp"""
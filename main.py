@@ -1,19 +1,33 @@
 # main.py
 import simpy
 import random
-from base_Customer import Customer
+from base_Customer import create_customers
 from manager import Manager
 from log_SimPy import Logger
 from config_SimPy import *
 from base_Store import ItemStore
+from stats_SimPy import analyze_manager, print_output_analysis
+from tracedb_SimPy import export_trace
+from telemetry_SimPy import TelemetryPublisher
+from memory_SimPy import MemoryAccountant, print_memory_report
 
 
-def run_simulation(sim_duration=SIM_TIME):
-    """Run the manufacturing simulation"""
+def run_simulation(sim_duration=SIM_TIME, env=None):
+    """
+    Run the manufacturing simulation
+
+    Args:
+        sim_duration (float): Simulation horizon (unit: minutes)
+        env (simpy.Environment): Environment to run in (a new one by default)
+    """
     print("================ Manufacturing Process Simulation ================")
 
     # Setup simulation environment
-    env = simpy.Environment()
+    if env is None:
+        env = simpy.Environment()
+
+    # Memory accounting starts first so tracemalloc sees the model being built
+    memory = MemoryAccountant(env) if MEMORY_ACCOUNTING_ENABLED else None
 
     # Create logger with env
     logger = Logger(env)
@@ -21,8 +35,18 @@ def run_simulation(sim_duration=SIM_TIME):
     # Create manager and provide logger
     manager = Manager(env, logger)
 
-    # Create customer to generate orders
-    Customer(env, manager, logger)
+    # Pre-sample machine breakdowns and maintenance
+    if FAILURE_ENABLED:
+        manager.setup_failures(sim_duration)
+
+    # Create customer(s) to generate orders
+    create_customers(env, manager, logger)
+
+    if memory is not None:
+        memory.watch(manager, logger)
+
+    # Live telemetry to a local viewer
+    telemetry = TelemetryPublisher(env, manager) if TELEMETRY_ENABLED else None
 
     # Run simulation
     print("\nStarting simulation...")
@@ -30,7 +54,30 @@ def run_simulation(sim_duration=SIM_TIME):
 
     # Run simulation
     env.run(until=sim_duration)
-    
+
+    if telemetry is not None:
+        telemetry.close()
+
+    # Write the last archive chunks of retired orders
+    if manager.retention is not None:
+        manager.retention.close()
+
+    # Final memory checkpoint and JSON report
+    if memory is not None:
+        manager.memory_report = memory.close()
+        print_memory_report(manager.memory_report)
+
+    # Indexed trace database for post-run queries
+    if TRACE_DB_EXPORT_ENABLED:
+        export_trace(manager, TRACE_DB_PATH, sim_duration).close()
+
+    # Output analysis (warm-up deletion + batch means)
+    if OUTPUT_ANALYSIS_ENABLED:
+        manager.output_analysis = analyze_manager(manager, sim_duration)
+        print_output_analysis(manager.output_analysis)
+
+    return manager
+
 if __name__ == "__main__":
     # Set random seed for reproducibility
     random.seed(42)
@@ -2,6 +2,9 @@ from config_SimPy import *
 from specialized_Process import *
 from base_Customer import OrderReceiver
 from base_Store import *
+from failure_SimPy import FailureManager
+from retention_SimPy import RetentionPolicy
+from routing_SimPy import build_routing
 import math
 
 class Manager(OrderReceiver):
@@ -17,6 +20,10 @@ class Manager(OrderReceiver):
         suppliers_lot (list[ItemSupplier]): LOT-type item suppliers
         suppliers_pallet (list[ItemSupplier]): PALLET-type item suppliers
         suppliers (list[ItemSupplier]): All item suppliers combined
+        failure_manager (FailureManager): Breakdown/PM model (None when disabled)
+        retention (RetentionPolicy): Retires completed orders from memory (None when disabled)
+        routing (RoutingTable): Compiled routing graph of the stages
+        stages (dict): {stage key: Process} in routing-graph order
     """
     
     def __init__(self, env, logger=None):
@@ -31,6 +38,9 @@ class Manager(OrderReceiver):
         
         # Tracking processed items
         self.processed_items = []
+
+        # Breakdown model (created by setup_failures)
+        self.failure_manager = None
         
         # —————————— Create Item Suppliers ——————————
         # 1) Create LOT-type item suppliers
@@ -50,32 +60,44 @@ class Manager(OrderReceiver):
 
         # When calling setup_processes, the manager (self) itself is also passed as an argument
         self.setup_processes(manager=self)
+
+        # Bounded-memory retention: processes report to the accumulators instead of keeping lists
+        self.retention = None
+        if RETENTION_ENABLED:
+            self.retention = RetentionPolicy(list(self.get_processes().values()), RETENTION_ARCHIVE_PATH)
+            for process in self.get_processes().values():
+                process.retention = self.retention
         
+    @property
+    def item_pool(self):
+        """Retired Item objects of this manager's retention policy (None when retention is disabled)"""
+        return None if self.retention is None else self.retention.item_pool
+
     def setup_processes(self, manager=None):
-        """ Create and connect all manufacturing processes """
-        # Create processes
-        
-        # 1) Supply->CNC Transport
-        self.proc_transport_stc = Proc_Amr_STC(self.env, self.logger)
-        
-        # 2) CNC manufacturing
-        self.proc_cutting = Proc_Cutting(self.env, self.logger)
-        
-        # 3) CNC -> Inspection Transport
-        self.proc_transport_cti = Proc_Amr_CTI(self.env, self.logger)
-        
-        # 4) Inspection
-        self.proc_inspect = Proc_Inspect(self.env, manager, self.logger)
-        
-        # Connect processes
-        self.proc_transport_stc.connect_to_next_process(self.proc_cutting)
-        self.proc_cutting.connect_to_next_process(self.proc_transport_cti)
-        self.proc_transport_cti.connect_to_next_process(self.proc_inspect)
+        """ Create the processes of the routing graph and compile its routing table """
+        # Default graph: Supply->CNC Transport → CNC manufacturing → CNC->Inspection Transport → Inspection
+        self.routing, self.stages = build_routing(self.env, manager, self.logger, ROUTING_GRAPH)
+
+        # First stage of each type (the only one in the default line)
+        processes = list(self.stages.values())
+        self.proc_transport_stc = next((p for p in processes if isinstance(p, Proc_Amr_STC)), None)
+        self.proc_cutting = next((p for p in processes if isinstance(p, Proc_Cutting)), None)
+        self.proc_transport_cti = next((p for p in processes if isinstance(p, Proc_Amr_CTI)), None)
+        self.proc_inspect = next((p for p in processes if isinstance(p, Proc_Inspect)), None)
         
         if self.logger:
-            self.logger.log_event(
-                "Manager", "Manufacturing processes created and connected: AMR → Cutting → AMR → Inspect")
+            if ROUTING_GRAPH is None:
+                self.logger.log_event(
+                    "Manager", "Manufacturing processes created and connected: AMR → Cutting → AMR → Inspect")
+            else:
+                self.logger.log_event(
+                    "Manager", f"Routing graph compiled: {len(self.stages)} stages, {len(self.routing.route_ids)} routes")
             
+    def setup_failures(self, horizon):
+        """Pre-sample failure/PM schedules for all CNCs and AMRs over the horizon"""
+        self.failure_manager = FailureManager(
+            self.env, self.get_processes().values(), horizon, self.logger)
+
     def receive_order(self, order):
         """Process incoming order from Customer"""
         if self.logger:
@@ -85,11 +107,15 @@ class Manager(OrderReceiver):
         # Mark order start time and record number of items and total items
         order.time_start = self.env.now
 
-        # Add items to processed list
-        self.processed_items += order.list_items
+        if self.retention is not None:
+            # Only open orders are kept; completed ones are retired by the policy
+            self.retention.release_order(order)
+        else:
+            # Add items to processed list
+            self.processed_items += order.list_items
 
-        # Add order to processed orders list
-        self.processed_orders.append(order)
+            # Add order to processed orders list
+            self.processed_orders.append(order)
 
         # Convert order to jobs based on policy
         self.allocate_items_for_proc_transport_stc(order)
@@ -97,31 +123,30 @@ class Manager(OrderReceiver):
         return order
     
     def allocate_items_for_proc_transport_stc(self, order):
-        "Allocate items in CNC queue"
+        "Allocate items to the first stage of their route"
         for item in order.list_items:
-            self.proc_transport_stc.add_to_queue(item)
+            first_process = self.routing.entry(item)
+            first_process.add_to_queue(item)
             if self.logger:
                 self.logger.log_event(
-                    "Manager", f"Send item {item.id_item} of order {item.id_order} → STC_AMR"
+                    "Manager", f"Send item {item.id_item} of order {item.id_order} → {first_process.name_process}"
                 )
                 
     def allocate_item_for_proc_defect(self, item):
         """Re-allocate defective item in CNC queue"""
         item.is_reprocess = True
         
+        rework_process = self.routing.rework_process(item)
         if self.logger:
             self.logger.log_event(
                 "Manager",
-                f"Re-allocating defective item {item.id_item} of order {item.id_order} back to Proc_Cutting"
+                f"Re-allocating defective item {item.id_item} of order {item.id_order} back to {rework_process.name_process}"
             )
         # 다시 Cutting 큐에 넣기
-        self.proc_cutting.add_to_queue(item)        
+        rework_process.add_to_queue(item)        
     def get_processes(self):
         """Return processes as a dictionary for statistics collection"""
-        return {
-            'cutting': self.proc_cutting,
-            'inspect': self.proc_inspect
-        }
+        return dict(self.stages)
         
     def collect_statistics(self):
         """Collect basic statistic from processes"""
@@ -0,0 +1,295 @@
+import json
+import os
+import sys
+import time
+import tracemalloc
+from config_SimPy import *
+
+""" Opt-in memory accounting: per-subsystem bytes and object counts at sim-time checkpoints """
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Model source files whose tracemalloc allocations are attributed to each subsystem
+SUBSYSTEM_FILES = {
+    "suppliers": ["base_Store.py"],
+    "items": ["base_Customer.py", "base_Process.py"],
+    "event_log": ["log_SimPy.py"],
+    "manager": ["manager.py"],
+    "retention": ["retention_SimPy.py"],
+}
+
+
+def _entry_bytes(entry):
+    """
+    Size of a record (tuple, list or dict) and its float fields
+
+    Strings (process and resource names) and small ints are shared between
+    records, so they are not charged to each record.
+    """
+    values = entry.values() if isinstance(entry, dict) else entry
+    return sys.getsizeof(entry) + sum(sys.getsizeof(v) for v in values if isinstance(v, float))
+
+
+def _sum_sampled(seq, sizer, sample_size=None):
+    """Sum of sizer over a sequence, extrapolated from evenly spaced samples when it is long"""
+    sample_size = MEMORY_SAMPLE_SIZE if sample_size is None else sample_size
+    n = len(seq)
+    if n <= sample_size:
+        return sum(sizer(entry) for entry in seq)
+    step = n / sample_size
+    sample = [seq[int(k * step)] for k in range(sample_size)]
+    return int(sum(sizer(entry) for entry in sample) * n / sample_size)
+
+
+def _item_bytes(item):
+    """Item object, its attribute dict and its history records"""
+    size = sys.getsizeof(item) + sys.getsizeof(item.__dict__)
+    for name in ('processing_history', 'waiting_history'):
+        history = getattr(item, name, None)
+        if history:
+            size += sys.getsizeof(history) + sum(_entry_bytes(step) for step in history)
+    sequence = getattr(item, 'process_sequence', None)
+    if sequence is not None:
+        size += sys.getsizeof(sequence)
+    return size
+
+
+def _item_objects(item):
+    """Objects owned by one item (the item, its attribute dict, history lists and records)"""
+    count = 2
+    for name in ('processing_history', 'waiting_history', 'process_sequence'):
+        history = getattr(item, name, None)
+        if history is not None:
+            count += 1 + (len(history) if name != 'process_sequence' else 0)
+    return count
+
+
+def _live_items(manager):
+    retention = getattr(manager, 'retention', None)
+    if retention is not None:
+        # Open orders are kept as [order, units left]
+        orders = [entry[0] for entry in retention.open_orders.values()]
+    else:
+        orders = manager.processed_orders
+    return [item for order in orders for item in order.list_items]
+
+
+def container_counters(manager, logger=None):
+    """
+    Object counts and estimated bytes of the containers that grow with the run
+
+    Returns:
+        dict: {subsystem: {'objects': int, 'bytes': int, ...details}}
+    """
+    counters = {}
+
+    # Raw-material tokens of the suppliers (one list slot per token)
+    tokens = sum(len(supplier.items) for supplier in manager.suppliers)
+    counters['suppliers'] = {
+        'objects': tokens,
+        'bytes': sum(sys.getsizeof(supplier.items) for supplier in manager.suppliers),
+    }
+
+    processes = list(manager.get_processes().values())
+    histories = [process.item_store.queue_length_history for process in processes]
+    counters['queue_length_history'] = {
+        'objects': sum(len(history) for history in histories),
+        'bytes': sum(sys.getsizeof(history) + _sum_sampled(history, _entry_bytes) for history in histories),
+        'per_process': {process.name_process: len(process.item_store.queue_length_history)
+                        for process in processes},
+    }
+
+    items = _live_items(manager)
+    counters['item_histories'] = {
+        'objects': _sum_sampled(items, _item_objects),
+        'bytes': _sum_sampled(items, _item_bytes),
+        'items': len(items),
+        'pooled_items': len(manager.item_pool or ()),
+    }
+
+    completed = sum(len(process.completed_items) for process in processes)
+    trips = [process.trip_history for process in processes]
+    counters['process_records'] = {
+        'objects': completed + sum(len(trip) for trip in trips),
+        'bytes': sum(sys.getsizeof(process.completed_items) for process in processes)
+        + sum(sys.getsizeof(trip) + _sum_sampled(trip, _entry_bytes) for trip in trips),
+        'completed_items': completed,
+        'trips': sum(len(trip) for trip in trips),
+    }
+
+    counters['manager_lists'] = {
+        'objects': len(manager.processed_items) + len(manager.processed_orders) + len(manager.completed_orders),
+        'bytes': sys.getsizeof(manager.processed_items) + sys.getsizeof(manager.processed_orders)
+        + sys.getsizeof(manager.completed_orders),
+        'processed_items': len(manager.processed_items),
+        'processed_orders': len(manager.processed_orders),
+    }
+
+    if logger is not None:
+        logs = logger.event_logs
+        counters['event_log'] = {
+            'objects': len(logs),
+            'bytes': sys.getsizeof(logs) + _sum_sampled(
+                logs, lambda entry: _entry_bytes(entry) + sys.getsizeof(entry[2])),
+        }
+    return counters
+
+
+def tracemalloc_summary(snapshot):
+    """Traced bytes and blocks per model source file and per subsystem"""
+    by_file = {}
+    other_bytes = other_blocks = 0
+    for stat in snapshot.statistics('filename'):
+        filename = stat.traceback[0].filename
+        if os.path.dirname(os.path.abspath(filename)) == MODEL_DIR:
+            by_file[os.path.basename(filename)] = {'bytes': stat.size, 'blocks': stat.count}
+        else:
+            other_bytes += stat.size
+            other_blocks += stat.count
+    by_subsystem = {}
+    for subsystem, files in SUBSYSTEM_FILES.items():
+        stats = [by_file[name] for name in files if name in by_file]
+        by_subsystem[subsystem] = {'bytes': sum(s['bytes'] for s in stats),
+                                   'blocks': sum(s['blocks'] for s in stats)}
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        'current_bytes': current,
+        'peak_bytes': peak,
+        'by_file': by_file,
+        'by_subsystem': by_subsystem,
+        'outside_model': {'bytes': other_bytes, 'blocks': other_blocks},
+    }
+
+
+class MemoryAccountant:
+    """
+    Collects memory checkpoints during run_simulation
+
+    Created before the Manager so tracemalloc sees the model being built;
+    `watch` then schedules checkpoints every MEMORY_CHECKPOINT_INTERVAL
+    sim-minutes and at the times in MEMORY_CHECKPOINTS. Each checkpoint
+    holds the container counters and, when tracing, a tracemalloc summary.
+
+    Attributes:
+        env (simpy.Environment): Simulation environment
+        manager (Manager): Watched manager (set by watch)
+        logger (Logger): Watched logger (set by watch)
+        checkpoints (list): Recorded checkpoints in time order
+        path (str): JSON report file (None = not written)
+        trace (bool): tracemalloc snapshots enabled
+    """
+
+    def __init__(self, env, path=None, trace=None):
+        self.env = env
+        self.path = MEMORY_REPORT_PATH if path is None else path
+        self.trace = MEMORY_TRACEMALLOC if trace is None else trace
+        self.manager = None
+        self.logger = None
+        self.checkpoints = []
+        self.wall_start = time.perf_counter()
+        self._started_tracing = False
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start(MEMORY_TRACEMALLOC_FRAMES)
+            self._started_tracing = True
+
+    def watch(self, manager, logger=None, interval=None, times=None):
+        """Start checkpointing a manager (and its logger)"""
+        self.manager = manager
+        self.logger = logger
+        interval = MEMORY_CHECKPOINT_INTERVAL if interval is None else interval
+        times = set(MEMORY_CHECKPOINTS if times is None else times)
+        self.env.process(self._checkpoint_loop(interval, sorted(times)))
+        return self
+
+    def _checkpoint_loop(self, interval, times):
+        next_interval = interval if interval else None
+        while True:
+            upcoming = [t for t in (times[0] if times else None, next_interval) if t is not None]
+            if not upcoming:
+                return
+            when = min(upcoming)
+            if when > self.env.now:
+                yield self.env.timeout(when - self.env.now)
+            while times and times[0] <= self.env.now:
+                times.pop(0)
+            if next_interval is not None and next_interval <= self.env.now:
+                next_interval += interval
+            self.checkpoint()
+
+    def checkpoint(self, label=None):
+        """Record one checkpoint now"""
+        record = {
+            'label': f"t={self.env.now:g}" if label is None else label,
+            'sim_time': self.env.now,
+            'wall_time': round(time.perf_counter() - self.wall_start, 3),
+            'subsystems': container_counters(self.manager, self.logger),
+        }
+        if self.trace and tracemalloc.is_tracing():
+            record['tracemalloc'] = tracemalloc_summary(tracemalloc.take_snapshot())
+        self.checkpoints.append(record)
+        return record
+
+    def report(self):
+        return {'sim_time': self.env.now, 'checkpoints': self.checkpoints}
+
+    def close(self):
+        """Final checkpoint, JSON report and tracemalloc shutdown"""
+        self.checkpoint("end")
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        report = self.report()
+        if self.path:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'w') as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+        return report
+
+
+def diff_reports(old, new, label="end"):
+    """
+    Per-subsystem change between two reports (paths or loaded dicts) at one checkpoint label
+
+    Returns:
+        dict: {subsystem: {'bytes': (old, new, delta), 'objects': (old, new, delta)}}
+    """
+    reports = []
+    for report in (old, new):
+        if isinstance(report, str):
+            with open(report) as f:
+                report = json.load(f)
+        checkpoint = next((c for c in report['checkpoints'] if c['label'] == label), None)
+        if checkpoint is None:
+            raise KeyError(f"No checkpoint labeled {label!r}")
+        reports.append(checkpoint['subsystems'])
+    diff = {}
+    for subsystem in sorted(set(reports[0]) | set(reports[1])):
+        a = reports[0].get(subsystem, {})
+        b = reports[1].get(subsystem, {})
+        diff[subsystem] = {key: (a.get(key, 0), b.get(key, 0), b.get(key, 0) - a.get(key, 0))
+                           for key in ('bytes', 'objects')}
+    return diff
+
+
+def print_memory_report(report):
+    """Table of the last checkpoint, largest subsystem first"""
+    last = report['checkpoints'][-1]
+    print(f"\n================ Memory Accounting ({last['label']}) ================")
+    subsystems = sorted(last['subsystems'].items(), key=lambda kv: -kv[1]['bytes'])
+    for name, counters in subsystems:
+        print(f"{name:<22} {counters['bytes'] / 1e6:>10.2f} MB {counters['objects']:>12} objects")
+    if 'tracemalloc' in last:
+        traced = last['tracemalloc']
+        print(f"{'traced (current/peak)':<22} {traced['current_bytes'] / 1e6:>10.2f} MB "
+              f"{traced['peak_bytes'] / 1e6:>10.2f} MB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python memory_SimPy.py OLD_REPORT.json NEW_REPORT.json")
+        sys.exit(1)
+    for name, values in diff_reports(sys.argv[1], sys.argv[2]).items():
+        old_bytes, new_bytes, delta = values['bytes']
+        print(f"{name:<22} {old_bytes:>12} -> {new_bytes:>12} bytes ({delta:+d}), "
+              f"objects {values['objects'][2]:+d}")
@@ -0,0 +1,368 @@
+import csv
+import math
+import os
+import warnings
+import numpy as np
+from config_SimPy import *
+from sweep_SimPy import latin_hypercube, run_sweep
+
+""" Surrogate metamodels fitted on sweep results: instant what-if predictions and active learning """
+
+# Inputs of the surrogate (resource counts, order cycle and cutting time)
+SURROGATE_PARAMETERS = [
+    'NUM_MACHINES_CNC',
+    'NUM_STC_MACHINES_AMR',
+    'NUM_CTI_MACHINES_AMR',
+    'NUM_WORKERS_IN_INSPECT',
+    'CUST_ORDER_CYCLE',
+    'PROC_TIME_CUTTING',
+]
+
+
+def load_results(path, target, parameters=None):
+    """
+    Training data from a sweep result table (CSV or Parquet)
+
+    Parameters missing from a row take their config default; rows without a
+    finite target value are skipped.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (inputs of shape (n, d), target values)
+    """
+    import config_SimPy
+
+    parameters = SURROGATE_PARAMETERS if parameters is None else parameters
+    if path.endswith('.parquet'):
+        import pandas as pd
+        rows = pd.read_parquet(path).to_dict('records')
+    else:
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+    X, y = [], []
+    for row in rows:
+        try:
+            value = float(row.get(target))
+        except (TypeError, ValueError):
+            continue
+        if not math.isfinite(value):
+            continue
+        point = []
+        for name in parameters:
+            raw = row.get(name)
+            point.append(float(getattr(config_SimPy, name) if raw in (None, '') else raw))
+        X.append(point)
+        y.append(value)
+    return np.array(X, dtype=float).reshape(-1, len(parameters)), np.array(y, dtype=float)
+
+
+class Surrogate:
+    """
+    Common interface of the metamodels
+
+    Inputs are scaled to [0, 1] with the bounds of the training data and the
+    target is standardized, so hyperparameters are comparable across KPIs.
+    Queries outside those bounds are extrapolations and raise a RuntimeWarning.
+
+    Attributes:
+        parameters (list): Input config names, in column order
+        target (str): Predicted KPI
+        low (np.ndarray): Smallest training value per input
+        high (np.ndarray): Largest training value per input
+        X (np.ndarray): Training inputs (scaled)
+        y (np.ndarray): Training targets (standardized)
+    """
+
+    def __init__(self, parameters=None, target='throughput_per_day'):
+        self.parameters = list(SURROGATE_PARAMETERS if parameters is None else parameters)
+        self.target = target
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if len(y) < 2:
+            raise ValueError("A surrogate needs at least two training points")
+        self.low = X.min(axis=0)
+        self.high = X.max(axis=0)
+        span = self.high - self.low
+        self.span = np.where(span > 0, span, 1.0)
+        self.y_mean = float(y.mean())
+        self.y_std = float(y.std()) or 1.0
+        self.X = self._scale(X)
+        self.y = (y - self.y_mean) / self.y_std
+        self._fit()
+        return self
+
+    def _scale(self, X):
+        return (np.asarray(X, dtype=float) - self.low) / self.span
+
+    def _vector(self, overrides):
+        import config_SimPy
+        return [overrides.get(name, getattr(config_SimPy, name)) for name in self.parameters]
+
+    def out_of_bounds(self, X):
+        """Names of the inputs outside the training bounds in any row of raw inputs X"""
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        outside = ((X < self.low) | (X > self.high)).any(axis=0)
+        return [name for name, flag in zip(self.parameters, outside) if flag]
+
+    def _check_bounds(self, X):
+        names = self.out_of_bounds(X)
+        if names:
+            bounds = ', '.join(f"{name} in [{self.low[k]:g}, {self.high[k]:g}]"
+                               for k, name in enumerate(self.parameters) if name in names)
+            warnings.warn(f"Extrapolating the {self.target} surrogate: trained on {bounds}",
+                          RuntimeWarning, stacklevel=3)
+
+    def predict(self, overrides):
+        """
+        Prediction for one scenario
+
+        Args:
+            overrides (dict): {NAME: value}; missing parameters take their config default
+
+        Returns:
+            tuple: (mean, standard deviation) of the target KPI
+        """
+        x = np.array(self._vector(overrides), dtype=float)
+        self._check_bounds(x)
+        mean, var = self._predict_one(self._scale(x))
+        return self.y_mean + self.y_std * mean, self.y_std * math.sqrt(max(var, 0.0))
+
+    def predict_array(self, X):
+        """Vectorized prediction for raw inputs of shape (m, d) -> (means, stds)"""
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        self._check_bounds(X)
+        mean, var = self._predict(self._scale(X))
+        return self.y_mean + self.y_std * mean, self.y_std * np.sqrt(np.clip(var, 0.0, None))
+
+    def loo_rmse(self):
+        """Leave-one-out root mean squared error (target units)"""
+        residuals = self._loo_residuals()
+        return float(self.y_std * np.sqrt(np.mean(residuals ** 2)))
+
+
+class GaussianProcessSurrogate(Surrogate):
+    """
+    Gaussian process with an anisotropic squared-exponential kernel
+
+    Length scales and the relative noise are chosen by random search over the
+    profiled log marginal likelihood (the signal variance has a closed form).
+    The inverse covariance is cached so one prediction is a few vector
+    products over the training set.
+    """
+
+    def __init__(self, parameters=None, target='throughput_per_day', hyper_samples=None, seed=0):
+        super().__init__(parameters, target)
+        self.hyper_samples = SURROGATE_HYPER_SAMPLES if hyper_samples is None else hyper_samples
+        self.seed = seed
+
+    def _correlation(self, A, B, inv_scale):
+        diff = (A[:, None, :] - B[None, :, :]) * inv_scale
+        return np.exp(-0.5 * np.einsum('ijk,ijk->ij', diff, diff))
+
+    def _likelihood(self, inv_scale, nugget):
+        n = len(self.y)
+        R = self._correlation(self.X, self.X, inv_scale) + nugget * np.eye(n)
+        try:
+            L = np.linalg.cholesky(R)
+        except np.linalg.LinAlgError:
+            return -np.inf
+        z = np.linalg.solve(L, self.y)
+        signal = max(float(z @ z) / n, 1e-12)
+        return -0.5 * n * math.log(signal) - float(np.log(np.diag(L)).sum())
+
+    def _fit(self):
+        rng = np.random.default_rng(self.seed)
+        d = self.X.shape[1]
+        best = (-np.inf, np.full(d, 1 / 0.5), 1e-6)
+        for k in range(self.hyper_samples):
+            # The first draw is a neutral default; the rest span short to long length scales
+            scales = np.full(d, 0.5) if k == 0 else np.exp(rng.uniform(math.log(0.05), math.log(5.0), d))
+            nugget = 1e-6 if k == 0 else math.exp(rng.uniform(math.log(1e-6), math.log(1e-1)))
+            value = self._likelihood(1.0 / scales, nugget)
+            if value > best[0]:
+                best = (value, 1.0 / scales, nugget)
+        _, self.inv_scale, self.nugget = best
+        n = len(self.y)
+        R = self._correlation(self.X, self.X, self.inv_scale) + self.nugget * np.eye(n)
+        self.R_inv = np.linalg.inv(R)
+        self.alpha = self.R_inv @ self.y
+        self.signal = float(self.y @ self.alpha) / n
+
+    def _predict_one(self, x):
+        diff = (self.X - x) * self.inv_scale
+        r = np.exp(-0.5 * np.einsum('ij,ij->i', diff, diff))
+        return float(r @ self.alpha), self.signal * (1.0 - float(r @ self.R_inv @ r))
+
+    def _predict(self, Xs):
+        r = self._correlation(Xs, self.X, self.inv_scale)
+        return r @ self.alpha, self.signal * (1.0 - np.einsum('ij,jk,ik->i', r, self.R_inv, r))
+
+    def _loo_residuals(self):
+        # Closed-form leave-one-out residuals of a GP
+        return self.alpha / np.diag(self.R_inv)
+
+    def _condition_variance(self, X_new):
+        """Predictive variance function after adding inputs (variance does not depend on y)"""
+        X = np.vstack((self.X, X_new))
+        R = self._correlation(X, X, self.inv_scale) + self.nugget * np.eye(len(X))
+        R_inv = np.linalg.inv(R)
+
+        def variance(Xs):
+            r = self._correlation(Xs, X, self.inv_scale)
+            return self.signal * (1.0 - np.einsum('ij,jk,ik->i', r, R_inv, r))
+        return variance
+
+
+class PolynomialSurrogate(Surrogate):
+    """
+    Quadratic response surface fitted by Bayesian ridge regression
+
+    Features are the intercept, the inputs and all pairwise products
+    (squares included). The predictive standard deviation is the posterior
+    uncertainty of the regression weights; its noise level is estimated from
+    the residuals, which needs more training rows than features
+    (num_features(d) = 28 for the 6 default inputs). With fewer rows the fit
+    warns and assumes the prior variance of the standardized target.
+    """
+
+    def __init__(self, parameters=None, target='throughput_per_day', ridge=None):
+        super().__init__(parameters, target)
+        self.ridge = SURROGATE_RIDGE if ridge is None else ridge
+
+    @staticmethod
+    def num_features(d):
+        """Number of regression features for d inputs"""
+        return 1 + d + d * (d + 1) // 2
+
+    def _features(self, X):
+        X = np.atleast_2d(X)
+        i, j = self.pairs
+        return np.hstack((np.ones((len(X), 1)), X, X[:, i] * X[:, j]))
+
+    def _fit(self):
+        self.pairs = np.triu_indices(self.X.shape[1])
+        Phi = self._features(self.X)
+        n, p = Phi.shape
+        self.A_inv = np.linalg.inv(Phi.T @ Phi + self.ridge * np.eye(p))
+        self.weights = self.A_inv @ Phi.T @ self.y
+        residuals = self.y - Phi @ self.weights
+        if n > p:
+            self.noise = float(residuals @ residuals) / (n - p)
+        else:
+            warnings.warn(f"{n} training rows for {p} polynomial features: the {self.target} noise level "
+                          "cannot be estimated and the predictive standard deviation is a guess",
+                          RuntimeWarning, stacklevel=3)
+            self.noise = 1.0
+        self.hat_diag = np.einsum('ij,jk,ik->i', Phi, self.A_inv, Phi)
+
+    def _predict_one(self, x):
+        phi = self._features(x)[0]
+        return float(phi @ self.weights), self.noise * float(phi @ self.A_inv @ phi)
+
+    def _predict(self, Xs):
+        Phi = self._features(Xs)
+        return Phi @ self.weights, self.noise * np.einsum('ij,jk,ik->i', Phi, self.A_inv, Phi)
+
+    def _loo_residuals(self):
+        residuals = self.y - self._features(self.X) @ self.weights
+        return residuals / np.clip(1.0 - self.hat_diag, 1e-9, None)
+
+    def _condition_variance(self, X_new):
+        Phi = self._features(np.vstack((self.X, X_new)))
+        A_inv = np.linalg.inv(Phi.T @ Phi + self.ridge * np.eye(Phi.shape[1]))
+
+        def variance(Xs):
+            Phi_s = self._features(Xs)
+            return self.noise * np.einsum('ij,jk,ik->i', Phi_s, A_inv, Phi_s)
+        return variance
+
+
+SURROGATES = {'gp': GaussianProcessSurrogate, 'poly': PolynomialSurrogate}
+
+
+def fit_surrogate(results_path, target='throughput_per_day', kind=None, parameters=None):
+    """
+    Fit a surrogate of one KPI on a sweep result table
+
+    A polynomial surrogate needs more rows than features; with fewer the
+    Gaussian process is fitted instead (with a RuntimeWarning).
+    """
+    surrogate = SURROGATES[SURROGATE_KIND if kind is None else kind](parameters, target)
+    X, y = load_results(results_path, target, surrogate.parameters)
+    if isinstance(surrogate, PolynomialSurrogate):
+        num_features = PolynomialSurrogate.num_features(len(surrogate.parameters))
+        if len(y) <= num_features:
+            warnings.warn(f"{len(y)} rows in {results_path} for {num_features} polynomial features; "
+                          "fitting a Gaussian process instead", RuntimeWarning, stacklevel=2)
+            surrogate = GaussianProcessSurrogate(surrogate.parameters, target)
+    return surrogate.fit(X, y)
+
+
+def suggest_points(surrogate, space, num_points=None, num_candidates=None, seed=None):
+    """
+    Scenarios whose simulation should reduce the surrogate error the most
+
+    Candidates are drawn by Latin hypercube over `space`; points are picked
+    greedily by largest predictive standard deviation, conditioning the
+    variance on the points already picked so a batch spreads out.
+
+    Args:
+        surrogate (Surrogate): Fitted surrogate
+        space (dict): {NAME: (low, high) or list of levels} as for latin_hypercube
+
+    Returns:
+        list[dict]: Override dicts to simulate next
+    """
+    import config_SimPy
+
+    num_points = SURROGATE_BATCH_SIZE if num_points is None else num_points
+    num_candidates = SURROGATE_CANDIDATES if num_candidates is None else num_candidates
+    candidates = latin_hypercube(space, num_candidates, seed)
+    X_raw = np.array([[point.get(name, getattr(config_SimPy, name)) for name in surrogate.parameters]
+                      for point in candidates], dtype=float)
+    Xs = surrogate._scale(X_raw)
+    variance = surrogate._predict(Xs)[1]
+    chosen = []
+    for _ in range(min(num_points, len(candidates))):
+        if chosen:
+            variance = surrogate._condition_variance(Xs[chosen])(Xs)
+            variance[chosen] = -np.inf
+        chosen.append(int(np.argmax(variance)))
+    return [candidates[k] for k in chosen]
+
+
+def run_active_learning(space, target='throughput_per_day', results_path="surrogate_results.csv",
+                        initial_points=8, rounds=5, kind=None, seeds=(42,), sim_duration=None,
+                        max_workers=None, seed=0):
+    """
+    Alternate between fitting the surrogate and simulating the points it is least sure about
+
+    Results accumulate in `results_path` (a regular sweep table), so a later
+    call continues where the last one stopped.
+
+    Returns:
+        tuple: (fitted Surrogate, list of {'num_points', 'loo_rmse'} per round)
+    """
+    if not os.path.exists(results_path):
+        run_sweep(latin_hypercube(space, initial_points, seed), seeds, results_path,
+                  max_workers, sim_duration)
+    history = []
+    for k in range(rounds):
+        surrogate = fit_surrogate(results_path, target, kind)
+        history.append({'num_points': len(surrogate.y), 'loo_rmse': surrogate.loo_rmse()})
+        run_sweep(suggest_points(surrogate, space, seed=seed + k + 1), seeds, results_path,
+                  max_workers, sim_duration)
+    surrogate = fit_surrogate(results_path, target, kind)
+    history.append({'num_points': len(surrogate.y), 'loo_rmse': surrogate.loo_rmse()})
+    return surrogate, history
+
+
+if __name__ == "__main__":
+    space = {'NUM_MACHINES_CNC': (1, 4), 'NUM_STC_MACHINES_AMR': (1, 3), 'CUST_ORDER_CYCLE': (60, 720)}
+    surrogate, history = run_active_learning(space, rounds=3)
+    for entry in history:
+        print(f"{entry['num_points']:>4} points: LOO RMSE {entry['loo_rmse']:.3f}")
+    # Query inside the sampled space (parameters outside `space` stay at their config default)
+    mean, std = surrogate.predict({'NUM_MACHINES_CNC': 3, 'NUM_STC_MACHINES_AMR': 1, 'CUST_ORDER_CYCLE': 240})
+    print(f"Throughput with 3 CNCs, 1 STC AMR and an order every 240 min: {mean:.1f} ± {std:.1f} per day")
@@ -0,0 +1,187 @@
+import math
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from config_SimPy import *
+from sweep_SimPy import full_factorial, _run_point
+from stats_SimPy import t_quantile
+
+""" Simulation-based fleet sizing with racing / successive halving """
+
+
+def configuration_cost(candidate, costs=RESOURCE_COSTS):
+    """Cost of a candidate configuration (sum of unit cost x count per resource type)"""
+    return sum(costs.get(name, 0) * count for name, count in candidate.items())
+
+
+class Candidate:
+    """
+    One configuration raced by the optimizer
+
+    Attributes:
+        overrides (dict): Resource counts {NAME: count}
+        cost (float): Cost from the cost model
+        values (list): Target KPI of every finished replication
+        status (str): "RACING", "FEASIBLE", "INFEASIBLE", "DOMINATED" (costlier than a
+            feasible candidate) or "ELIMINATED" (dropped by successive halving)
+    """
+
+    def __init__(self, overrides, cost):
+        self.overrides = overrides
+        self.cost = cost
+        self.values = []
+        self.status = "RACING"
+
+    @property
+    def mean(self):
+        return float(np.mean(self.values)) if self.values else math.nan
+
+    def half_width(self, confidence):
+        """Half width of the t-interval of the target KPI"""
+        n = len(self.values)
+        if n < 2:
+            return math.inf
+        return t_quantile(0.5 + confidence / 2, n - 1) * float(np.std(self.values, ddof=1)) / math.sqrt(n)
+
+
+class FleetSizingOptimizer:
+    """
+    Cheapest resource mix meeting a KPI target, found by racing
+
+    Every round evaluates the surviving candidates up to the round's number of
+    replications (common random numbers: replication k uses the same seed for
+    every candidate), then
+    * candidates whose interval lies on the wrong side of the target are dropped,
+      and so are candidates whose KPI is undefined (NaN, e.g. a cycle time
+      when nothing was completed),
+    * candidates costlier than a candidate already confirmed feasible are dominated,
+    * of the undecided candidates only the best 1/eta (by distance to the target)
+      advance, the others are eliminated, and the replication budget is multiplied by eta.
+
+    Attributes:
+        kpi (str): KPI name from summarize_kpis (e.g. 'throughput_per_day')
+        target (float): Target KPI value
+        maximize (bool): True if KPI >= target is required, False for KPI <= target
+        costs (dict): Unit cost per resource parameter
+    """
+
+    def __init__(self, kpi, target, maximize=True, costs=RESOURCE_COSTS,
+                 initial_reps=2, max_reps=16, eta=2, confidence=0.95,
+                 base_overrides=None, sim_duration=None, max_workers=None,
+                 base_seed=42, cache_path=None):
+        self.kpi = kpi
+        self.target = target
+        self.maximize = maximize
+        self.costs = costs
+        self.initial_reps = initial_reps
+        self.max_reps = max_reps
+        self.eta = eta
+        self.confidence = confidence
+        self.base_overrides = base_overrides or {}
+        self.sim_duration = sim_duration
+        self.max_workers = max_workers
+        self.base_seed = base_seed
+        self.cache_path = cache_path
+        self.num_evaluations = 0
+
+    def _margin(self, candidate):
+        """Signed distance of the mean KPI to the target (positive = meets target)"""
+        diff = candidate.mean - self.target
+        return diff if self.maximize else -diff
+
+    def _evaluate(self, pool, candidates, num_reps):
+        """Bring every candidate up to num_reps replications in parallel"""
+        futures = {}
+        for cand in candidates:
+            for rep in range(len(cand.values), num_reps):
+                overrides = dict(self.base_overrides)
+                overrides.update(cand.overrides)
+                future = pool.submit(_run_point, overrides, self.base_seed + rep,
+                                     self.sim_duration, self.cache_path)
+                futures[future] = cand
+        for future, cand in futures.items():
+            _, _, kpis = future.result()
+            cand.values.append(kpis[self.kpi])
+        self.num_evaluations += len(futures)
+
+    def _classify(self, racing):
+        """Update statuses from the current intervals"""
+        for cand in racing:
+            hw = cand.half_width(self.confidence)
+            margin = self._margin(cand)
+            if math.isnan(margin):
+                # An undefined KPI cannot meet the target
+                cand.status = "INFEASIBLE"
+            elif margin - hw >= 0:
+                cand.status = "FEASIBLE"
+            elif margin + hw < 0:
+                cand.status = "INFEASIBLE"
+
+    def optimize(self, candidates):
+        """
+        Race the candidate configurations
+
+        Args:
+            candidates (list[dict]): Resource count overrides
+
+        Returns:
+            tuple: (best Candidate or None, list of all Candidates)
+        """
+        pool_cands = sorted((Candidate(c, configuration_cost(c, self.costs)) for c in candidates),
+                            key=lambda c: c.cost)
+        num_reps = self.initial_reps
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                racing = [c for c in pool_cands if c.status == "RACING"]
+                if not racing:
+                    break
+                self._evaluate(pool, racing, num_reps)
+                self._classify(racing)
+
+                # Anything costlier than a confirmed feasible candidate is dominated
+                feasible = [c for c in pool_cands if c.status == "FEASIBLE"]
+                best_cost = min((c.cost for c in feasible), default=math.inf)
+                for cand in pool_cands:
+                    if cand.status in ("RACING", "FEASIBLE") and cand.cost > best_cost:
+                        cand.status = "DOMINATED"
+
+                racing = [c for c in pool_cands if c.status == "RACING"]
+                if not racing or num_reps >= self.max_reps:
+                    break
+
+                # Successive halving: spend more replications only on close contenders
+                keep = max(1, math.ceil(len(racing) / self.eta))
+                racing.sort(key=lambda c: (-self._margin(c) if self._margin(c) < 0 else 0, c.cost))
+                for cand in racing[keep:]:
+                    cand.status = "ELIMINATED"
+                num_reps = min(self.max_reps, num_reps * self.eta)
+
+        # Cheapest confirmed candidate, else the cheapest whose mean meets the target
+        confirmed = [c for c in pool_cands if c.status == "FEASIBLE"]
+        likely = [c for c in pool_cands if c.status == "RACING" and self._margin(c) >= 0]
+        best = min(confirmed or likely, key=lambda c: c.cost, default=None)
+        return best, pool_cands
+
+
+def fleet_candidates(bounds):
+    """
+    Full grid of resource counts
+
+    Args:
+        bounds (dict): {NAME: (min_count, max_count)}
+    """
+    return full_factorial({name: list(range(low, high + 1)) for name, (low, high) in bounds.items()})
+
+
+if __name__ == "__main__":
+    optimizer = FleetSizingOptimizer('throughput_per_day', target=10.0,
+                                     base_overrides={'CUST_ORDER_CYCLE': 240})
+    best, ranked = optimizer.optimize(fleet_candidates({
+        'NUM_MACHINES_CNC': (1, 4),
+        'NUM_STC_MACHINES_AMR': (1, 2),
+        'NUM_CTI_MACHINES_AMR': (1, 2),
+        'NUM_WORKERS_IN_INSPECT': (1, 3),
+    }))
+    print(f"Evaluations: {optimizer.num_evaluations}")
+    if best:
+        print(f"Best: {best.overrides} cost={best.cost} {optimizer.kpi}={best.mean:.3f}")
@@ -0,0 +1,426 @@
+import heapq
+import math
+import multiprocessing
+import random
+import time
+import traceback
+import simpy
+from config_SimPy import *
+from base_Customer import Order, OrderReceiver, create_customers
+from log_SimPy import Logger
+from manager import Manager
+from routing_SimPy import stage_classes
+from scenario_SimPy import SCENARIO_DEFAULTS, apply_config
+
+""" Multi-line plant: lines sharing supplier pools, run in one process or sharded across processes """
+
+# Plant KPIs summed over the lines
+PLANT_SUM_KPIS = ('num_orders', 'num_items_released', 'num_items_completed', 'num_orders_completed',
+                  'throughput_per_day', 'num_items_starved')
+
+
+class _OrderRecorder(OrderReceiver):
+    """Keeps (time, id_customer, id_order, supplier, num_items, priority, due_date) of every order"""
+
+    def __init__(self, env):
+        self.env = env
+        self.orders = []
+
+    def receive_order(self, order):
+        self.orders.append((self.env.now, order.id_customer, order.id_order, order.is_supplier,
+                            order.num_items, order.priority, order.due_date))
+
+
+def generate_order_stream(sim_duration, seed=42):
+    """
+    Customer orders of the whole plant, drawn once by the coordinator
+
+    Returns:
+        list: Order records in release order
+    """
+    random.seed(seed)
+    env = simpy.Environment()
+    recorder = _OrderRecorder(env)
+    create_customers(env, recorder, None)
+    env.run(until=sim_duration)
+    return recorder.orders
+
+
+def assign_orders(orders, num_lines, rule=None):
+    """
+    Split the order stream between the lines
+
+    The rule only looks at the stream itself ("ROUND_ROBIN", or "LEAST_LOADED"
+    = fewest units assigned so far), so routing does not depend on line state
+    and needs no synchronization.
+
+    Returns:
+        list[list]: Order records of every line
+    """
+    rule = (PLANT_ORDER_ROUTING if rule is None else rule).upper()
+    assigned = [[] for _ in range(num_lines)]
+    units = [0] * num_lines
+    for k, order in enumerate(orders):
+        if rule == "ROUND_ROBIN":
+            line = k % num_lines
+        elif rule == "LEAST_LOADED":
+            line = min(range(num_lines), key=lambda j: (units[j], j))
+        else:
+            raise ValueError(f"Unknown order routing rule: {rule!r}")
+        assigned[line].append(order)
+        units[line] += order[4]
+    return assigned
+
+
+def line_seeds(seed, num_lines):
+    """Independent, reproducible seed of every line"""
+    return [f"{seed}-line{k}" for k in range(num_lines)]
+
+
+class SupplyArbiter:
+    """
+    Shared LOT/PALLET supplier pools of the plant
+
+    Draw requests are granted in (time, line, sequence) order whole or not at
+    all, so the outcome does not depend on how the lines are scheduled.
+
+    Attributes:
+        pools (dict): {"LOT"/"PALLET": units left}
+        pending (list): Heap of unresolved (time, line, seq, supply type, units) requests
+        ledgers (dict): {line index: LineSupply} receiving outcomes directly (single-process run)
+        granted_units (dict): Units granted per supply type
+        denied_units (dict): Units denied per supply type
+    """
+
+    def __init__(self, ledgers=None):
+        self.pools = {"LOT": LOT_INVEN_LEVEL * NUM_SUPPLIER_LOT,
+                      "PALLET": PALLET_INVEN_LEVEL * NUM_SUPPLIER_PALLET}
+        self.pending = []
+        self.ledgers = ledgers
+        self.granted_units = {kind: 0 for kind in self.pools}
+        self.denied_units = {kind: 0 for kind in self.pools}
+
+    def submit(self, requests):
+        for request in requests:
+            heapq.heappush(self.pending, request)
+
+    def resolve(self, before):
+        """
+        Grant or deny every pending request made before a time
+
+        Returns:
+            dict: {line index: {seq: granted}}
+        """
+        outcomes = {}
+        while self.pending and self.pending[0][0] < before:
+            _, line, seq, kind, units = heapq.heappop(self.pending)
+            granted = self.pools[kind] >= units
+            if granted:
+                self.pools[kind] -= units
+                self.granted_units[kind] += units
+            else:
+                self.denied_units[kind] += units
+            outcomes.setdefault(line, {})[seq] = granted
+        if self.ledgers is not None:
+            for line, results in outcomes.items():
+                self.ledgers[line].outcomes.update(results)
+        return outcomes
+
+    def summary(self):
+        return {'pools_left': dict(self.pools), 'granted_units': dict(self.granted_units),
+                'denied_units': dict(self.denied_units)}
+
+
+class LineSupply:
+    """
+    Supplier draws of one line (the `supply` hook of its supply stages)
+
+    A draw is requested when a supply trip starts and its outcome is read
+    when the trip delivers, at least one lookahead later. Without a local
+    arbiter the requests wait in the outbox until the coordinator collects
+    them at the end of the window.
+
+    Attributes:
+        env (simpy.Environment): Simulation environment of the line
+        line (int): Line index
+        arbiter (SupplyArbiter): Arbiter in the same process (None = sharded run)
+        outbox (list): Requests not yet sent to the coordinator
+        outcomes (dict): {seq: granted} received and not yet read
+        num_starved_units (int): Units whose draw was denied
+    """
+
+    def __init__(self, env, line, arbiter=None):
+        self.env = env
+        self.line = line
+        self.arbiter = arbiter
+        self.next_seq = 0
+        self.outbox = []
+        self.outcomes = {}
+        self.num_starved_units = 0
+
+    def request(self, items, now):
+        for item in items:
+            item.supply_seq = self.next_seq
+            self.outbox.append((now, self.line, self.next_seq, item.is_supplier, item.quantity))
+            self.next_seq += 1
+        if self.arbiter is not None:
+            self.arbiter.submit(self.take_requests())
+
+    def take_requests(self):
+        requests, self.outbox = self.outbox, []
+        return requests
+
+    def granted(self, item):
+        seq = item.supply_seq
+        if seq not in self.outcomes:
+            if self.arbiter is None:
+                raise RuntimeError(
+                    f"Line {self.line}: draw {seq} needed at {self.env.now} before it was resolved "
+                    f"(supply stage faster than the lookahead)")
+            self.arbiter.resolve(self.env.now)
+        granted = self.outcomes.pop(seq)
+        if not granted:
+            self.num_starved_units += item.quantity
+        return granted
+
+
+def supply_stages(manager):
+    """Stages whose trips draw from the shared pools (PLANT_SUPPLY_STAGE type)"""
+    cls = stage_classes()[PLANT_SUPPLY_STAGE.upper()][0]
+    return [process for process in manager.get_processes().values() if isinstance(process, cls)]
+
+
+def supply_lookahead(stages, lookahead=None):
+    """
+    Conservative lookahead: a draw made at t is not needed before t + lookahead
+
+    Defaults to the shortest constant transit time of the supply stages
+    (STC_PROC_TIME_TRANSIT in the default line); sampled transit times
+    need PLANT_LOOKAHEAD set to their minimum.
+    """
+    lookahead = PLANT_LOOKAHEAD if lookahead is None else lookahead
+    if lookahead is None:
+        for process in stages:
+            if process.time_sampler is not None or hasattr(process, 'calculate_processing_time'):
+                raise ValueError(
+                    f"{process.name_process} has no constant transit time; set PLANT_LOOKAHEAD to its minimum")
+        times = [res.processing_time for process in stages for res in process.processor_resources.values()]
+        lookahead = min(times) if times else math.inf
+    if not lookahead > 0:
+        raise ValueError(f"Plant lookahead must be positive, got {lookahead}")
+    return lookahead
+
+
+class PlantLine:
+    """
+    One production line fed from the coordinator's order stream
+
+    The line is built right after seeding `random` with its own seed, and
+    its run-time draws (defects, optional routing steps) come from a
+    private generator, so it evolves the same way whether it shares an
+    environment with the other lines or runs alone in a worker process.
+
+    Attributes:
+        index (int): Line index
+        env (simpy.Environment): Simulation environment
+        manager (Manager): Manager of the line's stages
+        supply (LineSupply): Supplier draws of the line
+        lookahead (float): Minimum time between a draw and its use
+    """
+
+    def __init__(self, env, index, orders, seed, sim_duration, arbiter=None):
+        self.index = index
+        self.env = env
+        random.seed(seed)
+        # Raw material comes from the plant's pools, not per-line supplier tokens
+        with apply_config({'NUM_SUPPLIER_LOT': 0, 'NUM_SUPPLIER_PALLET': 0}):
+            self.manager = Manager(env, Logger(env))
+        if FAILURE_ENABLED:
+            self.manager.setup_failures(sim_duration)
+
+        rng = random.Random(random.getrandbits(64))
+        for process in self.manager.get_processes().values():
+            process.rng = rng
+        self.manager.routing.rng = rng
+
+        self.supply = LineSupply(env, index, arbiter)
+        stages = supply_stages(self.manager)
+        for process in stages:
+            process.supply = self.supply
+        self.lookahead = supply_lookahead(stages)
+        env.process(self.release_orders(orders))
+
+    def release_orders(self, orders):
+        for release_time, id_customer, id_order, supplier, num_items, priority, due_date in orders:
+            if release_time > self.env.now:
+                yield self.env.timeout(release_time - self.env.now)
+            self.manager.receive_order(Order(id_customer, id_order, supplier, num_items, priority, due_date,
+                                             self.manager.item_pool))
+
+    def kpis(self, sim_duration):
+        from stats_SimPy import summarize_kpis
+
+        kpis = summarize_kpis(self.manager, sim_duration)
+        kpis['num_items_starved'] = float(self.supply.num_starved_units)
+        return kpis
+
+
+def plant_totals(line_kpis):
+    """Plant-level KPIs from the per-line summaries"""
+    totals = {name: sum(kpis.get(name, 0.0) for kpis in line_kpis) for name in PLANT_SUM_KPIS}
+    completed = totals['num_items_completed']
+    totals['mean_cycle_time'] = (
+        sum(kpis['mean_cycle_time'] * kpis['num_items_completed'] for kpis in line_kpis
+            if kpis['num_items_completed']) / completed if completed else math.nan)
+    return totals
+
+
+def _run_single(assignments, seeds, sim_duration):
+    """All lines in one environment; draws are resolved lazily when a trip delivers"""
+    env = simpy.Environment()
+    arbiter = SupplyArbiter(ledgers={})
+    lines = [PlantLine(env, k, orders, seed, sim_duration, arbiter)
+             for k, (orders, seed) in enumerate(zip(assignments, seeds))]
+    arbiter.ledgers.update({line.index: line.supply for line in lines})
+    env.run(until=sim_duration)
+    return [line.kpis(sim_duration) for line in lines], arbiter, 0
+
+
+def _line_worker(conn, settings, index, orders, seed, sim_duration):
+    """Worker process hosting one line; advances it window by window on the coordinator's command"""
+    try:
+        with apply_config(settings):
+            env = simpy.Environment()
+            line = PlantLine(env, index, orders, seed, sim_duration)
+            conn.send(line.lookahead)
+            while True:
+                command, outcomes, until = conn.recv()
+                line.supply.outcomes.update(outcomes)
+                if command == "finish":
+                    break
+                env.run(until=until)
+                conn.send((line.supply.take_requests(), env.peek()))
+            conn.send(line.kpis(sim_duration))
+    except Exception:
+        conn.send(RuntimeError(f"Line {index} failed:\n{traceback.format_exc()}"))
+    finally:
+        conn.close()
+
+
+def _receive(conn):
+    reply = conn.recv()
+    if isinstance(reply, Exception):
+        raise reply
+    return reply
+
+
+def _run_sharded(settings, assignments, seeds, sim_duration):
+    """
+    One worker process per line, synchronized in conservative time windows
+
+    Every window ends one lookahead after the earliest pending event of
+    any line, so no draw made inside it is needed before it ends. Between
+    windows the coordinator resolves all draws made so far and hands the
+    outcomes back with the next window.
+    """
+    context = multiprocessing.get_context()
+    conns, workers = [], []
+    try:
+        for k, (orders, seed) in enumerate(zip(assignments, seeds)):
+            parent, child = context.Pipe()
+            worker = context.Process(target=_line_worker, args=(child, settings, k, orders, seed, sim_duration),
+                                     daemon=True)
+            worker.start()
+            child.close()
+            conns.append(parent)
+            workers.append(worker)
+
+        lookahead = min(_receive(conn) for conn in conns)
+        arbiter = SupplyArbiter()
+        outcomes = {}
+        next_events = [0.0] * len(conns)
+        now, num_windows = 0.0, 0
+        while now < sim_duration:
+            until = min(min(next_events) + lookahead, sim_duration)
+            for k, conn in enumerate(conns):
+                conn.send(("run", outcomes.get(k, {}), until))
+            replies = [_receive(conn) for conn in conns]
+            for requests, _ in replies:
+                arbiter.submit(requests)
+            next_events = [next_event for _, next_event in replies]
+            outcomes = arbiter.resolve(until)
+            now = until
+            num_windows += 1
+        for k, conn in enumerate(conns):
+            conn.send(("finish", outcomes.get(k, {}), None))
+        line_kpis = [_receive(conn) for conn in conns]
+    finally:
+        for conn in conns:
+            conn.close()
+        for worker in workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+    return line_kpis, arbiter, num_windows
+
+
+def run_plant(overrides=None, seed=42, sim_duration=None, num_lines=None, sharded=False):
+    """
+    Simulate a plant of identical lines
+
+    Args:
+        overrides (dict): Config overrides {NAME: value}
+        seed (int): Random seed of the order stream and the lines
+        sim_duration (float): Simulation horizon (defaults to SIM_TIME)
+        num_lines (int): Number of lines (defaults to PLANT_NUM_LINES)
+        sharded (bool): Run every line in its own process (same results as the single-process run)
+
+    Returns:
+        dict: {'lines': [KPIs per line], 'plant': plant KPIs, 'supply': pool summary,
+               'num_windows': synchronization windows, 'wall_time': seconds}
+    """
+    import config_SimPy
+
+    settings = dict(SCENARIO_DEFAULTS)
+    settings.update(overrides or {})
+    with apply_config(settings):
+        duration = config_SimPy.SIM_TIME if sim_duration is None else sim_duration
+        num_lines = PLANT_NUM_LINES if num_lines is None else num_lines
+        assignments = assign_orders(generate_order_stream(duration, seed), num_lines)
+        seeds = line_seeds(seed, num_lines)
+        start = time.perf_counter()
+        if sharded:
+            line_kpis, arbiter, num_windows = _run_sharded(settings, assignments, seeds, duration)
+        else:
+            line_kpis, arbiter, num_windows = _run_single(assignments, seeds, duration)
+        wall_time = time.perf_counter() - start
+    return {'lines': line_kpis, 'plant': plant_totals(line_kpis), 'supply': arbiter.summary(),
+            'num_windows': num_windows, 'wall_time': wall_time}
+
+
+def compare_plant_runs(a, b):
+    """KPIs that differ between two plant runs (NaN equals NaN); empty when they match"""
+    def same(x, y):
+        return x == y or (isinstance(x, float) and isinstance(y, float) and math.isnan(x) and math.isnan(y))
+
+    differences = []
+    for k, (kpis_a, kpis_b) in enumerate(zip(a['lines'], b['lines'])):
+        for name in sorted(set(kpis_a) | set(kpis_b)):
+            if not same(kpis_a.get(name), kpis_b.get(name)):
+                differences.append((k, name, kpis_a.get(name), kpis_b.get(name)))
+    if a['supply'] != b['supply']:
+        differences.append((None, 'supply', a['supply'], b['supply']))
+    return differences
+
+
+if __name__ == "__main__":
+    overrides = {'CUST_ORDER_CYCLE': 60, 'LOT_INVEN_LEVEL': 300, 'PALLET_INVEN_LEVEL': 300}
+    single = run_plant(overrides, sim_duration=7 * 24 * 60)
+    sharded = run_plant(overrides, sim_duration=7 * 24 * 60, sharded=True)
+    print(f"Single process: {single['wall_time']:.2f} s, sharded: {sharded['wall_time']:.2f} s "
+          f"({sharded['num_windows']} windows)")
+    for name, value in single['plant'].items():
+        print(f"{name:<24} {value:>12.2f}")
+    print(f"Supply: {single['supply']}")
+    differences = compare_plant_runs(single, sharded)
+    print("Sharded run matches the single-process run" if not differences else f"Mismatches: {differences}")
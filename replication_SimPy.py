@@ -0,0 +1,204 @@
+import contextlib
+import math
+import warnings
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from config_SimPy import *
+from fastsim_SimPy import STAGE_NAMES
+
+""" Parallel replications aggregated through shared-memory NumPy buffers """
+
+# Fixed KPI row schema (KPIs a run does not produce stay NaN)
+KPI_COLUMNS = (
+    ['num_orders', 'num_items_released', 'num_items_completed', 'num_orders_completed',
+     'throughput_per_day', 'mean_cycle_time', 'mean_makespan', 'max_makespan']
+    + [f'utilization_{name}' for name in STAGE_NAMES]
+    + [f'{kpi}_{name}' for name in STAGE_NAMES if 'AMR' in name for kpi in ('num_trips', 'load_factor')]
+    + ['mean_availability', 'lost_capacity', 'num_failures']
+)
+SERIES = ('queue_length', 'utilization')
+
+
+def busy_time_until(intervals, times):
+    """Busy time of disjoint sorted (start, end) intervals accumulated up to each time"""
+    if len(intervals) == 0:
+        return np.zeros(len(times))
+    starts, ends = intervals[:, 0], intervals[:, 1]
+    cum = np.concatenate(([0.0], np.cumsum(ends - starts)))
+    # Index of the last interval starting at or before each time (-1 = none)
+    k = np.searchsorted(starts, times, side='right') - 1
+    last = np.clip(k, 0, None)
+    partial = np.clip(np.minimum(times, ends[last]) - starts[last], 0, None)
+    return np.where(k >= 0, cum[last] + partial, 0.0)
+
+
+def binned_utilization(process, num_bins, bin_width):
+    """Fraction of the resources of a process busy in every time bin (wall-clock time)"""
+    from stats_SimPy import busy_intervals, disjoint_intervals
+
+    edges = np.arange(num_bins + 1, dtype=float) * bin_width
+    busy = np.zeros(num_bins)
+    intervals = busy_intervals(process)
+    for spans in intervals.values():
+        busy += np.diff(busy_time_until(disjoint_intervals(spans), edges))
+    num_resources = max(1, len(intervals))
+    return busy / (num_resources * bin_width)
+
+
+@contextlib.contextmanager
+def _quiet_nan():
+    """Silence NumPy warnings for KPIs that are NaN in every replication"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        yield
+
+
+class SharedReplicationBuffers:
+    """
+    Shared-memory arrays written by replication workers
+
+    Attributes:
+        num_reps (int): Number of replications
+        num_bins (int): Number of time bins per series
+        kpis (np.ndarray): (num_reps, len(KPI_COLUMNS)) KPI rows
+        series (dict): {series name: (num_reps, num_processes, num_bins) array}
+    """
+
+    def __init__(self, num_reps, num_bins, spec=None):
+        self.num_reps = num_reps
+        self.num_bins = num_bins
+        shapes = {'kpis': (num_reps, len(KPI_COLUMNS))}
+        shapes.update({name: (num_reps, len(STAGE_NAMES), num_bins) for name in SERIES})
+        self.owner = spec is None
+        self.blocks = {}
+        self.arrays = {}
+        for name, shape in shapes.items():
+            size = max(1, int(np.prod(shape)) * 8)
+            if self.owner:
+                block = shared_memory.SharedMemory(create=True, size=size)
+            else:
+                block = shared_memory.SharedMemory(name=spec['names'][name])
+            array = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+            if self.owner:
+                array.fill(np.nan)
+            self.blocks[name] = block
+            self.arrays[name] = array
+        self.kpis = self.arrays['kpis']
+        self.series = {name: self.arrays[name] for name in SERIES}
+
+    def spec(self):
+        """Small picklable description for workers to attach to the same blocks"""
+        return {'num_reps': self.num_reps, 'num_bins': self.num_bins,
+                'names': {name: block.name for name, block in self.blocks.items()}}
+
+    @classmethod
+    def attach(cls, spec):
+        return cls(spec['num_reps'], spec['num_bins'], spec)
+
+    def close(self):
+        """Detach (the owner also frees the shared blocks)"""
+        self.kpis = self.series = None
+        self.arrays.clear()
+        for block in self.blocks.values():
+            block.close()
+            if self.owner:
+                block.unlink()
+        self.blocks.clear()
+
+    # ---- In-place reductions across replications (axis 0) ----
+
+    def mean(self):
+        """KPI means and mean series"""
+        with _quiet_nan():
+            kpis = dict(zip(KPI_COLUMNS, np.nanmean(self.kpis, axis=0).tolist()))
+            series = {name: np.nanmean(array, axis=0) for name, array in self.series.items()}
+        return kpis, series
+
+    def confidence_interval(self, level=None):
+        """KPI (mean, half-width) with a Student-t interval over replications"""
+        from stats_SimPy import t_quantile
+
+        level = CONFIDENCE_LEVEL if level is None else level
+        counts = np.sum(~np.isnan(self.kpis), axis=0)
+        with _quiet_nan():
+            means = np.nanmean(self.kpis, axis=0)
+            stds = np.nanstd(self.kpis, axis=0, ddof=1)
+        result = {}
+        for name, n, mean, std in zip(KPI_COLUMNS, counts.tolist(), means.tolist(), stds.tolist()):
+            half = t_quantile(0.5 + level / 2, n - 1) * std / math.sqrt(n) if n > 1 else math.nan
+            result[name] = (mean, half)
+        return result
+
+    def quantiles(self, qs=(0.05, 0.5, 0.95)):
+        """KPI quantiles and per-bin series quantiles over replications"""
+        with _quiet_nan():
+            kpis = np.nanquantile(self.kpis, qs, axis=0)
+            series = {name: np.nanquantile(array, qs, axis=0) for name, array in self.series.items()}
+        return {name: dict(zip(qs, kpis[:, j].tolist())) for j, name in enumerate(KPI_COLUMNS)}, series
+
+
+def _replicate(spec, rep, overrides, seed, sim_duration):
+    """Worker entry point: simulate one replication and write it into the shared buffers"""
+    from scenario_SimPy import simulate
+    from stats_SimPy import summarize_kpis, queue_length_trace, binned_queue_length
+
+    buffers = SharedReplicationBuffers.attach(spec)
+    try:
+        manager, duration = simulate(overrides, seed, sim_duration)
+        kpis = summarize_kpis(manager, duration)
+        buffers.kpis[rep] = [kpis.get(name, math.nan) for name in KPI_COLUMNS]
+        bin_width = duration / buffers.num_bins if buffers.num_bins else 0
+        processes = {p.name_process: p for p in manager.get_processes().values()}
+        for j, name in enumerate(STAGE_NAMES):
+            process = processes.get(name)
+            if process is None:
+                # Stage not in a custom routing graph (series stays NaN)
+                continue
+            times, lengths = queue_length_trace(process)
+            queue = binned_queue_length(times, lengths, bin_width, until=duration)
+            buffers.series['queue_length'][rep, j, :len(queue)] = queue
+            if getattr(manager, 'retention', None) is None:
+                # Retired items no longer carry their busy intervals (series stays NaN)
+                buffers.series['utilization'][rep, j] = binned_utilization(process, buffers.num_bins, bin_width)
+    finally:
+        buffers.close()
+    return rep
+
+
+def run_replications(overrides=None, seeds=range(10), sim_duration=None, max_workers=None, bin_width=None):
+    """
+    Run replications in parallel; workers return only their index
+
+    Returns:
+        SharedReplicationBuffers: Filled buffers (call close() when done with them)
+    """
+    import config_SimPy
+
+    seeds = list(seeds)
+    duration = (overrides or {}).get('SIM_TIME', config_SimPy.SIM_TIME) if sim_duration is None else sim_duration
+    bin_width = QUEUE_BIN_WIDTH if bin_width is None else bin_width
+    num_bins = int(math.ceil(duration / bin_width)) if duration > 0 else 0
+    buffers = SharedReplicationBuffers(len(seeds), num_bins)
+    try:
+        # Series bins are exactly duration / num_bins wide (one hour for whole-hour horizons)
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(_replicate, buffers.spec(), rep, overrides, seed, duration)
+                       for rep, seed in enumerate(seeds)]
+            for future in futures:
+                future.result()
+    except BaseException:
+        buffers.close()
+        raise
+    return buffers
+
+
+if __name__ == "__main__":
+    buffers = run_replications(seeds=range(8), sim_duration=24 * 60)
+    try:
+        print(f"{'KPI':<32} {'mean':>12} {'half-width':>12}")
+        for name, (mean, half) in buffers.confidence_interval().items():
+            if not math.isnan(mean):
+                print(f"{name:<32} {mean:>12.3f} {half:>12.3f}")
+    finally:
+        buffers.close()
@@ -0,0 +1,264 @@
+import csv
+import math
+import os
+from collections import deque
+from config_SimPy import *
+from stats_SimPy import add_due_date_kpis
+
+""" Bounded-memory retention: KPI accumulators, chunked on-disk archive and item recycling """
+
+ITEM_ARCHIVE_FIELDS = ['id_customer', 'id_order', 'id_item', 'quantity', 'is_supplier',
+                       'time_release', 'time_end', 'cycle_time', 'num_cutting_visits']
+ORDER_ARCHIVE_FIELDS = ['id_customer', 'id_order', 'num_items', 'time_start', 'time_end', 'makespan',
+                        'priority', 'due_date', 'tardiness']
+
+
+class ArchiveWriter:
+    """
+    Appends retired records to a CSV file, one chunk at a time
+
+    Attributes:
+        path (str): CSV file
+        fieldnames (list): Column names
+        chunk_size (int): Records buffered before a write
+        buffer (list): Records not yet written
+        num_records (int): Records written so far
+    """
+
+    def __init__(self, path, fieldnames, chunk_size=None):
+        self.path = path
+        self.fieldnames = fieldnames
+        self.chunk_size = RETENTION_CHUNK_SIZE if chunk_size is None else chunk_size
+        self.buffer = []
+        self.num_records = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', newline='') as f:
+            csv.writer(f).writerow(fieldnames)
+
+    def append(self, record):
+        self.buffer.append(record)
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        with open(self.path, 'a', newline='') as f:
+            csv.writer(f).writerows(self.buffer)
+        self.num_records += len(self.buffer)
+        self.buffer.clear()
+
+
+class ProcessAccumulator:
+    """
+    Running busy-time and trip statistics of one process
+
+    Steps of the same batch share their start time on a resource, so a
+    resource's open batch interval is extended until a later batch starts
+    (same union of intervals as stats_SimPy.busy_intervals).
+
+    Attributes:
+        busy (dict): {resource name: closed busy time (working time with a calendar)}
+        open_batch (dict): {resource name: (start, end) of the latest batch}
+        calendars (dict): {resource name: ShiftCalendar or None}
+        num_trips (int): Number of AMR trips
+        load_factor_sum (float): Sum of trip load factors
+        cycle_times (deque): Cycle time (waiting + processing) of the most recent visits,
+            in completion order (the series of stats_SimPy.cycle_time_trace)
+    """
+
+    def __init__(self, process):
+        self.calendars = {res.name: getattr(res, 'calendar', None)
+                          for res in process.processor_resources.values()}
+        self.busy = {name: 0.0 for name in self.calendars}
+        self.open_batch = {}
+        self.num_trips = 0
+        self.load_factor_sum = 0.0
+        self.cycle_times = deque(maxlen=QUEUE_HISTORY_MAX_ENTRIES)
+
+    def _span_time(self, name, start, end):
+        calendar = self.calendars.get(name)
+        if calendar is None:
+            return end - start
+        return calendar.working_time(start, end)
+
+    def record_step(self, step):
+        name = step['resource_name']
+        start, end = step['start_time'], step['end_time']
+        batch = self.open_batch.get(name)
+        if batch is not None and batch[0] == start:
+            self.open_batch[name] = (start, max(batch[1], end))
+            return
+        if batch is not None:
+            self.busy[name] = self.busy.get(name, 0.0) + self._span_time(name, *batch)
+        self.open_batch[name] = (start, end)
+
+    def record_trip(self, trip):
+        self.num_trips += 1
+        self.load_factor_sum += trip['load_factor']
+
+    def utilization(self, sim_duration):
+        """Busy fraction of the on-shift time (same definition as process_utilization)"""
+        if sim_duration <= 0:
+            return 0.0
+        busy = dict(self.busy)
+        for name, batch in self.open_batch.items():
+            busy[name] = busy.get(name, 0.0) + self._span_time(name, *batch)
+        available = 0.0
+        for name in busy:
+            calendar = self.calendars.get(name)
+            available += sim_duration if calendar is None else calendar.working_time_until(sim_duration)
+        return sum(busy.values()) / available if available else 0.0
+
+
+class RetentionPolicy:
+    """
+    Retires finished items and orders from memory
+
+    Items passing inspection update the cycle-time accumulators; an order is
+    summarized when its last unit completes, written to the archive (if
+    configured), and its Item objects are kept in item_pool for the orders
+    released to the same Manager.
+    Processes report finished steps and trips here instead of keeping
+    completed_items / trip_history lists.
+
+    Attributes:
+        open_orders (dict): {(id_customer, id_order): [order, units not yet completed]}
+        processes (dict): {process name: ProcessAccumulator}
+        num_orders (int): Released orders
+        num_units_released (int): Released units
+        num_units_completed (int): Units that passed inspection
+        cycle_time_sum (float): Sum of unit cycle times
+        num_orders_completed (int): Completed orders
+        makespan_sum (float): Sum of order makespans
+        makespan_max (float): Largest order makespan
+        num_due_orders (int): Released orders with a due date
+        num_due_orders_completed (int): Completed orders with a due date
+        tardiness_sum (float): Sum of their tardiness
+        num_on_time (int): Those finished by their due date
+        item_archive (ArchiveWriter): Archive of retired items (None if disabled)
+        order_archive (ArchiveWriter): Archive of retired orders (None if disabled)
+        item_pool (list): Retired Item objects available for reuse (at most ITEM_POOL_SIZE)
+    """
+
+    def __init__(self, processes, archive_path=None):
+        self.open_orders = {}
+        self.processes = {process.name_process: ProcessAccumulator(process) for process in processes}
+        self.process_order = [process.name_process for process in processes]
+        self.num_orders = 0
+        self.num_units_released = 0
+        self.num_units_completed = 0
+        self.cycle_time_sum = 0.0
+        self.num_orders_completed = 0
+        self.makespan_sum = 0.0
+        self.makespan_max = -math.inf
+        self.num_due_orders = 0
+        self.num_due_orders_completed = 0
+        self.tardiness_sum = 0.0
+        self.num_on_time = 0
+        self.item_archive = None
+        self.order_archive = None
+        self.item_pool = []
+        if archive_path:
+            self.item_archive = ArchiveWriter(f"{archive_path}_items.csv", ITEM_ARCHIVE_FIELDS)
+            self.order_archive = ArchiveWriter(f"{archive_path}_orders.csv", ORDER_ARCHIVE_FIELDS)
+
+    def release_order(self, order):
+        """Register a released order (replaces Manager.processed_orders bookkeeping)"""
+        units = sum(item.quantity for item in order.list_items)
+        self.num_orders += 1
+        self.num_units_released += units
+        if order.due_date is not None:
+            self.num_due_orders += 1
+        self.open_orders[(order.id_customer, order.id_order)] = [order, units]
+
+    def record_step(self, process, processor_resource, item):
+        """A finished processing step of `item` in `process`"""
+        step = item.processing_history[-1]
+        accumulator = self.processes[process.name_process]
+        accumulator.record_step(step)
+        wait = next(s for s in reversed(item.waiting_history) if s['process'] == process.name_process)
+        accumulator.cycle_times.append(step['end_time'] - wait['start_time'])
+        if item.is_completed:
+            self.complete_item(item)
+
+    def record_trip(self, process, trip):
+        self.processes[process.name_process].record_trip(trip)
+
+    def complete_item(self, item):
+        """Item passed inspection: update accumulators and retire its order when done"""
+        self.num_units_completed += item.quantity
+        self.cycle_time_sum += (item.time_processing_end - item.waiting_history[0]['start_time']) * item.quantity
+
+        entry = self.open_orders[(item.id_customer, item.id_order)]
+        entry[1] -= item.quantity
+        if entry[1] == 0:
+            self.retire_order(entry[0], item.time_processing_end)
+
+    def retire_order(self, order, time_end):
+        """Summarize, archive and drop a completed order"""
+        del self.open_orders[(order.id_customer, order.id_order)]
+        makespan = time_end - order.time_start
+        self.num_orders_completed += 1
+        self.makespan_sum += makespan
+        self.makespan_max = max(self.makespan_max, makespan)
+        tardiness = order.tardiness(time_end)
+        if tardiness is not None:
+            self.num_due_orders_completed += 1
+            self.tardiness_sum += tardiness
+            if tardiness == 0:
+                self.num_on_time += 1
+
+        if self.order_archive is not None:
+            self.order_archive.append([order.id_customer, order.id_order, order.num_items,
+                                       order.time_start, time_end, makespan,
+                                       order.priority, order.due_date, tardiness])
+        for item in order.list_items:
+            if self.item_archive is not None:
+                release = item.waiting_history[0]['start_time']
+                self.item_archive.append([
+                    item.id_customer, item.id_order, item.id_item, item.quantity, item.is_supplier,
+                    release, item.time_processing_end, item.time_processing_end - release,
+                    sum(1 for step in item.processing_history if step['process'] == "Proc_Cutting")])
+            self.recycle(item)
+        order.list_items = []
+
+    def recycle(self, item):
+        """Return a retired item to the pool (it must no longer be referenced)"""
+        if len(self.item_pool) < ITEM_POOL_SIZE:
+            self.item_pool.append(item)
+
+    def kpis(self, sim_duration):
+        """KPI summary with the keys of stats_SimPy.summarize_kpis (failure KPIs excluded)"""
+        completed = self.num_units_completed
+        kpis = {
+            'num_orders': float(self.num_orders),
+            'num_items_released': float(self.num_units_released),
+            'num_items_completed': float(completed),
+            'num_orders_completed': float(self.num_orders_completed),
+            'throughput_per_day': completed / sim_duration * 24 * 60 if sim_duration else 0.0,
+            'mean_cycle_time': self.cycle_time_sum / completed if completed else math.nan,
+            'mean_makespan': (self.makespan_sum / self.num_orders_completed
+                              if self.num_orders_completed else math.nan),
+            'max_makespan': self.makespan_max if self.num_orders_completed else math.nan,
+        }
+        if self.num_due_orders:
+            num_overdue = sum(1 for order, _ in self.open_orders.values()
+                              if order.due_date is not None and order.due_date < sim_duration)
+            add_due_date_kpis(kpis, self.num_due_orders_completed, self.tardiness_sum, self.num_on_time,
+                              num_overdue)
+        for name in self.process_order:
+            accumulator = self.processes[name]
+            kpis[f'utilization_{name}'] = accumulator.utilization(sim_duration)
+            if accumulator.num_trips:
+                kpis[f'num_trips_{name}'] = float(accumulator.num_trips)
+                kpis[f'load_factor_{name}'] = accumulator.load_factor_sum / accumulator.num_trips
+        return kpis
+
+    def close(self):
+        """Write the remaining archive chunks"""
+        for archive in (self.item_archive, self.order_archive):
+            if archive is not None:
+                archive.flush()
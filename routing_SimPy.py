@@ -0,0 +1,211 @@
+import random
+from config_SimPy import *
+
+""" Declarative routing graph compiled into integer-indexed routing tables """
+
+# Graph of the built-in line (used when ROUTING_GRAPH is None)
+DEFAULT_ROUTING_GRAPH = {
+    "stages": {
+        "transport_stc": {"type": "AMR_STC"},
+        "cutting": {"type": "CUTTING"},
+        "transport_cti": {"type": "AMR_CTI"},
+        "inspect": {"type": "INSPECT"},
+    },
+    "routes": {"*": ["transport_stc", "cutting", "transport_cti", "inspect"]},
+    "rework": "cutting",
+}
+
+END = -1  # Routing table entry of the last step of a route
+
+
+def stage_classes():
+    """Stage type -> (Process class, default process name)"""
+    from specialized_Process import Proc_Amr_STC, Proc_Cutting, Proc_Amr_CTI, Proc_Inspect
+
+    return {
+        "AMR_STC": (Proc_Amr_STC, "Proc_AMR_STC"),
+        "CUTTING": (Proc_Cutting, "Proc_Cutting"),
+        "AMR_CTI": (Proc_Amr_CTI, "Proc_AMR_CTI"),
+        "INSPECT": (Proc_Inspect, "Proc_Inspect"),
+    }
+
+
+def _parse_step(step):
+    """Route step -> (stage keys, visit probability)"""
+    if isinstance(step, dict):
+        stages = step.get("stages", step.get("stage"))
+        probability = step.get("probability", 1.0)
+    else:
+        stages, probability = step, 1.0
+    if isinstance(stages, str):
+        stages = [stages]
+    return list(stages), probability
+
+
+class RoutingTable:
+    """
+    Compiled routing graph
+
+    Stages, routes and steps are numbered once at startup. A hand-off looks
+    up `next_step[route][stage]` and the candidate stages of that step, so
+    routing an item costs a couple of list indexings regardless of the plant
+    size. Items carry only their integer route ID.
+
+    Attributes:
+        stages (list[Process]): Stage processes by stage index
+        keys (list[str]): Graph key of every stage
+        route_ids (dict): {is_supplier value or "*": route index}
+        first_step (list[int]): Entry step of every route
+        next_step (list[list[int]]): [route][stage] -> step after that stage (END after the last one)
+        skip_step (list[int]): Step that follows a skipped optional step
+        step_stages (list[tuple]): Candidate stage indices (parallel cells) of every step
+        step_probability (list[float]): Visit probability of every step (1 = mandatory)
+        rework_step (list[int]): [route] -> step defective items return to (END = no rework)
+        is_inspection (list[bool]): Stages whose defective items were already sent to rework
+        cell_rule (str): "SHORTEST_QUEUE" or "ROUND_ROBIN" choice among parallel cells
+        rng (random.Random): Source of optional-step draws (the global `random` module by default)
+    """
+
+    def __init__(self, graph, stages, cell_rule=None):
+        self.rng = random
+        self.cell_rule = (ROUTING_CELL_RULE if cell_rule is None else cell_rule).upper()
+        self.keys = list(graph["stages"])
+        index = {key: k for k, key in enumerate(self.keys)}
+        self.stages = [stages[key] for key in self.keys]
+        for k, process in enumerate(self.stages):
+            process.router = self
+            process.stage_index = k
+        self.is_inspection = [graph["stages"][key]["type"].upper() == "INSPECT" for key in self.keys]
+
+        self.route_ids = {}
+        self.first_step = []
+        self.next_step = []
+        self.skip_step = []
+        self.step_stages = []
+        self.step_probability = []
+        self.rework_step = []
+        self.round_robin = []
+        rework_keys = graph.get("rework") or []
+        if isinstance(rework_keys, str):
+            rework_keys = [rework_keys]
+        is_cutting = {key for key, spec in graph["stages"].items() if spec["type"].upper() == "CUTTING"}
+        for name, route in graph["routes"].items():
+            route_id = len(self.first_step)
+            self.route_ids[name] = route_id
+            steps = [_parse_step(step) for step in route]
+            if not steps:
+                raise ValueError(f"Route {name!r} has no steps")
+            base = len(self.step_stages)
+            next_step = [END] * len(self.keys)
+            rework = cutting = END
+            for offset, (keys, probability) in enumerate(steps):
+                missing = [key for key in keys if key not in index]
+                if missing:
+                    raise ValueError(f"Route {name!r} uses unknown stages {missing}")
+                following = base + offset + 1 if offset + 1 < len(steps) else END
+                for key in keys:
+                    if next_step[index[key]] != END:
+                        raise ValueError(f"Stage {key!r} appears twice in route {name!r}")
+                    next_step[index[key]] = following
+                if rework == END and any(key in rework_keys for key in keys):
+                    rework = base + offset
+                if cutting == END and any(key in is_cutting for key in keys):
+                    cutting = base + offset
+                self.step_stages.append(tuple(index[key] for key in keys))
+                self.step_probability.append(probability)
+                self.skip_step.append(following)
+                self.round_robin.append(0)
+            self.first_step.append(base)
+            self.next_step.append(next_step)
+            # Without a listed rework stage on the route, rework returns to its first cutting step
+            self.rework_step.append(rework if rework != END else cutting)
+
+    def route_of(self, item):
+        """Route ID for an item's supply type (the "*" route is the fallback)"""
+        route_id = self.route_ids.get(item.is_supplier)
+        if route_id is None:
+            route_id = self.route_ids.get("*")
+            if route_id is None:
+                raise KeyError(f"No route for supply type {item.is_supplier!r}")
+        return route_id
+
+    def _resolve(self, step):
+        """Stage that serves a step, skipping optional steps that are not visited"""
+        while step != END:
+            probability = self.step_probability[step]
+            if probability >= 1 or self.rng.random() < probability:
+                candidates = self.step_stages[step]
+                if len(candidates) == 1:
+                    return self.stages[candidates[0]]
+                return self._choose_cell(step, candidates)
+            step = self.skip_step[step]
+        return None
+
+    def _choose_cell(self, step, candidates):
+        if self.cell_rule == "ROUND_ROBIN":
+            turn = self.round_robin[step]
+            self.round_robin[step] = (turn + 1) % len(candidates)
+            return self.stages[candidates[turn]]
+        # Fewest units queued or in process per processor (first cell wins ties)
+        best, best_load = None, None
+        for k in candidates:
+            process = self.stages[k]
+            busy = sum(res.count for res in process.processor_resources.values())
+            load = (process.item_store.num_units + busy) / max(1, len(process.processor_resources))
+            if best_load is None or load < best_load:
+                best, best_load = process, load
+        return best
+
+    def entry(self, item):
+        """First stage of a newly released item (assigns its route)"""
+        item.route_id = self.route_of(item)
+        return self._resolve(self.first_step[item.route_id])
+
+    def next_process(self, item, stage_index):
+        """Stage after `stage_index` on the item's route (None when the route ends)"""
+        if item.is_defect and self.is_inspection[stage_index]:
+            # Already handed to the rework stage by the inspection
+            return None
+        return self._resolve(self.next_step[item.route_id][stage_index])
+
+    def rework_process(self, item):
+        """Stage a defective item returns to"""
+        step = self.rework_step[item.route_id]
+        if step == END:
+            raise ValueError(f"Route of item {item.id_item} (order {item.id_order}) has no rework stage")
+        return self._resolve(step)
+
+
+def build_routing(env, manager, logger, graph=None):
+    """
+    Create the stage processes of a routing graph and compile its table
+
+    Processor IDs continue across stages of the same type, so parallel cells
+    get distinct resource names (CNC_1, CNC_2 in one cell, CNC_3 in the next).
+
+    Returns:
+        tuple: (RoutingTable, {stage key: Process})
+    """
+    graph = DEFAULT_ROUTING_GRAPH if graph is None else graph
+    classes = stage_classes()
+    stages = {}
+    next_id = {}
+    used_names = set()
+    for key, spec in graph["stages"].items():
+        kind = spec["type"].upper()
+        if kind not in classes:
+            raise ValueError(f"Unknown stage type {spec['type']!r} of stage {key!r}")
+        cls, default_name = classes[kind]
+        name = spec.get("name")
+        if name is None:
+            name = default_name if default_name not in used_names else f"{default_name}_{key}"
+        used_names.add(name)
+        first_id = next_id.get(kind, 1)
+        kwargs = {"name_process": name, "num_processors": spec.get("num_processors"), "first_id": first_id}
+        if kind == "INSPECT":
+            process = cls(env, manager, logger, **kwargs)
+        else:
+            process = cls(env, logger, **kwargs)
+        next_id[kind] = first_id + len(process.processor_resources)
+        stages[key] = process
+    return RoutingTable(graph, stages), stages
@@ -0,0 +1,217 @@
+import contextlib
+import hashlib
+import inspect
+import io
+import json
+import os
+import random
+import sys
+import config_SimPy
+
+""" Scenario helpers: config snapshots, config hashing and isolated scenario runs """
+
+# Directory of the simulation model (modules whose star-imported config is patched)
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Overrides applied to every scenario run unless given explicitly
+SCENARIO_DEFAULTS = {
+    'EVENT_LOGGING': False,
+    'OUTPUT_ANALYSIS_ENABLED': False,
+}
+
+
+def _is_config_name(name):
+    return name.isupper() and not name.startswith('_')
+
+
+def config_snapshot(overrides=None):
+    """
+    Current config values (config_SimPy constants) with overrides applied
+
+    Returns:
+        dict: {NAME: value}
+    """
+    snapshot = {name: value for name, value in vars(config_SimPy).items()
+                if _is_config_name(name) and not inspect.ismodule(value)}
+    snapshot.update(overrides or {})
+    return snapshot
+
+
+def _canonical_value(value):
+    """JSON-serializable canonical form of a config value (functions by source)"""
+    if callable(value):
+        try:
+            return {'__callable__': inspect.getsource(value)}
+        except (OSError, TypeError):
+            return {'__callable__': getattr(value, '__qualname__', repr(value))}
+    if isinstance(value, dict):
+        return {str(k): _canonical_value(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [_canonical_value(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if hasattr(value, 'item'):  # NumPy scalar
+        return _canonical_value(value.item())
+    return value
+
+
+def config_hash(overrides=None):
+    """Canonical SHA-256 hash of the full config with overrides applied"""
+    canonical = json.dumps(_canonical_value(config_snapshot(overrides)), sort_keys=True)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _model_modules():
+    """Loaded modules that belong to the simulation model"""
+    for module in list(sys.modules.values()):
+        path = getattr(module, '__file__', None)
+        if path and os.path.dirname(os.path.abspath(path)) == MODEL_DIR:
+            yield module
+
+
+@contextlib.contextmanager
+def apply_config(overrides):
+    """
+    Temporarily apply config overrides
+
+    Every module does `from config_SimPy import *`, so a value is patched in
+    config_SimPy and in each model module that holds its own copy of the name.
+    """
+    saved = []
+    try:
+        for name, value in overrides.items():
+            if not hasattr(config_SimPy, name):
+                raise KeyError(f"Unknown config parameter: {name!r}")
+            for module in _model_modules():
+                if name in vars(module):
+                    saved.append((module, name, vars(module)[name]))
+                    setattr(module, name, value)
+        yield
+    finally:
+        for module, name, value in reversed(saved):
+            setattr(module, name, value)
+
+
+def model_code_version():
+    """SHA-256 over the source of every model module (part of the result cache key)"""
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(MODEL_DIR)):
+        if name.endswith('.py'):
+            with open(os.path.join(MODEL_DIR, name), 'rb') as f:
+                digest.update(name.encode())
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def scenario_trace(manager, sim_duration):
+    """Columnar per-process trace (queue length and cycle time) of a finished run"""
+    from stats_SimPy import queue_length_trace, cycle_time_trace
+
+    trace = {}
+    for proc in manager.get_processes().values():
+        times, lengths = queue_length_trace(proc)
+        ends, cycles = cycle_time_trace(proc)
+        trace[f'{proc.name_process}.queue_time'] = times
+        trace[f'{proc.name_process}.queue_length'] = lengths
+        trace[f'{proc.name_process}.cycle_end'] = ends
+        trace[f'{proc.name_process}.cycle_time'] = cycles
+    return trace
+
+
+def simulate(overrides=None, seed=42, sim_duration=None, quiet=True, env=None):
+    """
+    Run one scenario with overrides applied and return the finished Manager
+
+    Args:
+        env (simpy.Environment): Environment to run in (a new one by default)
+
+    Returns:
+        tuple: (manager, sim_duration)
+    """
+    from main import run_simulation
+
+    settings = dict(SCENARIO_DEFAULTS)
+    settings.update(overrides or {})
+    with apply_config(settings):
+        duration = config_SimPy.SIM_TIME if sim_duration is None else sim_duration
+        random.seed(seed)
+        output = io.StringIO() if quiet else sys.stdout
+        with contextlib.redirect_stdout(output):
+            manager = run_simulation(duration, env)
+    return manager, duration
+
+
+def run_fast_backend(overrides=None, seed=42, sim_duration=None, required=False):
+    """
+    KPIs from the NumPy recurrence engine (None if the scenario does not qualify)
+    """
+    import fastsim_SimPy
+
+    settings = dict(SCENARIO_DEFAULTS)
+    settings.update(overrides or {})
+    with apply_config(settings):
+        if not fastsim_SimPy.fast_backend_qualifies():
+            if required:
+                raise ValueError("Scenario does not qualify for the fast backend")
+            return None
+        duration = config_SimPy.SIM_TIME if sim_duration is None else sim_duration
+        random.seed(seed)
+        return fastsim_SimPy.run_fast_scenario(duration)
+
+
+def run_kernel_backend(overrides=None, seed=42, sim_duration=None):
+    """
+    KPIs from the heap-based event kernel (same trace as SimPy for the same seed)
+    """
+    import kernel_SimPy
+    from stats_SimPy import summarize_kpis
+
+    settings = dict(SCENARIO_DEFAULTS)
+    settings.update(overrides or {})
+    with apply_config(settings):
+        duration = config_SimPy.SIM_TIME if sim_duration is None else sim_duration
+        random.seed(seed)
+        line, _ = kernel_SimPy.run_kernel(duration)
+        return summarize_kpis(line, duration)
+
+
+def run_scenario(overrides=None, seed=42, sim_duration=None, quiet=True, cache=None, with_trace=False,
+                 backend="auto"):
+    """
+    Run one scenario in isolation and return its KPI summary
+
+    Args:
+        overrides (dict): Config overrides {NAME: value}
+        seed (int): Random seed
+        sim_duration (float): Simulation horizon (defaults to SIM_TIME)
+        quiet (bool): Suppress printed output
+        cache (ResultCache): Optional result cache consulted before simulating
+        with_trace (bool): Also return the columnar trace of the run
+        backend (str): "simpy", "kernel" (heap-based event kernel), "fast" (NumPy recurrence engine) or "auto"
+            (fast engine whenever the scenario qualifies and no trace is requested)
+
+    Returns:
+        dict: KPI name -> value (or (kpis, trace) when with_trace is set)
+    """
+    from stats_SimPy import summarize_kpis
+
+    if cache is not None:
+        hit = cache.get(overrides, seed, sim_duration, with_trace=with_trace, backend=backend)
+        if hit is not None:
+            return hit
+
+    kpis = None
+    if backend == "kernel" and not with_trace:
+        kpis = run_kernel_backend(overrides, seed, sim_duration)
+    elif backend != "simpy" and not with_trace:
+        kpis = run_fast_backend(overrides, seed, sim_duration, required=(backend == "fast"))
+    if kpis is None:
+        manager, duration = simulate(overrides, seed, sim_duration, quiet)
+        kpis = summarize_kpis(manager, duration)
+        trace = scenario_trace(manager, duration) if with_trace else None
+    else:
+        trace = None
+
+    if cache is not None:
+        cache.put(overrides, seed, sim_duration, kpis, trace, backend=backend)
+    return (kpis, trace) if with_trace else kpis
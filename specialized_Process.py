@@ -9,20 +9,43 @@ class Proc_Cutting(Process):
     inherits from Process class
     """
     
-    def __init__(self, env, logger=None):
-        super().__init__("Proc_Cutting", env, logger)
+    def __init__(self, env, logger=None, name_process="Proc_Cutting", num_processors=None, first_id=1):
+        super().__init__(name_process, env, logger)
         
         # Initialize CNC machines
-        for i in range(NUM_MACHINES_CNC):
-            self.register_processor(Mach_CNC(i+1))
+        num_processors = NUM_MACHINES_CNC if num_processors is None else num_processors
+        for i in range(first_id, first_id + num_processors):
+            self.register_processor(Mach_CNC(i))
     
+    def consumes_random(self):
+        return self.rng is random and DEFECT_RATE_PROC_BUILD > 0
+
+    def can_trigger_rework(self):
+        # Defective items are sent back by the inspection
+        return DEFECT_RATE_PROC_BUILD > 0
+
     def apply_special_processing(self, processor, items):
         """CNC special processing - possibility of defects"""
-        for item in items:
-            if random.random() < DEFECT_RATE_PROC_BUILD:
-                item.is_defect = True
-            else:
+        if DEFECT_RATE_PROC_BUILD <= 0:
+            # No draws: the global random stream stays with the order stream
+            for item in items:
                 item.is_defect = False
+            return True
+        for item in list(items):
+            if item.quantity == 1:
+                if self.rng.random() < DEFECT_RATE_PROC_BUILD:
+                    item.is_defect = True
+                else:
+                    item.is_defect = False
+                continue
+
+            # Aggregated entity: one draw per unit, defective units split off
+            num_defects = sum(self.rng.random() < DEFECT_RATE_PROC_BUILD for _ in range(item.quantity))
+            item.is_defect = num_defects == item.quantity
+            if 0 < num_defects < item.quantity:
+                defective = item.split(num_defects)
+                defective.is_defect = True
+                items.append(defective)
         return True
     
 class Proc_Inspect(Process):
@@ -31,14 +54,18 @@ class Proc_Inspect(Process):
     inherits from Process class
     """
     
-    def __init__(self, env, manager=None, logger=None):
-        super().__init__("Proc_Inspect", env, logger)
+    def __init__(self, env, manager=None, logger=None, name_process="Proc_Inspect", num_processors=None, first_id=1):
+        super().__init__(name_process, env, logger)
 
         self.manager = manager
 
         # Initialize inspection workers
-        for i in range(NUM_WORKERS_IN_INSPECT):
-            self.register_processor(Worker_Inspect(i+1))
+        num_processors = NUM_WORKERS_IN_INSPECT if num_processors is None else num_processors
+        for i in range(first_id, first_id + num_processors):
+            self.register_processor(Worker_Inspect(i))
+
+    def can_trigger_rework(self):
+        return DEFECT_RATE_PROC_BUILD > 0
 
     def apply_special_processing(self, processor, items):
         """Inspection process special processing - defect identification"""
@@ -65,11 +92,12 @@ class Proc_Amr_STC(Process):
     Transport from Supplier → CNC
     inherits from Process class
     """
-    def __init__(self, env, logger=None):
-        super().__init__("Proc_AMR_STC", env, logger)
+    def __init__(self, env, logger=None, name_process="Proc_AMR_STC", num_processors=None, first_id=1):
+        super().__init__(name_process, env, logger)
         # STC 전용 AMR 등록
-        for i in range(NUM_STC_MACHINES_AMR):
-            self.register_processor(Mach_AMR1(i+1))
+        num_processors = NUM_STC_MACHINES_AMR if num_processors is None else num_processors
+        for i in range(first_id, first_id + num_processors):
+            self.register_processor(Mach_AMR1(i))
 
 
 class Proc_Amr_CTI(Process):
@@ -77,8 +105,9 @@ class Proc_Amr_CTI(Process):
     Transport from CNC → Inspect
     inherits from Process class
     """
-    def __init__(self, env, logger=None):
-        super().__init__("Proc_AMR_CTI", env, logger)
+    def __init__(self, env, logger=None, name_process="Proc_AMR_CTI", num_processors=None, first_id=1):
+        super().__init__(name_process, env, logger)
         # CTI 전용 AMR 등록
-        for j in range(NUM_CTI_MACHINES_AMR):
-            self.register_processor(Mach_AMR2(j+1))
\ No newline at end of file
+        num_processors = NUM_CTI_MACHINES_AMR if num_processors is None else num_processors
+        for j in range(first_id, first_id + num_processors):
+            self.register_processor(Mach_AMR2(j))
\ No newline at end of file
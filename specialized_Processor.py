@@ -11,8 +11,10 @@ class Mach_CNC(Machine):
 
 class Mach_AMR1(AMR):
     def __init__(self, id_amr):
-        super().__init__(id_amr, f"STC_AMR_LOT{id_amr}", STC_PROC_TIME_TRANSIT, CAPACITY_MACHINE_AMR)
+        super().__init__(id_amr, f"STC_AMR_LOT{id_amr}", STC_PROC_TIME_TRANSIT, CAPACITY_MACHINE_AMR,
+                         AMR_BATCH_POLICY, AMR_BATCH_MAX_WAIT, AMR_BATCH_MIN_SIZE)
              
 class Mach_AMR2(AMR):
     def __init__(self, id_amr):
-        super().__init__(id_amr, f"CTI_AMR_{id_amr}", CTI_PROC_TIME_TRANSIT, CAPACITY_MACHINE_AMR)
\ No newline at end of file
+        super().__init__(id_amr, f"CTI_AMR_{id_amr}", CTI_PROC_TIME_TRANSIT, CAPACITY_MACHINE_AMR,
+                         AMR_BATCH_POLICY, AMR_BATCH_MAX_WAIT, AMR_BATCH_MIN_SIZE)
\ No newline at end of file
@@ -0,0 +1,449 @@
+import math
+from statistics import NormalDist
+import numpy as np
+from config_SimPy import *
+
+""" Output analysis for single long runs (warm-up deletion + batch means) """
+
+
+# Degrees of freedom up to which t_quantile inverts the exact CDF
+T_EXACT_MAX_DOF = 30
+
+
+def t_cdf(t, dof):
+    """
+    Student-t CDF for an integer number of degrees of freedom
+
+    Finite series in theta = atan(t / sqrt(dof)) (Abramowitz & Stegun 26.7.3-4).
+    """
+    theta = math.atan(abs(t) / math.sqrt(dof))
+    c2 = math.cos(theta) ** 2
+    if dof % 2:
+        term, total = 1.0, 1.0
+        for k in range(2, dof - 1, 2):
+            term *= c2 * k / (k + 1)
+            total += term
+        a = 2 / math.pi * (theta + (math.sin(theta) * math.cos(theta) * total if dof > 1 else 0.0))
+    else:
+        term, total = 1.0, 1.0
+        for k in range(1, dof - 2, 2):
+            term *= c2 * k / (k + 1)
+            total += term
+        a = math.sin(theta) * total
+    return 0.5 + math.copysign(a / 2, t)
+
+
+def t_quantile(p, dof):
+    """
+    Student-t quantile without SciPy
+
+    Up to T_EXACT_MAX_DOF degrees of freedom the exact CDF is inverted by
+    bisection; above, the Cornish-Fisher expansion around the normal
+    quantile is accurate to better than 1e-5.
+
+    Args:
+        p (float): Probability (e.g. 0.975 for a two-sided 95% interval)
+        dof (int): Degrees of freedom
+    """
+    if dof <= 0:
+        return math.inf
+    if dof <= T_EXACT_MAX_DOF and dof == int(dof):
+        if p < 0.5:
+            return -t_quantile(1 - p, dof)
+        low, high = 0.0, 1.0
+        while t_cdf(high, int(dof)) < p:
+            low, high = high, 2 * high
+        for _ in range(100):
+            mid = (low + high) / 2
+            if t_cdf(mid, int(dof)) < p:
+                low = mid
+            else:
+                high = mid
+        return (low + high) / 2
+    z = NormalDist().inv_cdf(p)
+    g1 = (z**3 + z) / 4
+    g2 = (5 * z**5 + 16 * z**3 + 3 * z) / 96
+    g3 = (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / 384
+    g4 = (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z) / 92160
+    return z + g1 / dof + g2 / dof**2 + g3 / dof**3 + g4 / dof**4
+
+
+def ks_two_sample(a, b):
+    """
+    Two-sample Kolmogorov-Smirnov statistic and asymptotic p-value without SciPy
+
+    Returns:
+        tuple: (D, p_value), (nan, nan) when either sample is empty
+    """
+    a = np.sort(np.asarray(a, dtype=float))
+    b = np.sort(np.asarray(b, dtype=float))
+    if len(a) == 0 or len(b) == 0:
+        return math.nan, math.nan
+    grid = np.concatenate((a, b))
+    d = float(np.max(np.abs(np.searchsorted(a, grid, side='right') / len(a)
+                            - np.searchsorted(b, grid, side='right') / len(b))))
+    # Kolmogorov distribution with the Stephens small-sample correction
+    en = math.sqrt(len(a) * len(b) / (len(a) + len(b)))
+    lam = (en + 0.12 + 0.11 / en) * d
+    if lam < 0.2:
+        return d, 1.0
+    p = 2 * sum((-1) ** (k - 1) * math.exp(-2 * k * k * lam * lam) for k in range(1, 101))
+    return d, min(1.0, max(0.0, p))
+
+
+def mser_truncation(values, batch_size=MSER_BATCH_SIZE):
+    """
+    MSER-m warm-up detection (MSER-5 by default)
+
+    The series is averaged into non-overlapping batches of `batch_size`, and the
+    truncation point d minimizing Var(remaining) / (n - d) is returned, searched
+    over the first half of the batched series only.
+
+    Args:
+        values (array-like): Output series in observation order
+        batch_size (int): Batch size m of MSER-m
+
+    Returns:
+        int: Number of raw observations to delete as warm-up
+    """
+    values = np.asarray(values, dtype=float)
+    num_batches = len(values) // batch_size
+    if num_batches < 2:
+        return 0
+
+    batched = values[:num_batches * batch_size].reshape(num_batches, batch_size).mean(axis=1)
+
+    # Suffix sums give the mean/variance of every truncated tail in one pass
+    suffix_sum = np.cumsum(batched[::-1])[::-1]
+    suffix_sq = np.cumsum((batched**2)[::-1])[::-1]
+    remaining = np.arange(num_batches, 0, -1, dtype=float)
+    tail_mean = suffix_sum / remaining
+    tail_sse = suffix_sq - remaining * tail_mean**2
+    mser = tail_sse / remaining**2
+
+    # Only truncations that keep at least half the data are admissible
+    search_limit = max(1, num_batches // 2)
+    best = int(np.argmin(mser[:search_limit]))
+    return best * batch_size
+
+
+def batch_means_ci(values, num_batches=NUM_BATCH_MEANS, confidence=CONFIDENCE_LEVEL):
+    """
+    Batch-means confidence interval for the steady-state mean of a single run
+
+    Args:
+        values (array-like): Output series after warm-up deletion
+        num_batches (int): Number of batches
+        confidence (float): Confidence level of the interval
+
+    Returns:
+        dict: mean, half_width, ci_low, ci_high, num_batches, batch_size
+    """
+    values = np.asarray(values, dtype=float)
+    batch_size = len(values) // num_batches if num_batches > 0 else 0
+    if batch_size == 0:
+        mean = float(values.mean()) if len(values) else math.nan
+        return {'mean': mean, 'half_width': math.nan, 'ci_low': math.nan,
+                'ci_high': math.nan, 'num_batches': 0, 'batch_size': 0}
+
+    # Drop the oldest observations so every batch has the same size
+    used = values[len(values) - num_batches * batch_size:]
+    means = used.reshape(num_batches, batch_size).mean(axis=1)
+    mean = float(means.mean())
+    std_err = float(means.std(ddof=1)) / math.sqrt(num_batches)
+    half_width = t_quantile(0.5 + confidence / 2, num_batches - 1) * std_err
+    return {'mean': mean, 'half_width': half_width, 'ci_low': mean - half_width,
+            'ci_high': mean + half_width, 'num_batches': num_batches, 'batch_size': batch_size}
+
+
+def queue_length_trace(process):
+    """
+    Columnar queue-length trace of a process
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (times, queue lengths) in record order
+    """
+    history = process.item_store.queue_length_history
+    times = np.fromiter((t for t, _ in history), dtype=float, count=len(history))
+    lengths = np.fromiter((n for _, n in history), dtype=float, count=len(history))
+    return times, lengths
+
+
+def binned_queue_length(times, lengths, bin_width=QUEUE_BIN_WIDTH, until=None):
+    """
+    Time-averaged queue length per fixed-width time bin (piecewise-constant trace)
+
+    Args:
+        times (np.ndarray): Change times of the queue length
+        lengths (np.ndarray): Queue length after each change
+        bin_width (float): Width of each time bin (unit: minutes)
+        until (float): End of the observation window (defaults to the last change)
+
+    Returns:
+        np.ndarray: Average queue length of every bin
+    """
+    if len(times) == 0:
+        return np.zeros(0)
+    end = float(times[-1]) if until is None else float(until)
+    num_bins = int(math.ceil(end / bin_width)) if end > 0 else 0
+    if num_bins == 0:
+        return np.zeros(0)
+
+    # Area under the step function, accumulated at every change point
+    seg_end = np.append(times[1:], end)
+    seg_len = np.clip(seg_end - times, 0, None)
+    area = np.concatenate(([0.0], np.cumsum(seg_len * lengths)))
+    starts = np.concatenate((times, [end]))
+
+    # Integrate the step function up to every bin edge
+    edges = np.minimum(np.arange(num_bins + 1, dtype=float) * bin_width, end)
+    idx = np.searchsorted(starts, edges, side='right') - 1
+    valid = idx >= 0
+    idx_c = np.clip(idx, 0, len(times) - 1)
+    area_at_edges = np.where(
+        valid, area[idx_c] + (edges - starts[idx_c]) * lengths[idx_c], 0.0)
+    widths = np.diff(edges)
+    widths[widths == 0] = 1.0
+    return np.diff(area_at_edges) / widths
+
+
+def cycle_time_trace(process):
+    """
+    Columnar cycle-time trace (waiting + processing) of every visit to a process
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (completion times, cycle times) sorted by completion time
+    """
+    ends, cycles = [], []
+    seen = set()
+    for item in process.completed_items:
+        # completed_items holds a revisited (reworked) item once per visit
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        waits = [s for s in item.waiting_history if s['process'] == process.name_process]
+        procs = [s for s in item.processing_history
+                 if s['process'] == process.name_process and s['end_time'] is not None]
+        for wait, proc in zip(waits, procs):
+            ends.append(proc['end_time'])
+            cycles.append(proc['end_time'] - wait['start_time'])
+
+    ends = np.asarray(ends, dtype=float)
+    cycles = np.asarray(cycles, dtype=float)
+    order = np.argsort(ends, kind='stable')
+    return ends[order], cycles[order]
+
+
+def analyze_series(values):
+    """Warm-up deletion followed by a batch-means interval"""
+    values = np.asarray(values, dtype=float)
+    warmup = mser_truncation(values)
+    result = batch_means_ci(values[warmup:])
+    result['warmup'] = warmup
+    result['num_observations'] = len(values)
+    return result
+
+
+def analyze_process(process, sim_duration):
+    """
+    Output analysis of the queue-length and cycle-time series of one process
+
+    Returns:
+        dict: {'queue_length': {...}, 'cycle_time': {...}}
+    """
+    times, lengths = queue_length_trace(process)
+    queue_series = binned_queue_length(times, lengths, until=sim_duration)
+    retention = getattr(process, 'retention', None)
+    if retention is not None:
+        # Completed items are retired; the accumulator keeps the recent visits
+        cycles = retention.processes[process.name_process].cycle_times
+    else:
+        _, cycles = cycle_time_trace(process)
+    return {
+        'queue_length': analyze_series(queue_series),
+        'cycle_time': analyze_series(cycles),
+    }
+
+
+def analyze_manager(manager, sim_duration):
+    """Output analysis of every process of the manager"""
+    return {
+        proc.name_process: analyze_process(proc, sim_duration)
+        for proc in manager.get_processes().values()
+    }
+
+
+def print_output_analysis(results):
+    """Print warm-up and confidence interval summary"""
+    print("\n================ Output Analysis (MSER-5 + Batch Means) ================")
+    for name_process, series in results.items():
+        for name_series, res in series.items():
+            print(f"{name_process:<14} {name_series:<13} "
+                  f"n={res['num_observations']:<7} warm-up={res['warmup']:<6} "
+                  f"mean={res['mean']:.3f} ± {res['half_width']:.3f}")
+
+
+def busy_intervals(process):
+    """
+    Distinct busy intervals of every resource of a process (a batch shares one interval)
+
+    Returns:
+        dict: {resource_name: np.ndarray of shape (n, 2) with (start, end)}
+    """
+    intervals = {name: set() for name in
+                 (res.name for res in process.processor_resources.values())}
+    seen = set()
+    for item in process.completed_items:
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        for step in item.processing_history:
+            if step['process'] == process.name_process and step['end_time'] is not None:
+                intervals.setdefault(step['resource_name'], set()).add(
+                    (step['start_time'], step['end_time']))
+    return {name: np.array(sorted(spans), dtype=float).reshape(-1, 2)
+            for name, spans in intervals.items()}
+
+
+def disjoint_intervals(spans):
+    """Possibly overlapping (start, end) intervals clipped into disjoint ones"""
+    if len(spans) == 0:
+        return spans.reshape(0, 2)
+    spans = spans[np.argsort(spans[:, 0], kind='stable')]
+    # Clip every interval at the furthest end reached by the intervals before it
+    prev_end = np.maximum.accumulate(np.concatenate(([-np.inf], spans[:-1, 1])))
+    starts = np.maximum(spans[:, 0], prev_end)
+    keep = spans[:, 1] > starts
+    return np.stack((starts[keep], spans[keep, 1]), axis=1)
+
+
+def union_length(spans):
+    """Total length covered by possibly overlapping (start, end) intervals"""
+    spans = disjoint_intervals(spans)
+    return float((spans[:, 1] - spans[:, 0]).sum())
+
+
+def process_utilization(process, sim_duration):
+    """
+    Average fraction of on-shift time the resources of a process are busy
+
+    Resources with a shift calendar only count working time, so off-shift
+    time is excluded from both the busy time and the available time.
+    """
+    intervals = busy_intervals(process)
+    if not intervals or sim_duration <= 0:
+        return 0.0
+    calendars = {res.name: getattr(res, 'calendar', None)
+                 for res in process.processor_resources.values()}
+    busy = available = 0.0
+    for name, spans in intervals.items():
+        calendar = calendars.get(name)
+        if calendar is None:
+            busy += union_length(spans)
+            available += sim_duration
+        else:
+            spans = disjoint_intervals(np.clip(spans, 0, sim_duration))
+            work = calendar.working_time_array(spans.ravel()).reshape(-1, 2)
+            busy += float((work[:, 1] - work[:, 0]).sum())
+            available += calendar.working_time_until(sim_duration)
+    return busy / available if available else 0.0
+
+
+def trip_statistics(process):
+    """
+    Per-trip load statistics of the AMR processors of a process
+
+    Returns:
+        dict: num_trips, num_items, mean_items_per_trip, mean_load_factor
+    """
+    trips = process.trip_history
+    if not trips:
+        return {'num_trips': 0, 'num_items': 0,
+                'mean_items_per_trip': math.nan, 'mean_load_factor': math.nan}
+    loads = np.fromiter((t['num_items'] for t in trips), dtype=float, count=len(trips))
+    factors = np.fromiter((t['load_factor'] for t in trips), dtype=float, count=len(trips))
+    return {'num_trips': len(trips), 'num_items': int(loads.sum()),
+            'mean_items_per_trip': float(loads.mean()), 'mean_load_factor': float(factors.mean())}
+
+
+def summarize_kpis(manager, sim_duration):
+    """
+    Flat KPI summary of a finished run (one row of a sweep/result table)
+
+    Returns:
+        dict: KPI name -> float
+    """
+    if getattr(manager, 'retention', None) is not None:
+        # Completed orders were retired into running accumulators
+        kpis = manager.retention.kpis(sim_duration)
+        _add_failure_kpis(kpis, manager)
+        return kpis
+
+    # Order item lists also hold entities split off aggregated lots
+    items = [item for order in manager.processed_orders for item in order.list_items]
+    completed = [item for item in items if item.is_completed]
+    cycle_times = np.repeat(
+        np.array([item.time_processing_end - item.waiting_history[0]['start_time'] for item in completed],
+                 dtype=float),
+        [getattr(item, 'quantity', 1) for item in completed])
+
+    # An order is complete when all of its items passed inspection
+    makespans = []
+    tardiness = []
+    num_overdue = 0
+    for order in manager.processed_orders:
+        if order.list_items and all(item.is_completed for item in order.list_items):
+            end = max(item.time_processing_end for item in order.list_items)
+            makespans.append(end - order.time_start)
+            if order.due_date is not None:
+                tardiness.append(order.tardiness(end))
+        elif order.due_date is not None and order.due_date < sim_duration:
+            num_overdue += 1
+    makespans = np.array(makespans, dtype=float)
+
+    kpis = {
+        'num_orders': float(len(manager.processed_orders)),
+        'num_items_released': float(sum(getattr(item, 'quantity', 1) for item in items)),
+        'num_items_completed': float(len(cycle_times)),
+        'num_orders_completed': float(len(makespans)),
+        'throughput_per_day': len(cycle_times) / sim_duration * 24 * 60 if sim_duration else 0.0,
+        'mean_cycle_time': float(cycle_times.mean()) if len(cycle_times) else math.nan,
+        'mean_makespan': float(makespans.mean()) if len(makespans) else math.nan,
+        'max_makespan': float(makespans.max()) if len(makespans) else math.nan,
+    }
+    if any(order.due_date is not None for order in manager.processed_orders):
+        tardiness = np.array(tardiness, dtype=float)
+        add_due_date_kpis(kpis, len(tardiness), float(tardiness.sum()), int((tardiness == 0).sum()), num_overdue)
+    for proc in manager.get_processes().values():
+        kpis[f'utilization_{proc.name_process}'] = process_utilization(proc, sim_duration)
+        if proc.trip_history:
+            trips = trip_statistics(proc)
+            kpis[f'num_trips_{proc.name_process}'] = float(trips['num_trips'])
+            kpis[f'load_factor_{proc.name_process}'] = trips['mean_load_factor']
+    _add_failure_kpis(kpis, manager)
+    return kpis
+
+
+def add_due_date_kpis(kpis, num_completed, tardiness_sum, num_on_time, num_overdue):
+    """
+    Due-date KPIs (added only when the run's orders carry due dates)
+
+    Args:
+        num_completed (int): Completed orders with a due date
+        tardiness_sum (float): Sum of their tardiness (time finished past the due date)
+        num_on_time (int): Those finished by their due date
+        num_overdue (int): Open orders already past their due date at the end of the run
+    """
+    kpis['mean_tardiness'] = tardiness_sum / num_completed if num_completed else math.nan
+    kpis['on_time_rate'] = num_on_time / num_completed if num_completed else math.nan
+    kpis['num_orders_overdue'] = float(num_overdue)
+
+
+def _add_failure_kpis(kpis, manager):
+    """Availability KPIs of the breakdown model (when enabled)"""
+    if getattr(manager, 'failure_manager', None) is not None:
+        report = manager.failure_manager.availability()
+        if report:
+            kpis['mean_availability'] = float(np.mean([r['availability'] for r in report.values()]))
+            kpis['lost_capacity'] = float(sum(r['lost_capacity'] for r in report.values()))
+            kpis['num_failures'] = float(sum(r['num_failures'] for r in report.values()))
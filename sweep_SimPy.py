@@ -0,0 +1,207 @@
+import csv
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from config_SimPy import *
+from scenario_SimPy import config_hash, run_scenario
+from cache_SimPy import ResultCache
+
+""" Parameter sweep / design-of-experiments API """
+
+# Parameters swept by default (resource counts, capacities and order cycle)
+SWEEP_PARAMETERS = [
+    'NUM_MACHINES_CNC',
+    'NUM_STC_MACHINES_AMR',
+    'NUM_CTI_MACHINES_AMR',
+    'NUM_WORKERS_IN_INSPECT',
+    'CAPACITY_MACHINE_AMR',
+    'CUST_ORDER_CYCLE',
+]
+
+
+def full_factorial(space):
+    """
+    Full-factorial design
+
+    Args:
+        space (dict): {NAME: list of levels}
+
+    Returns:
+        list[dict]: One override dict per design point
+    """
+    names = list(space)
+    return [dict(zip(names, levels)) for levels in itertools.product(*(space[n] for n in names))]
+
+
+def latin_hypercube(space, num_points, seed=None):
+    """
+    Latin hypercube design
+
+    Args:
+        space (dict): {NAME: (low, high)} range or list of discrete levels.
+            Integer ranges produce integer values.
+        num_points (int): Number of design points
+        seed (int): Random seed of the design
+
+    Returns:
+        list[dict]: One override dict per design point
+    """
+    rng = random.Random(seed)
+    points = [{} for _ in range(num_points)]
+    for name, domain in space.items():
+        # One sample per stratum, strata shuffled independently per dimension
+        strata = list(range(num_points))
+        rng.shuffle(strata)
+        for point, stratum in zip(points, strata):
+            u = (stratum + rng.random()) / num_points
+            if isinstance(domain, tuple):
+                low, high = domain
+                if isinstance(low, int) and isinstance(high, int):
+                    point[name] = min(high, low + int(u * (high - low + 1)))
+                else:
+                    point[name] = low + u * (high - low)
+            else:
+                point[name] = domain[min(len(domain) - 1, int(u * len(domain)))]
+    return points
+
+
+def _run_point(overrides, seed, sim_duration, cache_path=None):
+    """Worker entry point (top level so it can be pickled)"""
+    cache = ResultCache(cache_path) if cache_path else None
+    try:
+        return overrides, seed, run_scenario(overrides, seed, sim_duration, cache=cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def _point_hash(overrides, sim_duration=None):
+    """Config hash of a design point run over `sim_duration` (as in ResultCache.make_key)"""
+    settings = dict(overrides)
+    if sim_duration is not None:
+        settings['SIM_TIME'] = sim_duration
+    return config_hash(settings)
+
+
+def _finished_keys(output_path):
+    """(config_hash, seed) pairs already present in the result table"""
+    if not os.path.exists(output_path):
+        return set()
+    with open(output_path, newline='') as f:
+        return {(row['config_hash'], int(row['seed'])) for row in csv.DictReader(f)}
+
+
+def _result_row(overrides, seed, kpis, sim_duration=None):
+    """One result table row: config hash, seed, swept parameters, then KPIs"""
+    row = {'config_hash': _point_hash(overrides, sim_duration), 'seed': seed}
+    row.update({name: overrides.get(name, globals().get(name)) for name in SWEEP_PARAMETERS})
+    row.update({name: value for name, value in overrides.items() if name not in row})
+    row.update(kpis)
+    return row
+
+
+class ResultTableWriter:
+    """
+    Streams sweep results into one CSV table as they finish
+
+    With a `.parquet` output path, rows are streamed into a companion CSV file
+    and the table is converted to Parquet when the writer is closed. A row
+    with columns the table does not have yet (e.g. a new KPI) rewrites the
+    table with the extended header; earlier rows leave those columns empty.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.is_parquet = output_path.endswith('.parquet')
+        self.csv_path = output_path + '.csv' if self.is_parquet else output_path
+        self.fieldnames = None
+        if os.path.exists(self.csv_path) and os.path.getsize(self.csv_path) > 0:
+            with open(self.csv_path, newline='') as f:
+                self.fieldnames = next(csv.reader(f))
+        self.file = open(self.csv_path, 'a', newline='')
+        self.writer = None if self.fieldnames is None else csv.DictWriter(self.file, self.fieldnames)
+
+    def write(self, row):
+        """Append one result row and flush it to disk"""
+        if self.fieldnames is None:
+            self.fieldnames = list(row)
+            self.writer = csv.DictWriter(self.file, self.fieldnames)
+            self.writer.writeheader()
+        else:
+            new_fields = [name for name in row if name not in self.fieldnames]
+            if new_fields:
+                self._extend_header(new_fields)
+        self.writer.writerow(row)
+        self.file.flush()
+
+    def _extend_header(self, new_fields):
+        """Rewrite the table with extra columns appended to the header"""
+        self.file.close()
+        with open(self.csv_path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.fieldnames = self.fieldnames + new_fields
+        tmp_path = self.csv_path + '.tmp'
+        with open(tmp_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, self.fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(tmp_path, self.csv_path)
+        self.file = open(self.csv_path, 'a', newline='')
+        self.writer = csv.DictWriter(self.file, self.fieldnames)
+
+    def close(self):
+        self.file.close()
+        if self.is_parquet and os.path.exists(self.csv_path):
+            import pandas as pd
+            pd.read_csv(self.csv_path).to_parquet(self.output_path, index=False)
+
+
+def run_sweep(points, seeds=(42,), output_path="sweep_results.csv",
+              max_workers=None, sim_duration=None, cache_path=None):
+    """
+    Run every (design point, seed) pair over a process pool
+
+    Points whose (config hash, seed) already appear in the output table are
+    skipped, so an interrupted or extended sweep only runs what is missing.
+    The hash includes the horizon, so a table can hold runs of several horizons.
+
+    Args:
+        points (list[dict]): Config overrides of each design point
+        seeds (iterable[int]): Random seeds (replications) per point
+        output_path (str): CSV (or .parquet) result table
+        max_workers (int): Size of the process pool (defaults to CPU count)
+        sim_duration (float): Simulation horizon (defaults to SIM_TIME)
+        cache_path (str): Optional ResultCache file shared with other sweeps and notebooks
+
+    Returns:
+        int: Number of newly simulated runs
+    """
+    finished = _finished_keys(output_path + '.csv' if output_path.endswith('.parquet') else output_path)
+    jobs = []
+    for overrides in points:
+        key = _point_hash(overrides, sim_duration)
+        for seed in seeds:
+            if (key, seed) not in finished:
+                finished.add((key, seed))
+                jobs.append((overrides, seed))
+
+    writer = ResultTableWriter(output_path)
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(_run_point, overrides, seed, sim_duration, cache_path)
+                       for overrides, seed in jobs]
+            for future in as_completed(futures):
+                overrides, seed, kpis = future.result()
+                writer.write(_result_row(overrides, seed, kpis, sim_duration))
+    finally:
+        writer.close()
+    return len(jobs)
+
+
+if __name__ == "__main__":
+    design = full_factorial({
+        'NUM_MACHINES_CNC': [1, 2, 3],
+        'NUM_WORKERS_IN_INSPECT': [1, 5],
+    })
+    print(f"Simulated {run_sweep(design, seeds=(42, 43))} runs")
@@ -0,0 +1,223 @@
+import argparse
+import json
+import queue
+import socket
+import threading
+import time
+from config_SimPy import *
+
+""" Live telemetry: periodic snapshots of a running simulation sent over a local socket """
+
+
+def parse_address(address):
+    """("host", port) tuple, "host:port" string or Unix socket path -> (family, address)"""
+    if isinstance(address, (tuple, list)):
+        return socket.AF_INET, (address[0], int(address[1]))
+    if ':' in address and not address.startswith('/'):
+        host, port = address.rsplit(':', 1)
+        return socket.AF_INET, (host, int(port))
+    return socket.AF_UNIX, address
+
+
+class TelemetryPublisher:
+    """
+    Publishes compact JSON snapshots (one per line) to a dashboard or viewer
+
+    Snapshots are taken every `sim_interval` sim-minutes by a SimPy process
+    and/or every `wall_interval` wall-seconds by a sampler thread. They only
+    read counters (queue lengths, resource users, completed units), so taking
+    one is cheap. Frames go into a bounded queue; a sender thread coalesces
+    them to the newest one, enforces `max_rate` frames per second and writes
+    to the socket. The simulation never waits on the network: when the queue
+    is full or the viewer is unreachable, frames are dropped and counted.
+
+    Attributes:
+        env (simpy.Environment): Simulation environment
+        manager (Manager): Manager of the running simulation
+        address: Socket address of the viewer
+        sim_interval (float): Sim-minutes between snapshots (None = off)
+        wall_interval (float): Wall-seconds between snapshots (None = off)
+        max_rate (float): Upper bound of frames sent per wall-second
+        frames (queue.Queue): Snapshots waiting for the sender thread
+        num_sent (int): Frames written to the socket
+        num_dropped (int): Frames dropped (queue full, rate limit or no connection)
+    """
+
+    def __init__(self, env, manager, address=None, sim_interval=None, wall_interval=None,
+                 max_rate=None, queue_size=None):
+        self.env = env
+        self.manager = manager
+        self.address = TELEMETRY_ADDRESS if address is None else address
+        self.sim_interval = TELEMETRY_SIM_INTERVAL if sim_interval is None else sim_interval
+        self.wall_interval = TELEMETRY_WALL_INTERVAL if wall_interval is None else wall_interval
+        self.max_rate = TELEMETRY_MAX_RATE if max_rate is None else max_rate
+        self.frames = queue.Queue(maxsize=TELEMETRY_QUEUE_SIZE if queue_size is None else queue_size)
+        self.num_sent = 0
+        self.num_dropped = 0
+        self.wall_start = time.perf_counter()
+        self._stop = threading.Event()
+        self._sock = None
+        self._inspected = 0
+        self._completed = 0
+        self._lock = threading.Lock()
+
+        self.sender = threading.Thread(target=self._send_loop, name="telemetry-sender", daemon=True)
+        self.sender.start()
+        self.sampler = None
+        if self.wall_interval:
+            self.sampler = threading.Thread(target=self._wall_loop, name="telemetry-sampler", daemon=True)
+            self.sampler.start()
+        if self.sim_interval:
+            env.process(self._sim_loop())
+
+    def _completed_units(self):
+        """Units that passed inspection so far (incremental scan of the inspection record)"""
+        retention = getattr(self.manager, 'retention', None)
+        if retention is not None:
+            return retention.num_units_completed
+        inspected = self.manager.proc_inspect.completed_items
+        end = len(inspected)
+        for k in range(self._inspected, end):
+            item = inspected[k]
+            if item.is_completed:
+                self._completed += getattr(item, 'quantity', 1)
+        self._inspected = end
+        return self._completed
+
+    def snapshot(self):
+        """Current queue sizes, resource users and throughput"""
+        now = self.env.now
+        with self._lock:
+            completed = self._completed_units()
+        retention = getattr(self.manager, 'retention', None)
+        released = retention.num_units_released if retention is not None else len(self.manager.processed_items)
+        processes = {}
+        for process in self.manager.get_processes().values():
+            processes[process.name_process] = {
+                'queue': len(process.item_store.items),
+                'busy': {res.name: res.count for res in process.processor_resources.values()},
+                'down': [res.name for res in process.processor_resources.values()
+                         if getattr(res, 'down_until', None) is not None],
+            }
+        return {
+            'sim_time': now,
+            'wall_time': round(time.perf_counter() - self.wall_start, 3),
+            'released': released,
+            'completed': completed,
+            'throughput_per_day': completed / now * 24 * 60 if now else 0.0,
+            'processes': processes,
+        }
+
+    def publish(self, frame):
+        """Queue a snapshot without blocking (the oldest frame makes room when full)"""
+        try:
+            self.frames.put_nowait(frame)
+        except queue.Full:
+            try:
+                self.frames.get_nowait()
+                self.num_dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                self.frames.put_nowait(frame)
+            except queue.Full:
+                self.num_dropped += 1
+
+    def _sim_loop(self):
+        while True:
+            yield self.env.timeout(self.sim_interval)
+            self.publish(self.snapshot())
+
+    def _wall_loop(self):
+        # Only counters are read, so sampling from this thread does not disturb the run
+        while not self._stop.wait(self.wall_interval):
+            self.publish(self.snapshot())
+
+    def _connect(self):
+        family, address = parse_address(self.address)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(1.0)
+        try:
+            sock.connect(address)
+        except OSError:
+            sock.close()
+            return None
+        return sock
+
+    def _send_loop(self):
+        min_gap = 1.0 / self.max_rate if self.max_rate else 0.0
+        last_send = 0.0
+        next_connect = 0.0
+        while True:
+            try:
+                frame = self.frames.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    break
+                continue
+            # Rate limit, then coalesce the backlog to the newest frame
+            wait = last_send + min_gap - time.perf_counter()
+            if wait > 0 and not self._stop.is_set():
+                time.sleep(wait)
+            while True:
+                try:
+                    frame = self.frames.get_nowait()
+                    self.num_dropped += 1
+                except queue.Empty:
+                    break
+
+            if self._sock is None and time.perf_counter() >= next_connect:
+                self._sock = self._connect()
+                next_connect = time.perf_counter() + 1.0
+            if self._sock is None:
+                self.num_dropped += 1
+                continue
+            try:
+                self._sock.sendall(json.dumps(frame, separators=(',', ':')).encode() + b'\n')
+                self.num_sent += 1
+                last_send = time.perf_counter()
+            except OSError:
+                self._sock.close()
+                self._sock = None
+                self.num_dropped += 1
+
+    def close(self):
+        """Send a final snapshot, stop the threads and close the socket"""
+        self.publish(self.snapshot())
+        self._stop.set()
+        if self.sampler is not None:
+            self.sampler.join()
+        self.sender.join()
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+def serve_viewer(address=None, max_frames=None):
+    """Minimal CLI viewer: accept one publisher and print a line per snapshot"""
+    family, address = parse_address(TELEMETRY_ADDRESS if address is None else address)
+    server = socket.socket(family, socket.SOCK_STREAM)
+    if family == socket.AF_INET:
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.bind(address)
+    server.listen(1)
+    print(f"Waiting for telemetry on {address}")
+    conn, _ = server.accept()
+    count = 0
+    with conn, conn.makefile('rb') as stream:
+        for line in stream:
+            frame = json.loads(line)
+            queues = ' '.join(f"{name}={p['queue']}" for name, p in frame['processes'].items())
+            print(f"[{frame['sim_time']:>10.1f}] completed={frame['completed']} "
+                  f"tp/day={frame['throughput_per_day']:.1f} {queues}")
+            count += 1
+            if max_frames is not None and count >= max_frames:
+                break
+    server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Telemetry viewer for a running simulation")
+    parser.add_argument("--listen", default=None, help="host:port or Unix socket path (defaults to TELEMETRY_ADDRESS)")
+    args = parser.parse_args()
+    serve_viewer(args.listen)
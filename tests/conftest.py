@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The model modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Small supplier inventories keep Manager construction fast (tokens are never drawn)
+FAST_LINE = {'LOT_INVEN_LEVEL': 10, 'PALLET_INVEN_LEVEL': 10}
@@ -0,0 +1,69 @@
+import math
+import random
+import numpy as np
+from conftest import FAST_LINE
+
+
+def random_line_config(k, zero_time=False):
+    """Randomized line settings for equivalence tests (reproducible per k)"""
+    rng = random.Random(k)
+    transit = [0, 3] if zero_time else [1, 3]
+    return dict(
+        FAST_LINE,
+        NUM_MACHINES_CNC=rng.randint(1, 4),
+        NUM_STC_MACHINES_AMR=rng.randint(1, 3),
+        NUM_CTI_MACHINES_AMR=rng.randint(1, 3),
+        NUM_WORKERS_IN_INSPECT=rng.randint(1, 4),
+        CAPACITY_MACHINE_AMR=rng.randint(1, 5),
+        CUST_ORDER_CYCLE=rng.choice([5, 30, 120]),
+        PROC_TIME_CUTTING=rng.choice([0, 30, 90] if zero_time else [30, 90]),
+        PROC_TIME_INSPECT=rng.choice([0, 0, 5]),
+        STC_PROC_TIME_TRANSIT=rng.choice(transit),
+        CTI_PROC_TIME_TRANSIT=rng.choice(transit),
+    )
+
+
+def same_kpis(a, b):
+    """KPI dicts equal, NaN equal to NaN"""
+    if set(a) != set(b):
+        return False
+    return all(a[k] == b[k] or (isinstance(a[k], float) and math.isnan(a[k]) and math.isnan(b[k])) for k in a)
+
+
+def step_function(times, values):
+    """Value in force after every instant (intermediate samples within one instant dropped)"""
+    last = {}
+    for t, v in zip(times, values):
+        last[t] = v
+    return list(last), list(last.values())
+
+
+def run_trace(manager, sim_duration):
+    """Per-process queue (as a step function of time)/cycle traces and trip records of a finished run"""
+    from scenario_SimPy import scenario_trace
+
+    trace = {name: np.asarray(values).tolist() for name, values in scenario_trace(manager, sim_duration).items()}
+    for name in [name for name in trace if name.endswith('.queue_time')]:
+        base = name[:-len('.queue_time')]
+        trace[name], trace[base + '.queue_length'] = step_function(trace[name], trace[base + '.queue_length'])
+    trips = {p.name_process: p.trip_history for p in manager.get_processes().values()}
+    return trace, trips
+
+
+def random_order_size():
+    """Order size drawn from the global stream (used as NUM_ITEMS_PER_ORDER)"""
+    return random.randint(1, 4)
+
+
+def close_kpis(a, b, rel=1e-9):
+    """KPI dicts equal up to floating-point summation order, NaN equal to NaN"""
+    if set(a) != set(b):
+        return False
+    for k in a:
+        x, y = a[k], b[k]
+        if isinstance(x, float) and math.isnan(x):
+            if not (isinstance(y, float) and math.isnan(y)):
+                return False
+        elif not math.isclose(x, y, rel_tol=rel, abs_tol=1e-9):
+            return False
+    return True
@@ -0,0 +1,55 @@
+from conftest import FAST_LINE
+from calendar_SimPy import DAY, ShiftCalendar
+from scenario_SimPy import run_scenario, simulate
+
+DURATION = 7 * DAY
+SHIFTS = {
+    "Worker": {"shifts": [(6 * 60, 14 * 60)], "breaks": [(10 * 60, 10 * 60 + 30)], "closed_days": [5, 6]},
+    "Machine": {"shifts": [(8 * 60, 16 * 60)], "closed_days": [6]},
+}
+LINE = dict(FAST_LINE, CUST_ORDER_CYCLE=60, PROC_TIME_CUTTING=30, SHIFT_CALENDARS_ENABLED=True,
+            SHIFT_CALENDARS=SHIFTS)
+
+
+def test_zero_work_off_shift_waits_for_the_shift():
+    calendar = ShiftCalendar(**SHIFTS["Worker"])
+    assert calendar.next_working_time(7 * 60) == 7 * 60
+    assert calendar.next_working_time(10 * 60 + 10) == 10 * 60 + 30
+    assert calendar.next_working_time(3) == 6 * 60
+    # Friday evening -> Monday morning
+    assert calendar.next_working_time(4 * DAY + 20 * 60) == 7 * DAY + 6 * 60
+    assert calendar.finish_time(3, 0) == 6 * 60
+    assert calendar.finish_time(7 * 60, 0) == 7 * 60
+    assert calendar.finish_time(13 * 60, 90) == DAY + 6 * 60 + 30
+
+
+def test_steps_start_on_shift_and_take_working_time():
+    manager, _ = simulate(LINE, seed=1, sim_duration=DURATION)
+    checked = set()
+    for process in manager.get_processes().values():
+        calendars = {res.name: res.calendar for res in process.processor_resources.values()}
+        for item in process.completed_items:
+            for step in item.processing_history:
+                calendar = calendars.get(step['resource_name'])
+                if step['process'] != process.name_process or calendar is None:
+                    continue
+                assert calendar.next_working_time(step['start_time']) == step['start_time'], step
+                work = calendar.working_time(step['start_time'], step['end_time'])
+                expected = 30 if step['process'] == "Proc_Cutting" else 0
+                assert abs(work - expected) < 1e-9, step
+                checked.add(step['process'])
+    assert checked == {"Proc_Cutting", "Proc_Inspect"}
+
+
+def test_zero_time_inspection_follows_the_calendar():
+    line = dict(LINE, SHIFT_CALENDARS={"Worker": SHIFTS["Worker"]})
+    manager, _ = simulate(line, seed=1, sim_duration=DURATION)
+    inspect = manager.proc_inspect
+    calendar = next(iter(inspect.processor_resources.values())).calendar
+    assert not inspect.is_zero_time_stage()
+    ends = [item.time_processing_end for item in inspect.completed_items]
+    assert ends and all(calendar.next_working_time(t) == t for t in ends)
+
+    with_calendar = run_scenario(line, seed=1, sim_duration=DURATION, backend="simpy")
+    without = run_scenario(dict(line, SHIFT_CALENDARS_ENABLED=False), seed=1, sim_duration=DURATION, backend="simpy")
+    assert with_calendar['mean_cycle_time'] > without['mean_cycle_time']
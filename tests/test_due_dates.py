@@ -0,0 +1,58 @@
+import math
+from conftest import FAST_LINE
+from helpers import close_kpis
+from scenario_SimPy import run_scenario, simulate
+from stats_SimPy import summarize_kpis
+from tracedb_SimPy import export_trace
+
+DURATION = 5 * 24 * 60
+POPULATION = dict(FAST_LINE, CUSTOMER_POPULATION=[
+    {"count": 3, "mean_interarrival": 120, "num_items": (1, 3), "priority": 2, "due_date": 600},
+    {"count": 2, "mean_interarrival": 240, "num_items": 2},
+])
+
+
+def test_tardiness_kpis():
+    manager, duration = simulate(POPULATION, seed=4, sim_duration=DURATION)
+    kpis = summarize_kpis(manager, duration)
+
+    tardiness, overdue = [], 0
+    for order in manager.processed_orders:
+        if order.due_date is None:
+            continue
+        if all(item.is_completed for item in order.list_items):
+            end = max(item.time_processing_end for item in order.list_items)
+            tardiness.append(max(0.0, end - order.due_date))
+        elif order.due_date < duration:
+            overdue += 1
+    assert tardiness and any(t > 0 for t in tardiness)
+    assert math.isclose(kpis['mean_tardiness'], sum(tardiness) / len(tardiness))
+    assert kpis['on_time_rate'] == sum(t == 0 for t in tardiness) / len(tardiness)
+    assert kpis['num_orders_overdue'] == overdue
+
+
+def test_tardiness_kpis_under_retention():
+    full = run_scenario(POPULATION, seed=4, sim_duration=DURATION, backend="simpy")
+    retained = run_scenario(dict(POPULATION, RETENTION_ENABLED=True), seed=4, sim_duration=DURATION, backend="simpy")
+    assert close_kpis(full, retained)
+
+
+def test_no_due_date_kpis_without_due_dates():
+    kpis = run_scenario(dict(FAST_LINE, CUST_ORDER_CYCLE=60), seed=1, sim_duration=DURATION, backend="simpy")
+    assert 'mean_tardiness' not in kpis
+
+
+def test_trace_database_orders_have_due_dates(tmp_path):
+    manager, duration = simulate(POPULATION, seed=4, sim_duration=DURATION)
+    db = export_trace(manager, str(tmp_path / "trace.sqlite"), duration)
+    try:
+        rows = db.query("SELECT priority, due_date, tardiness, is_completed FROM orders")
+        assert len(rows) == len(manager.processed_orders)
+        due = [row for row in rows if row['due_date'] is not None]
+        assert due and all(row['priority'] == 2 for row in due)
+        assert all(row['tardiness'] is None for row in rows if row['due_date'] is None)
+        assert all(row['tardiness'] >= 0 for row in due if row['is_completed'])
+        late = db.tardiest_orders(3)
+        assert late and late[0]['tardiness'] == max(row['tardiness'] for row in due if row['is_completed'])
+    finally:
+        db.close()
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from conftest import FAST_LINE
+from failure_SimPy import sample_downtime_schedule
+from scenario_SimPy import simulate
+
+
+class FixedDraws:
+    """Stand-in generator returning preset up/down times"""
+
+    def __init__(self, up, down):
+        self.draws = [up, down]
+
+    def exponential(self, scale, size):
+        values = np.full(size, 1e12)
+        first = self.draws.pop(0) if self.draws else []
+        values[:len(first)] = first
+        self.draws.append(first)
+        return values
+
+
+def test_no_outage_within_horizon():
+    starts, ends, is_pm = sample_downtime_schedule(np.random.default_rng(0), 10, 1e9, 10)
+    assert len(starts) == len(ends) == len(is_pm) == 0
+    assert is_pm.dtype == bool
+
+
+def test_pm_interval_equal_to_horizon():
+    rng = np.random.default_rng(1)
+    starts, ends, is_pm = sample_downtime_schedule(rng, 100, 1e9, 10, pm_interval=100, pm_duration=5)
+    assert len(starts) == 0
+
+
+def test_failure_overlapping_pm_stays_pm():
+    rng = FixedDraws(up=[90.0], down=[20.0])
+    starts, ends, is_pm = sample_downtime_schedule(rng, 150, 50, 20, pm_interval=100, pm_duration=10)
+    assert starts.tolist() == [90.0]
+    assert ends.tolist() == [110.0]
+    assert is_pm.tolist() == [True]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_default_failure_config_runs(seed):
+    overrides = dict(FAST_LINE, FAILURE_ENABLED=True)
+    manager, _ = simulate(overrides, seed=seed)
+    assert manager.failure_manager is not None
@@ -0,0 +1,41 @@
+import pytest
+from helpers import close_kpis, random_line_config, random_order_size
+from scenario_SimPy import run_fast_backend, run_scenario
+
+DURATION = 3 * 24 * 60
+
+
+@pytest.mark.parametrize("k", range(20))
+@pytest.mark.parametrize("random_sizes", [False, True])
+@pytest.mark.parametrize("zero_time", [False, True])
+def test_fast_backend_matches_simpy_seed_by_seed(k, random_sizes, zero_time):
+    overrides = random_line_config(k, zero_time)
+    if random_sizes:
+        overrides['NUM_ITEMS_PER_ORDER'] = random_order_size
+    simpy_kpis = run_scenario(overrides, seed=k, sim_duration=DURATION, backend="simpy")
+    fast = run_fast_backend(overrides, seed=k, sim_duration=DURATION, required=not zero_time)
+    if fast is None:
+        # A zero-duration stage before Inspect: the recurrences do not apply
+        assert min(overrides['STC_PROC_TIME_TRANSIT'], overrides['PROC_TIME_CUTTING'],
+                   overrides['CTI_PROC_TIME_TRANSIT']) == 0
+    else:
+        assert close_kpis(fast, simpy_kpis)
+    assert close_kpis(run_scenario(overrides, seed=k, sim_duration=DURATION), simpy_kpis)
+
+
+def test_auto_backend_matches_simpy():
+    overrides = dict(random_line_config(3), NUM_ITEMS_PER_ORDER=random_order_size)
+    auto = run_scenario(overrides, seed=5, sim_duration=DURATION)
+    simpy_kpis = run_scenario(overrides, seed=5, sim_duration=DURATION, backend="simpy")
+    assert close_kpis(auto, simpy_kpis)
+
+
+def test_cache_key_depends_on_backend(tmp_path):
+    from cache_SimPy import ResultCache
+
+    cache = ResultCache(str(tmp_path / "cache.sqlite"))
+    try:
+        keys = {cache.make_key({}, 1, 60, backend)[0] for backend in ("simpy", "fast", "kernel", "auto")}
+        assert len(keys) == 4
+    finally:
+        cache.close()
@@ -0,0 +1,35 @@
+import pytest
+from conftest import FAST_LINE
+from helpers import random_line_config, run_trace, same_kpis
+from scenario_SimPy import simulate
+from stats_SimPy import summarize_kpis
+
+DURATION = 2 * 24 * 60
+
+
+def run(overrides, seed, enabled):
+    manager, duration = simulate(dict(overrides, FAST_PATH_ZERO_TIME=enabled), seed, DURATION)
+    return summarize_kpis(manager, duration), run_trace(manager, duration)
+
+
+def assert_fast_path_neutral(overrides, seed):
+    kpis_off, trace_off = run(overrides, seed, False)
+    kpis_on, trace_on = run(overrides, seed, True)
+    assert same_kpis(kpis_off, kpis_on)
+    assert trace_off == trace_on
+
+
+def test_rework_with_zero_time_inspection():
+    overrides = dict(FAST_LINE, NUM_MACHINES_CNC=4, NUM_STC_MACHINES_AMR=3, NUM_CTI_MACHINES_AMR=2,
+                     NUM_WORKERS_IN_INSPECT=3, CAPACITY_MACHINE_AMR=5, CUST_ORDER_CYCLE=5,
+                     PROC_TIME_CUTTING=30, PROC_TIME_INSPECT=0, DEFECT_RATE_PROC_BUILD=0.4)
+    assert_fast_path_neutral(overrides, seed=1)
+
+
+@pytest.mark.parametrize("k", range(16))
+@pytest.mark.parametrize("defect_rate", [0, 0.3])
+@pytest.mark.parametrize("aggregate", [False, True])
+def test_fast_path_on_off_equivalence(k, defect_rate, aggregate):
+    overrides = dict(random_line_config(k, zero_time=True), DEFECT_RATE_PROC_BUILD=defect_rate,
+                     AGGREGATE_LOT_ENTITIES=aggregate)
+    assert_fast_path_neutral(overrides, seed=k)
@@ -0,0 +1,44 @@
+import pytest
+from conftest import FAST_LINE
+from helpers import random_order_size, same_kpis
+from incremental_SimPy import IncrementalRunner
+from scenario_SimPy import run_scenario
+
+DURATION = 3 * 24 * 60
+BASE = dict(FAST_LINE, CUST_ORDER_CYCLE=30, NUM_ITEMS_PER_ORDER=random_order_size)
+POINTS = [
+    {'NUM_MACHINES_CNC': 1},
+    {'NUM_MACHINES_CNC': 4},
+    {'PROC_TIME_CUTTING': 60},
+    {'CAPACICTY_MACHINE_CUTTING': 2},
+    {'NUM_CTI_MACHINES_AMR': 1},
+    {'CTI_PROC_TIME_TRANSIT': 10},
+    {'NUM_WORKERS_IN_INSPECT': 1, 'PROC_TIME_INSPECT': 20},
+]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+@pytest.mark.parametrize("point", POINTS)
+def test_replay_matches_full_run(point, seed):
+    runner = IncrementalRunner(BASE)
+    replayed = runner.run(point, seed, DURATION)
+    assert runner.num_replays == 1
+    full = run_scenario(dict(BASE, **point), seed, DURATION, backend="simpy")
+    assert same_kpis(replayed, full)
+
+
+def test_upstream_change_runs_in_full():
+    runner = IncrementalRunner(BASE)
+    point = {'STC_PROC_TIME_TRANSIT': 7}
+    kpis = runner.run(point, 1, DURATION)
+    assert runner.num_full_runs == 1
+    assert same_kpis(kpis, run_scenario(dict(BASE, **point), 1, DURATION, backend="simpy"))
+
+
+def test_retention_runs_in_full():
+    base = dict(BASE, RETENTION_ENABLED=True)
+    runner = IncrementalRunner(base)
+    point = {'NUM_CTI_MACHINES_AMR': 2}
+    kpis = runner.run(point, 1, DURATION)
+    assert runner.num_full_runs == 1 and runner.num_replays == 0
+    assert same_kpis(kpis, run_scenario(dict(base, **point), 1, DURATION, backend="simpy"))
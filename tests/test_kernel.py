@@ -0,0 +1,56 @@
+import random
+import pytest
+from conftest import FAST_LINE
+from helpers import random_line_config, random_order_size, same_kpis
+from kernel_SimPy import compare_with_simpy
+from scenario_SimPy import run_scenario
+
+DURATION = 3 * 24 * 60
+
+
+def kernel_line_config(k, random_sizes):
+    """Random qualifying line with batch CNCs and both settings of the zero-time fast path"""
+    rng = random.Random(100 + k)
+    overrides = dict(random_line_config(k),
+                     CAPACICTY_MACHINE_CUTTING=rng.randint(1, 3),
+                     FAST_PATH_ZERO_TIME=rng.random() < 0.5)
+    if random_sizes:
+        overrides['NUM_ITEMS_PER_ORDER'] = random_order_size
+    return overrides
+
+
+@pytest.mark.parametrize("k", range(20))
+@pytest.mark.parametrize("random_sizes", [False, True])
+def test_kernel_trace_matches_simpy(k, random_sizes):
+    overrides = kernel_line_config(k, random_sizes)
+    for seed in (1, 7):
+        result = compare_with_simpy(overrides, seed, DURATION)
+        assert result['identical'], result['first_difference']
+
+
+@pytest.mark.parametrize("k", range(5))
+def test_kernel_backend_kpis_match_simpy(k):
+    overrides = kernel_line_config(k, random_sizes=True)
+    kernel_kpis = run_scenario(overrides, seed=k, sim_duration=DURATION, backend="kernel")
+    simpy_kpis = run_scenario(overrides, seed=k, sim_duration=DURATION, backend="simpy")
+    assert same_kpis(kernel_kpis, simpy_kpis)
+
+
+def test_default_line_matches_simpy():
+    # Zero-time inspection with the fast path on (the default line)
+    for seed in (1, 2, 3):
+        result = compare_with_simpy(dict(FAST_LINE), seed, 10 * DURATION)
+        assert result['identical'], result['first_difference']
+
+
+@pytest.mark.parametrize("unsupported", [
+    {'DEFECT_RATE_PROC_BUILD': 0.3},
+    {'DEFECT_RATE_PROC_BUILD': 0.3, 'CAPACICTY_MACHINE_CUTTING': 2},
+    {'STC_PROC_TIME_TRANSIT': 0},
+    {'PROC_TIME_CUTTING': 0},
+    {'CTI_PROC_TIME_TRANSIT': 0},
+])
+def test_kernel_rejects_same_instant_feedback(unsupported):
+    overrides = dict(random_line_config(1), **unsupported)
+    with pytest.raises(ValueError):
+        run_scenario(overrides, seed=1, sim_duration=DURATION, backend="kernel")
@@ -0,0 +1,67 @@
+import csv
+import warnings
+import numpy as np
+import pytest
+from metamodel_SimPy import (GaussianProcessSurrogate, PolynomialSurrogate, SURROGATE_PARAMETERS,
+                             fit_surrogate)
+
+PARAMETERS = ['NUM_MACHINES_CNC', 'CUST_ORDER_CYCLE']
+
+
+def training_data(n, seed=0):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack((rng.integers(1, 5, n), rng.uniform(60, 720, n)))
+    y = 10 * X[:, 0] - X[:, 1] / 100 + rng.normal(0, 0.1, n)
+    return X, y
+
+
+def write_table(path, n):
+    rng = np.random.default_rng(1)
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=SURROGATE_PARAMETERS + ['throughput_per_day'])
+        writer.writeheader()
+        for _ in range(n):
+            row = {name: int(rng.integers(1, 4)) for name in SURROGATE_PARAMETERS}
+            row['CUST_ORDER_CYCLE'] = float(rng.uniform(60, 720))
+            row['throughput_per_day'] = float(rng.uniform(5, 20))
+            writer.writerow(row)
+
+
+def test_prediction_inside_bounds_does_not_warn():
+    X, y = training_data(20)
+    surrogate = GaussianProcessSurrogate(PARAMETERS, hyper_samples=8).fit(X, y)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        surrogate.predict({'NUM_MACHINES_CNC': 2, 'CUST_ORDER_CYCLE': 240})
+        surrogate.predict_array([X.min(axis=0), X.max(axis=0)])
+
+
+def test_extrapolation_warns():
+    surrogate = GaussianProcessSurrogate(PARAMETERS, hyper_samples=8).fit(*training_data(20))
+    assert surrogate.out_of_bounds([[2, 4320]]) == ['CUST_ORDER_CYCLE']
+    with pytest.warns(RuntimeWarning, match='CUST_ORDER_CYCLE'):
+        surrogate.predict({'NUM_MACHINES_CNC': 2, 'CUST_ORDER_CYCLE': 4320})
+    with pytest.warns(RuntimeWarning, match='NUM_MACHINES_CNC'):
+        surrogate.predict_array([[8, 240]])
+
+
+def test_polynomial_with_too_few_rows_warns():
+    assert PolynomialSurrogate.num_features(len(SURROGATE_PARAMETERS)) == 28
+    with pytest.warns(RuntimeWarning, match='6 polynomial features'):
+        PolynomialSurrogate(PARAMETERS).fit(*training_data(5))
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        PolynomialSurrogate(PARAMETERS).fit(*training_data(12))
+
+
+def test_fit_surrogate_falls_back_to_gp(tmp_path):
+    path = str(tmp_path / "results.csv")
+    write_table(path, 20)
+    with pytest.warns(RuntimeWarning, match='Gaussian process'):
+        surrogate = fit_surrogate(path, kind='poly')
+    assert isinstance(surrogate, GaussianProcessSurrogate)
+
+    write_table(path, 40)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        assert isinstance(fit_surrogate(path, kind='poly'), PolynomialSurrogate)
@@ -0,0 +1,51 @@
+import math
+from optimize_SimPy import Candidate, FleetSizingOptimizer
+from stats_SimPy import t_quantile
+
+
+def scripted_optimizer(kpi_by_count, **kwargs):
+    """Optimizer whose replications return a fixed KPI per NUM_MACHINES_CNC (no simulation)"""
+    optimizer = FleetSizingOptimizer('throughput_per_day', costs={'NUM_MACHINES_CNC': 1}, **kwargs)
+
+    def evaluate(pool, candidates, num_reps):
+        for cand in candidates:
+            value = kpi_by_count[cand.overrides['NUM_MACHINES_CNC']]
+            cand.values += [value] * (num_reps - len(cand.values))
+
+    optimizer._evaluate = evaluate
+    return optimizer
+
+
+def test_nan_kpi_is_infeasible():
+    optimizer = FleetSizingOptimizer('mean_cycle_time', target=100.0, maximize=False)
+    cand = Candidate({'NUM_MACHINES_CNC': 1}, 1)
+    cand.values = [math.nan, 80.0]
+    optimizer._classify([cand])
+    assert cand.status == "INFEASIBLE"
+
+
+def test_nan_candidate_is_not_picked():
+    # The cheapest candidate never completes anything; it must not win the race
+    optimizer = scripted_optimizer({1: math.nan, 2: 12.0, 3: 14.0}, target=10.0, max_reps=2)
+    best, ranked = optimizer.optimize([{'NUM_MACHINES_CNC': n} for n in (1, 2, 3)])
+    assert best.overrides == {'NUM_MACHINES_CNC': 2}
+    assert ranked[0].status == "INFEASIBLE"
+
+
+def test_successive_halving_eliminates():
+    # Nothing is decided after the first round (single value, infinite interval)
+    optimizer = scripted_optimizer({n: 5.0 + n for n in range(1, 5)}, target=20.0, initial_reps=1, max_reps=2)
+    _, ranked = optimizer.optimize([{'NUM_MACHINES_CNC': n} for n in range(1, 5)])
+    statuses = [cand.status for cand in ranked]
+    assert "ELIMINATED" in statuses
+    assert "DOMINATED" not in statuses
+
+
+def test_small_sample_intervals_use_exact_t_quantiles():
+    table = {1: 12.7062, 2: 4.3027, 3: 3.1824, 4: 2.7764, 5: 2.5706, 10: 2.2281, 30: 2.0423, 60: 2.0003}
+    for dof, expected in table.items():
+        assert math.isclose(t_quantile(0.975, dof), expected, abs_tol=1e-4)
+    assert math.isclose(t_quantile(0.995, 1), 63.6567, abs_tol=1e-4)
+    cand = Candidate({'NUM_MACHINES_CNC': 1}, 1)
+    cand.values = [10.0, 12.0]
+    assert math.isclose(cand.half_width(0.95), 12.7062, abs_tol=1e-3)
@@ -0,0 +1,17 @@
+import pytest
+from plant_SimPy import compare_plant_runs, run_plant
+
+DURATION = 2 * 24 * 60
+# Pools small enough to run dry, so the arbiter denies draws in both runs
+PLANT = {'CUST_ORDER_CYCLE': 30, 'LOT_INVEN_LEVEL': 20, 'PALLET_INVEN_LEVEL': 20, 'DEFECT_RATE_PROC_BUILD': 0.2}
+
+
+@pytest.mark.parametrize("rule", ["ROUND_ROBIN", "LEAST_LOADED"])
+def test_sharded_plant_matches_single_process(rule):
+    overrides = dict(PLANT, PLANT_ORDER_ROUTING=rule)
+    single = run_plant(overrides, seed=5, sim_duration=DURATION, num_lines=3)
+    sharded = run_plant(overrides, seed=5, sim_duration=DURATION, num_lines=3, sharded=True)
+    assert sum(single['supply']['denied_units'].values()) > 0
+    assert all(kpis['num_items_completed'] > 0 for kpis in single['lines'])
+    assert compare_plant_runs(single, sharded) == []
+    assert single['plant'] == sharded['plant']
@@ -0,0 +1,45 @@
+import math
+from conftest import FAST_LINE
+from helpers import random_order_size
+from scenario_SimPy import simulate
+from stats_SimPy import analyze_manager
+
+DURATION = 3 * 24 * 60
+LINE = dict(FAST_LINE, CUST_ORDER_CYCLE=30, NUM_ITEMS_PER_ORDER=random_order_size, DEFECT_RATE_PROC_BUILD=0.2)
+
+
+def same_result(a, b):
+    return all(a[k] == b[k] or (isinstance(a[k], float) and math.isnan(a[k]) and math.isnan(b[k])) for k in a)
+
+
+def test_output_analysis_under_retention_matches_full_run():
+    full, _ = simulate(LINE, seed=3, sim_duration=DURATION)
+    retained, _ = simulate(dict(LINE, RETENTION_ENABLED=True), seed=3, sim_duration=DURATION)
+    expected = analyze_manager(full, DURATION)
+    analysis = analyze_manager(retained, DURATION)
+    for name, series in expected.items():
+        assert series['cycle_time']['num_observations'] > 0
+        for series_name, result in series.items():
+            assert same_result(analysis[name][series_name], result), (name, series_name)
+
+
+def test_item_pool_belongs_to_its_manager():
+    import simpy
+    from base_Customer import Item
+    from log_SimPy import Logger
+    from manager import Manager
+    from scenario_SimPy import SCENARIO_DEFAULTS, apply_config
+
+    with apply_config(dict(SCENARIO_DEFAULTS, **LINE, RETENTION_ENABLED=True)):
+        env = simpy.Environment()
+        first = Manager(env, Logger(env))
+    sentinel = Item(1, 1, 1, "LOT")
+    first.item_pool.append(sentinel)
+
+    # Another run in the same process recycles through its own pool only
+    second, _ = simulate(dict(LINE, RETENTION_ENABLED=True), seed=2, sim_duration=DURATION)
+    assert first.item_pool == [sentinel]
+    assert all(item is not sentinel for order in second.retention.open_orders.values() for item in order[0].list_items)
+
+    without_retention, _ = simulate(LINE, seed=1, sim_duration=DURATION)
+    assert without_retention.item_pool is None
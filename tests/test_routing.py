@@ -0,0 +1,19 @@
+import copy
+import pytest
+from helpers import random_line_config, run_trace, same_kpis
+from routing_SimPy import DEFAULT_ROUTING_GRAPH
+from scenario_SimPy import run_scenario, simulate
+
+DURATION = 2 * 24 * 60
+
+
+@pytest.mark.parametrize("k", range(8))
+def test_explicit_default_graph_matches_built_in_line(k):
+    line = dict(random_line_config(k), DEFECT_RATE_PROC_BUILD=0.2)
+    explicit = dict(line, ROUTING_GRAPH=copy.deepcopy(DEFAULT_ROUTING_GRAPH))
+    built_in, _ = simulate(line, seed=k, sim_duration=DURATION)
+    graph, _ = simulate(explicit, seed=k, sim_duration=DURATION)
+    assert list(graph.get_processes()) == list(built_in.get_processes())
+    assert run_trace(graph, DURATION) == run_trace(built_in, DURATION)
+    assert same_kpis(run_scenario(explicit, seed=k, sim_duration=DURATION, backend="simpy"),
+                     run_scenario(line, seed=k, sim_duration=DURATION, backend="simpy"))
@@ -0,0 +1,43 @@
+import csv
+from conftest import FAST_LINE
+from incremental_SimPy import run_incremental_sweep
+from sweep_SimPy import ResultTableWriter, _finished_keys
+
+
+def read_table(path):
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        return reader.fieldnames, list(reader)
+
+
+def test_writer_extends_header_for_new_columns(tmp_path):
+    path = str(tmp_path / "results.csv")
+    writer = ResultTableWriter(path)
+    writer.write({'config_hash': 'a', 'seed': 1, 'throughput': 2.0})
+    writer.write({'config_hash': 'b', 'seed': 1, 'throughput': 3.0, 'tardiness': 5.0})
+    writer.close()
+
+    # Reopened table: rows with the new column keep their values
+    writer = ResultTableWriter(path)
+    writer.write({'config_hash': 'c', 'seed': 2, 'tardiness': 1.0})
+    writer.close()
+
+    fieldnames, rows = read_table(path)
+    assert fieldnames == ['config_hash', 'seed', 'throughput', 'tardiness']
+    assert [(r['config_hash'], r['throughput'], r['tardiness']) for r in rows] == [
+        ('a', '2.0', ''), ('b', '3.0', '5.0'), ('c', '', '1.0')]
+
+
+def test_sweep_keys_include_horizon(tmp_path):
+    path = str(tmp_path / "results.csv")
+    base = dict(FAST_LINE, CUST_ORDER_CYCLE=30)
+    points = [{'NUM_WORKERS_IN_INSPECT': 1}, {'NUM_WORKERS_IN_INSPECT': 2}]
+    run_incremental_sweep(points, base, seeds=(1,), output_path=path, sim_duration=600)
+    run_incremental_sweep(points, base, seeds=(1,), output_path=path, sim_duration=1200)
+    assert len(_finished_keys(path)) == 4
+
+    # Both horizons are already in the table: nothing runs again
+    runner = run_incremental_sweep(points, base, seeds=(1,), output_path=path, sim_duration=1200)
+    assert runner.num_replays + runner.num_full_runs == 0
+    _, rows = read_table(path)
+    assert len(rows) == 4
@@ -0,0 +1,33 @@
+import time
+from conftest import FAST_LINE
+from scenario_SimPy import SCENARIO_DEFAULTS, apply_config
+from twin_SimPy import DigitalTwin
+
+# 20 wall-milliseconds per sim-minute
+SPEED = 3000
+
+
+def run_twin(stall=None):
+    with apply_config(dict(SCENARIO_DEFAULTS, **FAST_LINE, PROC_TIME_CUTTING=5, EVENT_LOGGING=False)):
+        twin = DigitalTwin(speed=SPEED)
+        for _ in range(3):
+            twin.mes_queue.put({"type": "order", "is_supplier": "LOT", "num_items": 2})
+        if stall is not None:
+            def block():
+                yield twin.env.timeout(stall[0])
+                time.sleep(stall[1])
+            twin.env.process(block())
+        lag = twin.run(until=60)['lag']
+    return sum(s['events'] for s in lag.values()), sum(s['late_events'] for s in lag.values())
+
+
+def test_twin_keeping_up_has_few_late_events():
+    events, late = run_twin()
+    assert events > 0
+    assert late < events / 10
+
+
+def test_twin_behind_reports_late_events():
+    # Blocking the loop for 0.3 s at minute 2 puts the next ~15 sim-minutes behind the wall clock
+    events, late = run_twin(stall=(2, 0.3))
+    assert late > 0
@@ -0,0 +1,232 @@
+import os
+import sqlite3
+from config_SimPy import *
+
+""" Indexed trace database (SQLite, or DuckDB when available) with a small query API """
+
+SCHEMA = [
+    "CREATE TABLE meta (key TEXT, value TEXT)",
+    "CREATE TABLE orders (id_customer INTEGER, id_order INTEGER, is_supplier TEXT, num_items INTEGER,"
+    " time_start DOUBLE, time_end DOUBLE, makespan DOUBLE, is_completed INTEGER, priority INTEGER,"
+    " due_date DOUBLE, tardiness DOUBLE)",
+    "CREATE TABLE items (id_customer INTEGER, id_order INTEGER, id_item INTEGER, quantity INTEGER,"
+    " is_supplier TEXT, is_completed INTEGER, time_release DOUBLE, time_end DOUBLE,"
+    " num_cutting_visits INTEGER)",
+    "CREATE TABLE steps (id_customer INTEGER, id_order INTEGER, id_item INTEGER, kind TEXT,"
+    " process TEXT, resource_name TEXT, resource_type TEXT, start_time DOUBLE, end_time DOUBLE,"
+    " duration DOUBLE)",
+    "CREATE TABLE resources (resource_name TEXT, process TEXT, resource_type TEXT, resource_id INTEGER,"
+    " capacity INTEGER, processing_time DOUBLE)",
+    "CREATE TABLE queue_lengths (process TEXT, seq INTEGER, time DOUBLE, length INTEGER)",
+]
+
+INDEXES = [
+    "CREATE INDEX idx_orders_order ON orders (id_order)",
+    "CREATE INDEX idx_items_order ON items (id_order)",
+    "CREATE INDEX idx_steps_order ON steps (id_order)",
+    "CREATE INDEX idx_steps_resource ON steps (resource_name, start_time)",
+    "CREATE INDEX idx_steps_time ON steps (start_time, end_time)",
+    "CREATE INDEX idx_queue_time ON queue_lengths (process, time)",
+]
+
+TABLES = ['meta', 'orders', 'items', 'steps', 'resources', 'queue_lengths']
+
+
+def _connect(path, engine):
+    """Open a SQLite or DuckDB connection (both accept ? parameters and executemany)"""
+    engine = engine.lower()
+    if engine == "auto":
+        engine = "sqlite"
+        if path.endswith('.duckdb'):
+            try:
+                import duckdb  # noqa: F401
+                engine = "duckdb"
+            except ImportError:
+                pass
+    if engine == "duckdb":
+        import duckdb
+        return duckdb.connect(path), engine
+    if engine != "sqlite":
+        raise ValueError(f"Unknown trace database engine: {engine!r}")
+    return sqlite3.connect(path), engine
+
+
+def _batches(rows, batch_size):
+    """Split a row iterator into lists of at most batch_size rows"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _order_rows(manager):
+    for order in manager.processed_orders:
+        done = bool(order.list_items) and all(item.is_completed for item in order.list_items)
+        end = max(item.time_processing_end for item in order.list_items) if done else None
+        yield (order.id_customer, order.id_order, order.is_supplier, order.num_items, order.time_start,
+               end, end - order.time_start if done else None, int(done), order.priority, order.due_date,
+               order.tardiness(end) if done else None)
+
+
+def _items(manager):
+    for order in manager.processed_orders:
+        yield from order.list_items
+
+
+def _item_rows(manager):
+    for item in _items(manager):
+        release = item.waiting_history[0]['start_time'] if item.waiting_history else None
+        yield (item.id_customer, item.id_order, item.id_item, getattr(item, 'quantity', 1), item.is_supplier,
+               int(item.is_completed), release, item.time_processing_end if item.is_completed else None,
+               sum(1 for step in item.processing_history if step['process'] == "Proc_Cutting"))
+
+
+def _step_rows(manager):
+    for item in _items(manager):
+        key = (item.id_customer, item.id_order, item.id_item)
+        for step in item.waiting_history:
+            yield key + ('wait', step['process'], None, None,
+                         step['start_time'], step['end_time'], step['duration'])
+        for step in item.processing_history:
+            yield key + ('process', step['process'], step['resource_name'], step['resource_type'],
+                         step['start_time'], step['end_time'], step['duration'])
+
+
+def _resource_rows(manager):
+    for process in manager.get_processes().values():
+        for res in process.processor_resources.values():
+            yield (res.name, process.name_process, res.processor_type, res.id, res.capacity,
+                   getattr(res, 'processing_time', None))
+
+
+def _queue_rows(manager):
+    for process in manager.get_processes().values():
+        for seq, (time, length) in enumerate(process.item_store.queue_length_history):
+            yield (process.name_process, seq, time, length)
+
+
+class TraceDatabase:
+    """
+    Per-run trace database and the queries analysts ask most often
+
+    Attributes:
+        path (str): Database file
+        engine (str): "sqlite" or "duckdb"
+        conn: DB-API connection
+    """
+
+    def __init__(self, path=None, engine=None):
+        self.path = TRACE_DB_PATH if path is None else path
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn, self.engine = _connect(self.path, TRACE_DB_ENGINE if engine is None else engine)
+
+    def export(self, manager, sim_duration=None, batch_size=None):
+        """
+        Replace the stored trace with the trace of a finished run
+
+        Rows are streamed from the item histories in batches of
+        `batch_size` per executemany call; indexes are built after loading.
+        """
+        batch_size = TRACE_DB_BATCH_SIZE if batch_size is None else batch_size
+        cur = self.conn.cursor()
+        for table in TABLES:
+            cur.execute(f"DROP TABLE IF EXISTS {table}")
+        for statement in SCHEMA:
+            cur.execute(statement)
+
+        meta = [('sim_duration', str(sim_duration)), ('engine', self.engine)]
+        if getattr(manager, 'retention', None) is not None:
+            # Retired orders live in the retention archive, only open orders are exported
+            meta.append(('retention', 'open orders only'))
+        loads = [
+            ("INSERT INTO meta VALUES (?, ?)", meta),
+            ("INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", _order_rows(manager)),
+            ("INSERT INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", _item_rows(manager)),
+            ("INSERT INTO steps VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", _step_rows(manager)),
+            ("INSERT INTO resources VALUES (?, ?, ?, ?, ?, ?)", _resource_rows(manager)),
+            ("INSERT INTO queue_lengths VALUES (?, ?, ?, ?)", _queue_rows(manager)),
+        ]
+        for statement, rows in loads:
+            for batch in _batches(rows, batch_size):
+                cur.executemany(statement, batch)
+        for statement in INDEXES:
+            cur.execute(statement)
+        self.conn.commit()
+        return self
+
+    def query(self, sql, params=()):
+        """Run a query and return the rows as dictionaries"""
+        cur = self.conn.cursor()
+        cur.execute(sql, params)
+        columns = [d[0] for d in cur.description]
+        return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+    def order_history(self, id_order, id_customer=None):
+        """Every waiting and processing step of an order's items in time order"""
+        sql = "SELECT * FROM steps WHERE id_order = ?"
+        params = [id_order]
+        if id_customer is not None:
+            sql += " AND id_customer = ?"
+            params.append(id_customer)
+        return self.query(sql + " ORDER BY start_time, id_item, kind DESC", params)
+
+    def resource_activity(self, resource_name, start, end):
+        """Processing steps of a resource that overlap the window [start, end)"""
+        return self.query(
+            "SELECT * FROM steps WHERE resource_name = ? AND kind = 'process'"
+            " AND start_time < ? AND (end_time IS NULL OR end_time > ?)"
+            " ORDER BY start_time, id_order, id_item",
+            (resource_name, end, start))
+
+    def resource_busy_time(self, resource_name, start, end):
+        """Busy time of a resource inside [start, end) (a batch counts once)"""
+        rows = self.query(
+            "SELECT DISTINCT start_time, end_time FROM steps WHERE resource_name = ? AND kind = 'process'"
+            " AND end_time IS NOT NULL AND start_time < ? AND end_time > ? ORDER BY start_time",
+            (resource_name, end, start))
+        busy = 0.0
+        covered = start
+        for row in rows:
+            lo = max(row['start_time'], covered)
+            hi = min(row['end_time'], end)
+            if hi > lo:
+                busy += hi - lo
+                covered = hi
+        return busy
+
+    def slowest_orders(self, n=10):
+        """Completed orders with the longest makespans"""
+        return self.query(
+            "SELECT * FROM orders WHERE is_completed = 1 ORDER BY makespan DESC LIMIT ?", (n,))
+
+    def tardiest_orders(self, n=10):
+        """Completed orders furthest past their due dates"""
+        return self.query(
+            "SELECT * FROM orders WHERE is_completed = 1 AND tardiness > 0 ORDER BY tardiness DESC LIMIT ?", (n,))
+
+    def work_in_process(self, time):
+        """Number of released, not yet completed items at a point in time"""
+        rows = self.query(
+            "SELECT COALESCE(SUM(quantity), 0) AS wip FROM items"
+            " WHERE time_release <= ? AND (time_end IS NULL OR time_end > ?)", (time, time))
+        return rows[0]['wip']
+
+    def queue_length_at(self, process, time):
+        """Queue length of a process just after `time` (last record at or before it)"""
+        rows = self.query(
+            "SELECT length FROM queue_lengths WHERE process = ? AND time <= ?"
+            " ORDER BY time DESC, seq DESC LIMIT 1", (process, time))
+        return rows[0]['length'] if rows else 0
+
+    def close(self):
+        self.conn.close()
+
+
+def export_trace(manager, path=None, sim_duration=None, engine=None):
+    """Export a finished run into a trace database and return it"""
+    return TraceDatabase(path, engine).export(manager, sim_duration)
@@ -0,0 +1,223 @@
+import queue
+import time
+import simpy
+import simpy.rt
+from config_SimPy import *
+from base_Customer import Order
+from log_SimPy import Logger
+
+""" Real-time paced digital-twin mode: external MES events, scheduling lag and drift monitoring """
+
+
+class TwinEnvironment(simpy.rt.RealtimeEnvironment):
+    """
+    Real-time environment that measures how far event processing falls behind the wall clock
+
+    `speed` is sim-minutes per wall-minute (1 = real time). The environment is
+    never strict: a late event is processed as soon as possible and its lag
+    (wall time past its due time) is charged to the Process it resumes.
+    Every event is processed a little after its due time, so only lags above
+    `late_threshold` count as late.
+
+    Attributes:
+        speed (float): Simulation speed relative to the wall clock
+        late_threshold (float): Lag (seconds) above which an event is late
+        lag (float): Lag of the most recently processed event (seconds)
+        lag_stats (dict): {process name: {'count', 'late', 'total', 'max'}}
+    """
+
+    def __init__(self, speed=None, late_threshold=None):
+        self.speed = TWIN_SPEED if speed is None else speed
+        self.late_threshold = TWIN_LATE_THRESHOLD if late_threshold is None else late_threshold
+        # One sim time unit is one minute
+        super().__init__(initial_time=0, factor=60.0 / self.speed, strict=False)
+        self.lag = 0.0
+        self.lag_stats = {}
+
+    def step(self):
+        if self._queue:
+            due = self.real_start + (self.peek() - self.env_start) * self.factor
+            self.lag = max(0.0, time.monotonic() - due)
+            owner = _owner_process(self._queue[0][3])
+            if owner is not None:
+                stats = self.lag_stats.setdefault(owner, {'count': 0, 'late': 0, 'total': 0.0, 'max': 0.0})
+                stats['count'] += 1
+                stats['total'] += self.lag
+                stats['max'] = max(stats['max'], self.lag)
+                if self.lag > self.late_threshold:
+                    stats['late'] += 1
+        super().step()
+
+    def lag_report(self):
+        """Per-process lag summary (seconds; late_events = lags above late_threshold)"""
+        return {name: {'events': s['count'], 'late_events': s['late'],
+                       'mean_lag': s['total'] / s['count'] if s['count'] else 0.0, 'max_lag': s['max']}
+                for name, s in self.lag_stats.items()}
+
+
+def _owner_process(event):
+    """Name of the model Process whose generator an event resumes (None if none)"""
+    for callback in event.callbacks or ():
+        owner = getattr(callback, '__self__', None)
+        if isinstance(owner, simpy.events.Condition):
+            # Process.run waits on item_added_trigger | resource_trigger
+            for inner in owner.callbacks or ():
+                name = _generator_owner(getattr(inner, '__self__', None))
+                if name is not None:
+                    return name
+        name = _generator_owner(owner)
+        if name is not None:
+            return name
+    return None
+
+
+def _generator_owner(process):
+    if not isinstance(process, simpy.Process):
+        return None
+    frame = getattr(process._generator, 'gi_frame', None)
+    owner = frame.f_locals.get('self') if frame is not None else None
+    return getattr(owner, 'name_process', None)
+
+
+class ThrottledLogger(Logger):
+    """
+    Logger that degrades gracefully while the twin is behind the wall clock
+
+    Above `max_lag` seconds of lag, messages are not printed one by one;
+    they are counted per event type and summarized once per `flush_interval`
+    wall-seconds.
+    """
+
+    def __init__(self, env, max_lag=None, flush_interval=None):
+        super().__init__(env)
+        self.max_lag = TWIN_LOG_MAX_LAG if max_lag is None else max_lag
+        self.flush_interval = TWIN_LOG_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.skipped = {}
+        self.last_flush = time.monotonic()
+
+    def log_event(self, event_type, message):
+        if getattr(self.env, 'lag', 0.0) <= self.max_lag:
+            self.flush()
+            super().log_event(event_type, message)
+            return
+        self.skipped[event_type] = self.skipped.get(event_type, 0) + 1
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Print one summary line for the skipped messages"""
+        self.last_flush = time.monotonic()
+        if not self.skipped or not EVENT_LOGGING:
+            self.skipped.clear()
+            return
+        counts = ', '.join(f"{name}: {count}" for name, count in sorted(self.skipped.items()))
+        print(f"[{int(self.env.now)}] | Logging behind real time (lag {self.env.lag:.2f}s), skipped {counts}")
+        self.skipped.clear()
+
+
+class DigitalTwin:
+    """
+    Runs the Manager paced to the wall clock and fed by MES events
+
+    External messages (dicts) are read from a thread-safe queue every
+    TWIN_POLL_INTERVAL sim-minutes, in place of Customer.create_order:
+        {"type": "order", "is_supplier": "LOT", "num_items": 3, "priority": 1, "due_date": 2880}
+        {"type": "item_completed", "id_order": 5, "id_item": 1, "process": "Proc_Cutting"}
+        {"type": "stop"}
+    Item completions reported by the floor are compared with the twin's own
+    history of that item to track drift (floor time minus twin time).
+
+    Attributes:
+        env (TwinEnvironment): Real-time environment
+        manager (Manager): Simulated factory
+        mes_queue (queue.Queue): External event queue
+        orders (dict): {id_order: Order} of the orders received from the MES
+        drift (dict): {process name: [floor time - twin time, ...]}
+        unmatched (list): Completions the twin has not reached yet (item, process, floor time)
+    """
+
+    def __init__(self, mes_queue=None, speed=None):
+        from manager import Manager
+
+        self.env = TwinEnvironment(speed)
+        self.manager = Manager(self.env, ThrottledLogger(self.env))
+        self.mes_queue = queue.Queue() if mes_queue is None else mes_queue
+        self.orders = {}
+        self.order_counter = 1
+        self.id_customer = 1
+        self.drift = {}
+        self.unmatched = []
+        self.stopped = self.env.event()
+        self.env.process(self._listen())
+
+    def _listen(self):
+        """Drain the MES queue at every poll (events take effect at the poll time)"""
+        while True:
+            while True:
+                try:
+                    message = self.mes_queue.get_nowait()
+                except queue.Empty:
+                    break
+                self.handle(message)
+            if self.stopped.triggered:
+                return
+            yield self.env.timeout(TWIN_POLL_INTERVAL)
+
+    def handle(self, message):
+        kind = message.get('type')
+        if kind == 'order':
+            self.receive_order(message)
+        elif kind == 'item_completed':
+            self.record_completion(message)
+        elif kind == 'stop':
+            if not self.stopped.triggered:
+                self.stopped.succeed()
+
+    def receive_order(self, message):
+        """Release an MES order into the twin"""
+        order = Order(self.id_customer, message.get('id_order', self.order_counter),
+                      message.get('is_supplier') or SUPPLY_TYPE_DECISION(), message.get('num_items'),
+                      message.get('priority', 0), message.get('due_date'), self.manager.item_pool)
+        self.order_counter = max(self.order_counter, order.id_order) + 1
+        order.time_start = self.env.now
+        self.orders[order.id_order] = order
+        self.manager.receive_order(order)
+
+    def record_completion(self, message):
+        """Compare a floor completion with the twin's end time of the same step"""
+        order = self.orders.get(message['id_order'])
+        process = message.get('process', "Proc_Inspect")
+        floor_time = message.get('time', self.env.now)
+        item = None
+        if order is not None:
+            item = next((i for i in order.list_items if i.id_item == message['id_item']), None)
+        twin_end = None
+        if item is not None:
+            ends = [step['end_time'] for step in item.processing_history
+                    if step['process'] == process and step['end_time'] is not None]
+            twin_end = ends[-1] if ends else None
+        if twin_end is None:
+            self.unmatched.append((message['id_order'], message['id_item'], process, floor_time))
+            return
+        self.drift.setdefault(process, []).append(floor_time - twin_end)
+
+    def run(self, until=None):
+        """Run paced to the wall clock until `until` sim-minutes or a stop message"""
+        self.env.sync()
+        stop = self.stopped if until is None else self.stopped | self.env.timeout(until)
+        self.env.run(until=stop)
+        self.manager.logger.flush()
+        return self.report()
+
+    def report(self):
+        """Lag per process and drift per process (minutes)"""
+        drift = {}
+        for process, values in self.drift.items():
+            drift[process] = {'count': len(values), 'mean_drift': sum(values) / len(values),
+                              'max_abs_drift': max(abs(v) for v in values)}
+        return {
+            'sim_time': self.env.now,
+            'lag': self.env.lag_report(),
+            'drift': drift,
+            'unmatched_completions': len(self.unmatched),
+        }